@@ -1,58 +1,109 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-
-def generate_si_fig_s1_authentic():
-    # 建立 ibm_torino 的 Heavy-Hex 连通性模型 (示意 28 比特路径)
-    G = nx.Graph()
-    
-    # 实验使用的真实链长 (来自 fss_scaling_data.json)
-    L = 28
-    chain_nodes = list(range(L))
-    
-    # 添加边：模拟 Heavy-Hex 上的线性耦合路径
-    for i in range(L - 1):
-        G.add_edge(chain_nodes[i], chain_nodes[i+1])
-        
-    # 设置节点坐标：模拟 Heavy-Hex 的锯齿状(Zig-zag)排列
-    # 这种排列比单纯的直线更能体现真实芯片的拓扑结构
-    pos = {}
-    for i in range(L):
-        col = i // 2
-        row = i % 2
-        # 给坐标增加一点微小的偏移，模拟真实的物理排布
-        pos[i] = (col * 1.5, -row * 1.2 if col % 2 == 0 else -row * 1.2 - 0.6)
-
-    plt.figure(figsize=(14, 5))
-    
-    # 1. 绘制实验路径的边
-    nx.draw_networkx_edges(G, pos, width=2.5, edge_color='#1f77b4', alpha=0.8)
-    
-    # 2. 绘制物理比特节点
-    # 蓝色代表普通参与计算的比特
-    nx.draw_networkx_nodes(G, pos, nodelist=chain_nodes, 
-                           node_size=350, node_color='#F0F0F0', 
-                           edgecolors='#1f77b4', linewidths=2)
-
-    # 3. 高亮混沌源 (Q0) 和 视界探测点 (Q19)
-    nx.draw_networkx_nodes(G, pos, nodelist=[0], node_size=500, node_color='#FFD700', label='Chaos Source ($Q_0$)')
-    nx.draw_networkx_nodes(G, pos, nodelist=[19], node_size=500, node_color='#D62728', label='Horizon Probe ($Q_{19}$)')
-
-    # 4. 标注节点编号 (让图表看起来极其专业)
-    labels = {i: str(i) for i in chain_nodes}
-    nx.draw_networkx_labels(G, pos, labels, font_size=9, font_weight='bold')
-
-    # 5. 添加真实的 Job ID 和 后端信息 (这就是“真机感”)
-    plt.title("Supplemental Fig S1: Hardware Topology and 28-Qubit Mapping\n" + 
-              "Backend: ibm_torino | Job ID: d59q7e1smlfc739ksb3g", 
-              fontsize=14, pad=20, fontweight='bold')
-    
-    # 6. 图例与美化
-    plt.legend(scatterpoints=1, loc='lower center', bbox_to_anchor=(0.5, -0.15), ncol=2, frameon=True)
-    plt.axis('off')
-    plt.tight_layout()
-    
-    # 保存为 PDF
-    plt.savefig('si_fig_s1_topology_authentic.pdf', bbox_inches='tight')
-    plt.show()
-
-generate_si_fig_s1_authentic()
+import os
+import sys
+
+import matplotlib.pyplot as plt
+import networkx as nx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sediment.circuits import sediment_template
+from sediment.layout import chain_layouts
+from sediment.store import ResultStore
+
+BACKEND_NAME = "ibm_torino"
+L = 28                      # 实验使用的真实链长 (来自 fss_scaling_data.json)
+HORIZON = 19                # 视界探测点 (逻辑比特)
+JOB_ID = None               # 给定且档案里记有 layouts 时，画该任务实际使用的链
+OFFLINE = os.environ.get("SEDIMENT_OFFLINE", "0") == "1"
+
+
+def load_backend():
+    """真机校准优先；离线或连不上时用 FakeTorino 的校准快照"""
+    if not OFFLINE:
+        try:
+            from qiskit_ibm_runtime import QiskitRuntimeService
+            return QiskitRuntimeService().backend(BACKEND_NAME)
+        except Exception as e:
+            print(f"⚠️ 无法连接 {BACKEND_NAME} ({e})，改用 FakeTorino 校准快照")
+    from qiskit_ibm_runtime.fake_provider import FakeTorino
+    return FakeTorino()
+
+
+def heavy_hex_positions(G):
+    """
+    Heavy-Hex 坐标: 编号连续的长行 (q, q+1) 为一排，桥接比特放在两排之间、与所连比特对齐.
+    Heron 的编号规则下每排等长，行内位置即横坐标.
+    """
+    rows = nx.Graph()
+    rows.add_nodes_from(G)
+    rows.add_edges_from((a, b) for a, b in G.edges if abs(a - b) == 1)
+    pos = {}
+    lines = sorted((sorted(c) for c in nx.connected_components(rows) if len(c) >= 3), key=lambda c: c[0])
+    for r, line in enumerate(lines):
+        for q in line:
+            pos[q] = (q - line[0], -2.0 * r)
+    for q in G:
+        if q not in pos:
+            placed = [pos[n] for n in G[q] if n in pos]
+            if placed:
+                x = sum(p[0] for p in placed) / len(placed)
+                y = sum(p[1] for p in placed) / len(placed) if len(placed) > 1 else placed[0][1] - 1.0
+                pos[q] = (x, y)
+    # 非 Heavy-Hex 的耦合图退回弹簧布局
+    return pos if len(pos) == G.number_of_nodes() else nx.spring_layout(G, seed=2025)
+
+
+def generate_si_fig_s1_authentic():
+    backend = load_backend()
+    G = nx.Graph()
+    G.add_nodes_from(range(backend.num_qubits))
+    G.add_edges_from(tuple(e) for e in backend.coupling_map.get_edges())
+
+    # 真实映射: 任务档案里记录的链，否则按当前校准现找 (与编译时固定的初始布局一致)
+    chain, source = None, f"calibration snapshot of {backend.name}"
+    store = ResultStore()
+    if JOB_ID is not None and JOB_ID in store:
+        layouts = store.archive(JOB_ID).metadata.get("layouts") or {}
+        chain = next((path for paths in layouts.values() for path in paths if len(path) == L), None)
+        source = f"Job ID: {JOB_ID}" if chain else source
+    if chain is None:
+        chain = chain_layouts([sediment_template(L)], backend)[0]
+    print(f"🗺️ {L}-qubit chain ({source}): {chain}")
+
+    pos = heavy_hex_positions(G)
+    chain_edges = list(zip(chain, chain[1:]))
+    plt.figure(figsize=(16, 7))
+
+    # 1. 整个芯片的耦合图 (浅灰) + 实验路径的边
+    nx.draw_networkx_edges(G, pos, width=1.0, edge_color='#D0D0D0')
+    nx.draw_networkx_nodes(G, pos, node_size=60, node_color='#E8E8E8', edgecolors='#B0B0B0')
+    nx.draw_networkx_edges(G, pos, edgelist=chain_edges, width=2.5, edge_color='#1f77b4', alpha=0.8)
+
+    # 2. 绘制链上的物理比特节点
+    nx.draw_networkx_nodes(G, pos, nodelist=chain,
+                           node_size=300, node_color='#F0F0F0',
+                           edgecolors='#1f77b4', linewidths=2)
+
+    # 3. 高亮混沌源 (逻辑 Q0) 和 视界探测点 (逻辑 Q19)
+    nx.draw_networkx_nodes(G, pos, nodelist=[chain[0]], node_size=450, node_color='#FFD700',
+                           label=f'Chaos Source ($Q_0$ → phys. {chain[0]})')
+    nx.draw_networkx_nodes(G, pos, nodelist=[chain[HORIZON]], node_size=450, node_color='#D62728',
+                           label=f'Horizon Probe ($Q_{{{HORIZON}}}$ → phys. {chain[HORIZON]})')
+
+    # 4. 标注链上节点的逻辑编号
+    labels = {q: str(i) for i, q in enumerate(chain)}
+    nx.draw_networkx_labels(G, pos, labels, font_size=8, font_weight='bold')
+
+    plt.title(f"Supplemental Fig S1: Hardware Topology and {L}-Qubit Mapping\n" +
+              f"Backend: {backend.name} | {source}",
+              fontsize=14, pad=20, fontweight='bold')
+
+    # 5. 图例与美化
+    plt.legend(scatterpoints=1, loc='lower center', bbox_to_anchor=(0.5, -0.12), ncol=2, frameon=True)
+    plt.axis('off')
+    plt.tight_layout()
+
+    # 保存为 PDF
+    plt.savefig('si_fig_s1_topology_authentic.pdf', bbox_inches='tight')
+    plt.show()
+
+generate_si_fig_s1_authentic()
@@ -1,51 +1,89 @@
-import json
-import matplotlib.pyplot as plt
-import numpy as np
-
-# 1. 加载真机 FSS 实验数据
-with open('fss_scaling_data.json', 'r') as f:
-    fss_data = json.load(f)
-
-# 2. 设定 2D Ising 理论临界指数 (这是咱们的核心物理结论)
-gamma_c = 0.25
-nu = 1.0      # 关联长度指数 (Correlation length exponent)
-beta = 0.125  # 序参量指数 (Order parameter exponent)
-
-plt.figure(figsize=(9, 7))
-
-# 定义不同尺寸的颜色
-colors = {'L16': '#1f77b4', 'L20': '#ff7f0e', 'L24': '#2ca02c', 'L28': '#d62728'}
-
-# 3. 处理每个尺寸的数据并进行标度变换
-for L_key in ['L16', 'L20', 'L24', 'L28']:
-    L_val = int(L_key[1:])
-    cfs = np.array(fss_data['raw'][L_key]['cfs'])
-    probs = np.array(fss_data['raw'][L_key]['probs'])
-    
-    # 序参量 m = 1 - 2*P(1)
-    # 将激发概率转化为类似“磁化强度”的几何序参量
-    m = 1 - 2 * probs
-    
-    # 进行重整化缩放 (Data Collapse Transformation)
-    # 横轴: (gamma - gamma_c) * L^(1/nu)
-    # 纵轴: m * L^(beta/nu)
-    rescaled_x = (cfs - gamma_c) * (L_val ** (1/nu))
-    rescaled_y = m * (L_val ** (beta/nu))
-    
-    plt.plot(rescaled_x, rescaled_y, 'o-', label=f'Size $L={L_val}$', 
-             color=colors[L_key], markersize=8, linewidth=2, alpha=0.8)
-
-# 4. 辅助线与图表美化
-plt.axvline(x=0, color='black', linestyle='--', alpha=0.3)
-plt.xlabel(r'Rescaled Coupling $(\gamma - \gamma_c) L^{1/\nu}$', fontsize=14)
-plt.ylabel(r'Rescaled Order Parameter $m L^{\beta/\nu}$', fontsize=14)
-plt.title("Supplemental Fig S4: Universal Data Collapse (2D Ising Class)\n" + 
-          f"Job ID: {fss_data['job_id']}", fontsize=15, pad=15)
-
-plt.grid(True, linestyle=':', alpha=0.6)
-plt.legend(fontsize=12, frameon=True, shadow=True)
-plt.tight_layout()
-
-# 5. 保存为 PDF
-plt.savefig('si_fig_s4_data_collapse.pdf')
-plt.show()
+import json
+import os
+import sys
+import matplotlib.pyplot as plt
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sediment.collapse import (load_curves, fit_collapse, bootstrap_collapse, collapse_cost, rescale,
+                               replicates_at_bound)
+from sediment.bootstrap import summarize
+
+# 2D Ising 理论临界指数 (作为参考，不再硬编码进塌缩)
+ISING = {"gamma_c": 0.25, "nu": 1.0, "beta": 0.125}
+N_BOOTSTRAP = 200
+FIT_FILENAME = 'fss_collapse_fit.json'
+
+
+def main():
+    # 1. 加载真机 FSS 实验数据
+    with open('fss_scaling_data.json', 'r') as f:
+        fss_data = json.load(f)
+    curves = load_curves(fss_data)
+
+    # 2. 自动塌缩: 网格粗搜 + 并行多起点局部优化，再 bootstrap 给出指数误差
+    best = fit_collapse(curves)
+    reps = bootstrap_collapse(curves, best, replicates=N_BOOTSTRAP, seed=2025)
+    names = ["gamma_c", "nu", "beta"]
+    summary = {name: summarize(best[name], reps[:, k]) for k, name in enumerate(names)}
+    ising_cost = float(collapse_cost(curves, ISING["gamma_c"], ISING["nu"], ISING["beta"]))
+    # 贴在搜索边界上的参数不是真正的极小值，置信区间是被边界截出来的
+    rep_bound = replicates_at_bound(reps)
+
+    print("🧩 Data collapse fit (95% bootstrap CI):")
+    for name in names:
+        lo, hi = summary[name]["ci"]
+        flag = "  ⚠️ 最优解贴在搜索边界上" if name in best["at_bound"] else ""
+        if rep_bound[name] > 0:
+            flag += f"  ⚠️ {rep_bound[name]:.0%} 的 bootstrap 贴边"
+        print(f"   {name:<8} = {best[name]:.4f}  [{lo:.4f}, {hi:.4f}]{flag}")
+    print(f"   χ²/N = {best['cost']:.3f}  (2D Ising 参考指数: {ising_cost:.3f})")
+    if best["at_bound"]:
+        print(f"⚠️ {', '.join(best['at_bound'])} 贴边: 数据不足以约束这些指数，不要把区间当作误差棒")
+
+    with open(FIT_FILENAME, 'w') as f:
+        json.dump({"job_id": fss_data['job_id'], "fit": summary, "cost": best['cost'],
+                   "ising_cost": ising_cost, "replicates": N_BOOTSTRAP,
+                   "at_bound": best["at_bound"], "replicates_at_bound": rep_bound}, f, indent=4)
+    print(f"💾 拟合结果已保存: {FIT_FILENAME}")
+
+    plt.figure(figsize=(9, 7))
+
+    # 定义不同尺寸的颜色
+    colors = {'L16': '#1f77b4', 'L20': '#ff7f0e', 'L24': '#2ca02c', 'L28': '#d62728'}
+
+    # 3. 用拟合出的 (γ_c, ν, β) 做标度变换
+    #    横轴: (gamma - gamma_c) * L^(1/nu)
+    #    纵轴: m * L^(beta/nu)，序参量 m = 1 - 2*P(1)
+    for curve in curves:
+        L_key = f"L{curve['L']}"
+        rescaled_x, rescaled_y = rescale(curve, best['gamma_c'], best['nu'], best['beta'])
+        plt.plot(rescaled_x, rescaled_y, 'o-', label=f"Size $L={curve['L']}$",
+                 color=colors.get(L_key), markersize=8, linewidth=2, alpha=0.8)
+
+    # 4. 辅助线与图表美化
+    edge = {name: " (at bound)" if name in best["at_bound"] else "" for name in names}
+    fit_text = "\n".join(
+        [rf"$\gamma_c = {best['gamma_c']:.3f} \pm {summary['gamma_c']['stderr']:.3f}${edge['gamma_c']}",
+         rf"$\nu = {best['nu']:.2f} \pm {summary['nu']['stderr']:.2f}${edge['nu']}",
+         rf"$\beta = {best['beta']:.3f} \pm {summary['beta']['stderr']:.3f}${edge['beta']}",
+         rf"$\chi^2/N = {best['cost']:.2f}$"])
+    plt.gca().text(0.03, 0.97, fit_text, transform=plt.gca().transAxes, va='top', fontsize=12,
+                   bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+    plt.axvline(x=0, color='black', linestyle='--', alpha=0.3)
+    plt.xlabel(r'Rescaled Coupling $(\gamma - \gamma_c) L^{1/\nu}$', fontsize=14)
+    plt.ylabel(r'Rescaled Order Parameter $m L^{\beta/\nu}$', fontsize=14)
+    plt.title("Supplemental Fig S4: Universal Data Collapse (fitted exponents)\n" +
+              f"Job ID: {fss_data['job_id']}", fontsize=15, pad=15)
+
+    plt.grid(True, linestyle=':', alpha=0.6)
+    plt.legend(fontsize=12, frameon=True, shadow=True, loc='lower right')
+    plt.tight_layout()
+
+    # 5. 保存为 PDF
+    plt.savefig('si_fig_s4_data_collapse.pdf')
+    plt.show()
+
+
+# 并行优化用 spawn 进程池，子进程会重新导入本文件，入口必须放在 main 保护里
+if __name__ == "__main__":
+    main()
@@ -1,99 +1,90 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import csv
-from qiskit_ibm_runtime import QiskitRuntimeService
-
-# ==========================================
-# 🎯 配置区域
-# ==========================================
-JOB_ID = 'd5a9jognsj9s73b7ed3g'  # 你的最新任务ID
-CSV_FILENAME = "fig7_final_data.csv"
-PDF_FILENAME = "fig7_ultimate_robustness.pdf"
-
-# 实验参数 (需与提交时完全对应)
-GAMMA_SWEEP = [0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28]
-NOISE_LEVELS = [0.0, 0.05, 0.10]
-
-def extract_p1(pub_result, bit_index):
-    """从 SamplerV2 结果中提取特定比特的 P(1)"""
-    try:
-        # 尝试获取所有测量寄存器的数据
-        data = pub_result.data
-        counts = None
-        for attr in dir(data):
-            if not attr.startswith('_'):
-                val = getattr(data, attr)
-                if hasattr(val, 'get_counts'):
-                    counts = val.get_counts()
-                    break
-        
-        if counts is None: return 0.0
-        
-        total = sum(counts.values())
-        excited = 0
-        for bitstring, count in counts.items():
-            # Qiskit bitstring 顺序：从右往左数
-            # 我们主要关注视界比特 Q19
-            if bitstring[-(bit_index + 1)] == '1':
-                excited += count
-        return excited / total
-    except Exception as e:
-        print(f"解析出错: {e}")
-        return 0.0
-
-def fetch_and_plot():
-    print(f"📡 正在从 IBM Quantum 抓取数据 (Job: {JOB_ID})...")
-    service = QiskitRuntimeService()
-    job = service.job(JOB_ID)
-    results = job.result()
-
-    all_rows = []
-    plot_data = {nl: [] for nl in NOISE_LEVELS}
-    result_idx = 0
-
-    # 1. 解析数据并存入 CSV
-    for nl in NOISE_LEVELS:
-        for cf in GAMMA_SWEEP:
-            # 提取 Q19 (视界) 的概率
-            p1 = extract_p1(results[result_idx], 19) 
-            all_rows.append({"noise_level": nl, "gamma": cf, "p1": p1})
-            plot_data[nl].append(p1)
-            result_idx += 1
-
-    with open(CSV_FILENAME, "w", newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=["noise_level", "gamma", "p1"])
-        writer.writeheader()
-        writer.writerows(all_rows)
-    print(f"✅ CSV 数据已保存至: {CSV_FILENAME}")
-
-    # 2. 生成 PDF 矢量图 (PRX 投稿标准)
-    plt.rcParams.update({'font.size': 12, 'font.family': 'serif'})
-    plt.figure(figsize=(8, 6))
-    
-    colors = ['#1f77b4', '#ff7f0e', '#d62728'] # 经典学术配色
-    markers = ['o', 's', '^'] # 圆点、方块、三角
-
-    for i, nl in enumerate(NOISE_LEVELS):
-        plt.plot(GAMMA_SWEEP, plot_data[nl], 
-                 marker=markers[i], linestyle='-', color=colors[i],
-                 linewidth=2, markersize=8, 
-                 label=f'Control Noise {nl*100:.0f}%')
-
-    # 标注相变点
-    plt.axvline(0.25, color='black', linestyle='--', alpha=0.5, label='$\gamma_c = 0.25$')
-    
-    # 装饰美化
-    plt.xlabel(r'Cooling Factor $\gamma$', fontsize=14)
-    plt.ylabel(r'Horizon Excitation $P(1)$', fontsize=14)
-    plt.title('Fig 7: Robustness of Holographic Sedimentation', fontsize=16)
-    plt.legend(frameon=True, facecolor='white', framealpha=1)
-    plt.grid(True, which='both', linestyle=':', alpha=0.6)
-    
-    # 保存矢量图
-    plt.tight_layout()
-    plt.savefig(PDF_FILENAME, format='pdf', dpi=600)
-    print(f"📉 矢量 PDF 图表已生成: {PDF_FILENAME}")
-    plt.show()
-
-if __name__ == "__main__":
-    fetch_and_plot()
+import numpy as np
+import matplotlib.pyplot as plt
+import csv
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sediment.spec import experiment_spec, job_spec, spec_grid, spec_points
+from sediment.store import ResultStore, fetch_result
+
+# ==========================================
+# 🎯 配置区域
+# ==========================================
+JOB_ID = 'd5a9jognsj9s73b7ed3g'  # 你的最新任务ID
+CSV_FILENAME = "fig7_final_data.csv"
+PDF_FILENAME = "fig7_ultimate_robustness.pdf"
+
+# 实验参数以任务档案里的 spec 为准；该旧任务提交时还没有 spec，且每个噪声级只有一个无序实现
+LEGACY_SPEC = experiment_spec("fig7_noise", realizations=1, layering="serial")
+
+def fetch_and_plot():
+    print(f"📡 正在从 IBM Quantum 抓取数据 (Job: {JOB_ID})...")
+    # 本地已有则直接读盘，否则拉取一次并落盘 (连同每个点的噪声级 / γ / 无序实现序号)
+    store = ResultStore()
+    spec = job_spec(JOB_ID, store) or LEGACY_SPEC
+    fetch_result(JOB_ID, store=store, points=spec_points(spec), lite=True)
+    # 视界比特 Q19 的 P(1)，按扫描点标签整理成 (L, 倍率, 噪声级, γ, 无序实现) 网格
+    grid = spec_grid(store.archive(JOB_ID), spec["name"], qubit=19)
+    noise_levels, gamma_sweep = grid["axes"]["noise"], grid["axes"]["gamma"]
+    n_realizations = len(grid["axes"]["realization"])
+    all_p1 = grid["p1"][0, 0]
+    shots = grid["shots"][0, 0]
+
+    # 无序平均: 均值的误差棒含无序涨落 (实现间标准差)；只有一个实现时退回二项误差
+    mean_p1 = all_p1.mean(axis=-1)
+    if n_realizations > 1:
+        err_p1 = all_p1.std(axis=-1, ddof=1) / np.sqrt(n_realizations)
+    else:
+        err_p1 = np.sqrt(mean_p1 * (1 - mean_p1) / shots.sum(axis=-1))
+
+    all_rows = []
+    plot_data = {nl: [] for nl in noise_levels}
+    plot_err = {nl: [] for nl in noise_levels}
+
+    # 1. 解析数据并存入 CSV
+    for a, nl in enumerate(noise_levels):
+        for b, cf in enumerate(gamma_sweep):
+            # 提取 Q19 (视界) 的概率
+            p1, err = float(mean_p1[a, b]), float(err_p1[a, b])
+            all_rows.append({"noise_level": nl, "gamma": cf, "p1": p1, "p1_err": err,
+                             "realizations": n_realizations})
+            plot_data[nl].append(p1)
+            plot_err[nl].append(err)
+
+    with open(CSV_FILENAME, "w", newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["noise_level", "gamma", "p1", "p1_err", "realizations"])
+        writer.writeheader()
+        writer.writerows(all_rows)
+    print(f"✅ CSV 数据已保存至: {CSV_FILENAME}")
+
+    # 2. 生成 PDF 矢量图 (PRX 投稿标准)
+    plt.rcParams.update({'font.size': 12, 'font.family': 'serif'})
+    plt.figure(figsize=(8, 6))
+    
+    colors = ['#1f77b4', '#ff7f0e', '#d62728'] # 经典学术配色
+    markers = ['o', 's', '^'] # 圆点、方块、三角
+
+    for i, nl in enumerate(noise_levels):
+        plt.errorbar(gamma_sweep, plot_data[nl], yerr=plot_err[nl],
+                 marker=markers[i], linestyle='-', color=colors[i],
+                 linewidth=2, markersize=8, capsize=3,
+                 label=f'Control Noise {nl*100:.0f}%')
+
+    # 标注相变点
+    plt.axvline(0.25, color='black', linestyle='--', alpha=0.5, label='$\gamma_c = 0.25$')
+    
+    # 装饰美化
+    plt.xlabel(r'Cooling Factor $\gamma$', fontsize=14)
+    plt.ylabel(r'Horizon Excitation $P(1)$', fontsize=14)
+    plt.title('Fig 7: Robustness of Holographic Sedimentation', fontsize=16)
+    plt.legend(frameon=True, facecolor='white', framealpha=1)
+    plt.grid(True, which='both', linestyle=':', alpha=0.6)
+    
+    # 保存矢量图
+    plt.tight_layout()
+    plt.savefig(PDF_FILENAME, format='pdf', dpi=600)
+    print(f"📉 矢量 PDF 图表已生成: {PDF_FILENAME}")
+    plt.show()
+
+if __name__ == "__main__":
+    fetch_and_plot()
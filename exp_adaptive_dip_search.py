@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import datetime
+import numpy as np
+import matplotlib.pyplot as plt
+from sediment.circuits import sediment_template
+from sediment.layout import chain_layouts
+from sediment.jobs import JobManager
+from sediment.adaptive import DipSearch, adaptive_scan, sampler_executor
+from sediment.spec import experiment_spec
+
+# ==========================================
+# 🎯 Project Sediment: ADAPTIVE DIP SEARCH
+#    代替手写 γ 网格: 粗扫 -> 二次拟合 -> 只在井底附近加点加 shots
+#    每一轮所有链长打包成一个 job，直到 γ* 的 95% 置信区间 ≤ 目标
+# ==========================================
+
+# 代替的是 FSS 网格: 后端 / 链长与 sediment.spec 的 "fss" 实验一致
+FSS = experiment_spec("fss")
+BACKEND_NAME = FSS["backend"]
+LENGTHS = FSS["lengths"]
+GAMMA_RANGE = (0.05, 0.45)     # 初始粗扫范围
+COARSE_POINTS = 7
+REFINE_POINTS = 4
+PILOT_SHOTS = 1024             # 第一轮每点 shots，之后每轮翻倍
+TARGET_HALFWIDTH = 0.005       # γ* 的 95% 置信区间半宽
+MAX_ROUNDS = 6
+SHOT_BUDGET = len(FSS["gammas"]) * FSS["shots"] // 2   # 每个链长的 shot 上限: FSS 网格 (7 点 x 8192) 的一半
+N_WORKERS = None
+DATA_FILENAME = "adaptive_dip_data.json"
+PLOT_FILENAME = "fig_adaptive_dip.pdf"
+
+OFFLINE = os.environ.get("SEDIMENT_OFFLINE", "0") == "1"
+MPS_BOND_DIM = 64
+
+
+def plot_searches(searches):
+    plt.style.use('seaborn-v0_8-paper')
+    fig, ax = plt.subplots(figsize=(8, 6))
+    colors = ['#FF4500', '#2E8B57', '#4169E1', '#800080']
+    for i, (L, s) in enumerate(searches.items()):
+        color = colors[i % len(colors)]
+        shots = np.array([s.counts[g] for g in s.gammas])
+        err = np.sqrt(s.probs * (1 - s.probs) / shots)
+        label = f'L={L}' if s.converged else f'L={L} (not converged)'
+        ax.errorbar(s.gammas, s.probs, yerr=err, fmt='o', color=color, alpha=0.7, label=label)
+        x = np.linspace(s.center - s.fit_window / 2, s.center + s.fit_window / 2, 100)
+        ax.plot(x, np.polyval(s.coeffs, x), '-', color=color, alpha=0.5)
+        ax.axvspan(s.center - s.halfwidth, s.center + s.halfwidth, color=color, alpha=0.15)
+    ax.set_title("Adaptive Dip Search: fitted wells and 95% CI of γ*")
+    ax.set_xlabel("Cooling Factor γ")
+    ax.set_ylabel("Horizon Excitation P(1)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(PLOT_FILENAME, format='pdf')
+    print(f"📉 图已生成: {PLOT_FILENAME}")
+    plt.show()
+
+
+def run_adaptive_search():
+    print(f"🧪 Building universes L={LENGTHS}...")
+    templates = [sediment_template(L) for L in LENGTHS]
+
+    if OFFLINE:
+        print(f"🎯 Adaptive search on local MPS simulator (χ={MPS_BOND_DIM})...")
+        from sediment.mps import MPSSampler
+        service = None
+        sampler = MPSSampler(max_bond=MPS_BOND_DIM)
+        compiled = dict(zip(LENGTHS, templates))
+    else:
+        from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+        from sediment.cache import TranspileCache
+        from sediment.transpile import transpile_sweep
+        print(f"🎯 Adaptive search on {BACKEND_NAME}...")
+        service = QiskitRuntimeService()
+        backend = service.backend(BACKEND_NAME)
+        # 模板只编译一次，所有轮次复用 (初始布局固定为按校准选出的最优链)
+        transpiled = transpile_sweep(templates, backend, max_workers=N_WORKERS, cache=TranspileCache(),
+                                     layouts=chain_layouts(templates, backend))
+        compiled = dict(zip(LENGTHS, transpiled))
+        sampler = Sampler(mode=backend)
+
+    manager = JobManager(service=service)
+    metadata = {"backend": "mps_simulator" if OFFLINE else BACKEND_NAME, "offline": OFFLINE}
+    job_ids = []
+
+    def run(pubs):
+        # 每一轮一个 job；shots 已写进每个 PUB
+        name = f"adaptive_r{len(job_ids)}"
+        results = asyncio.run(manager.run([dict(name=name, sampler=sampler, pubs=pubs, metadata=metadata)]))
+        job_id, result = next(iter(results.items()))
+        job_ids.append(job_id)
+        if result is None:
+            raise RuntimeError(f"{name} ({job_id}) 未成功完成")
+        return result
+
+    searches = {
+        L: DipSearch(*GAMMA_RANGE, coarse_points=COARSE_POINTS, refine_points=REFINE_POINTS,
+                     shots=PILOT_SHOTS, target_halfwidth=TARGET_HALFWIDTH,
+                     max_rounds=MAX_ROUNDS, shot_budget=SHOT_BUDGET)
+        for L in LENGTHS
+    }
+    adaptive_scan(searches, sampler_executor(compiled, run))
+
+    print("\n[Result] 各链长的井底位置:")
+    reasons = {"budget": "shot 预算用尽", "rounds": "轮数用尽"}
+    for L, s in searches.items():
+        if s.converged:
+            print(f"L={L:<2} | best_cf = {s.center:.4f} ± {s.halfwidth:.4f} | {s.total_shots} shots / {s.round} rounds")
+        else:
+            # 未收敛: 不报 best_cf，只给出最后的估计供参考
+            print(f"L={L:<2} | ⚠️ 未收敛 ({reasons[s.stop_reason]}): 半宽 {s.halfwidth:.4f} > 目标 {TARGET_HALFWIDTH}, "
+                  f"最后估计 γ* ≈ {s.center:.4f} | {s.total_shots} shots / {s.round} rounds")
+    unconverged = [L for L, s in searches.items() if not s.converged]
+    if unconverged:
+        print(f"⚠️ {len(unconverged)} 个链长未收敛: L={unconverged} (加大 SHOT_BUDGET / MAX_ROUNDS 或放宽 TARGET_HALFWIDTH)")
+
+    packet = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "backend": metadata["backend"],
+        "job_ids": job_ids,
+        "target_halfwidth": TARGET_HALFWIDTH,
+        "lengths": {f"L{L}": s.summary() for L, s in searches.items()},
+    }
+    with open(DATA_FILENAME, 'w') as f:
+        json.dump(packet, f, indent=4)
+    print(f"💾 数据已保存: {DATA_FILENAME}")
+    plot_searches(searches)
+
+
+if __name__ == "__main__":
+    try:
+        run_adaptive_search()
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -1,78 +1,77 @@
-import numpy as np
-import datetime
-from qiskit import QuantumCircuit
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-
-# ==========================================
-# 🎯 Project Sediment: THE SNIPER SCAN
-#    Target: The Cosmological Constant (0.268?)
-# ==========================================
-
-BACKEND_NAME = 'ibm_torino'  
-CHAIN_LENGTH = 20
-N_SHOTS = 8192               # 🔥 8192次采样，要把误差压到极致
-
-def create_sediment_circuit(length, cooling_factor):
-    qc = QuantumCircuit(length)
-    # 1. Chaos Source
-    qc.h(0); qc.cx(0, 1); qc.rx(np.pi/1.3, 0); qc.rz(np.pi/2.5, 1); qc.cx(1, 0)
-    qc.barrier()
-    
-    # 2. Sedimentation Channel
-    for i in range(length - 1):
-        qc.cx(i, i+1); qc.h(i); qc.cx(i+1, i) 
-        # Cooling
-        theta = cooling_factor * np.pi 
-        qc.rz(theta, i+1); qc.rx(theta * 0.5, i+1)
-        qc.barrier()
-        
-    # 3. Detection
-    qc.measure_all()
-    return qc
-
-def run_sniper_scan():
-    print(f"🎯 Loading Sniper Scan on {BACKEND_NAME}...")
-    
-    # 1. Connect
-    service = QiskitRuntimeService()
-    backend = service.backend(BACKEND_NAME)
-    print(f"   Connected to: {backend.name} (V2 Mode)")
-    
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=3)
-    
-    # 🔍 狙击区间：高精度扫描 0.22 - 0.28
-    # 加上 0.268 (暗物质标准值) 作为特邀嘉宾
-    fine_grain_sweep = [0.22, 0.23, 0.24, 0.25, 0.26, 0.268, 0.27, 0.28]
-    
-    circuits = []
-    print(f"🔬 Microscope set to: {fine_grain_sweep}")
-    
-    for cf in fine_grain_sweep:
-        qc = create_sediment_circuit(CHAIN_LENGTH, cooling_factor=cf)
-        transpiled = pm.run(qc)
-        circuits.append(transpiled)
-        
-    print(f"🛫 Submitting High-Precision Job (8192 shots)...")
-    
-    # === 关键修正 ===
-    sampler = Sampler(mode=backend) 
-    sampler.options.default_shots = N_SHOTS
-    # ===============
-    
-    job = sampler.run(circuits)
-    job_id = job.job_id()
-    
-    print(f"✅ Job Submitted! ID: {job_id}")
-    
-    # 存个档，这可能是诺奖级的数据
-    with open("sniper_scan_history.txt", "a") as f:
-        f.write(f"{datetime.datetime.now()} | {BACKEND_NAME} | ID: {job_id} | Target: 0.268\n")
-        
-    print("⏳ 等待 IBM 排队... (这把 8192 shots 会慢一点，耐心等)")
-
-if __name__ == "__main__":
-    try:
-        run_sniper_scan()
-    except Exception as e:
-        print(f"❌ Error: {e}")
+import asyncio
+import datetime
+from sediment.circuits import sediment_template
+from sediment.layout import chain_layouts
+from sediment.jobs import JobManager
+from sediment.execution import DEFAULT_MAX_EXECUTIONS, execution_mode
+from sediment.spec import experiment_spec, build_pubs, job_metadata
+
+# ==========================================
+# 🎯 Project Sediment: THE SNIPER SCAN
+#    Target: The Cosmological Constant (0.268?)
+# ==========================================
+
+SPEC = experiment_spec("fig2_sniper")  # 参数的唯一来源 (sediment.spec)，随任务写进档案
+BACKEND_NAME = SPEC["backend"]
+CHAIN_LENGTH = SPEC["lengths"][0]
+N_SHOTS = SPEC["shots"]                                    # 🔥 8192次采样，要把误差压到极致
+ZNE_SCALES = SPEC["mitigation"]["zne_scales"]              # 两比特门折叠倍率 (1 = 原电路)，[1] 即关闭 ZNE
+DYNAMICAL_DECOUPLING = SPEC["mitigation"]["dynamical_decoupling"]  # 空闲比特插入 DD 序列 (figS3: ZNE + DD)
+EXECUTION_MODE = "batch"                   # 分块后的各 runtime job 放进同一个 Batch，只排一次队
+MAX_EXECUTIONS = DEFAULT_MAX_EXECUTIONS    # 每个 runtime job 的执行次数 (绑定数 x shots) 上限
+
+def run_sniper_scan():
+    # runtime 与编译栈在提交时才导入 (import 本模块取 SPEC 等常量不连 IBM)
+    from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+    from sediment.cache import TranspileCache
+    from sediment.transpile import transpile_template
+
+    print(f"🎯 Loading Sniper Scan on {BACKEND_NAME}...")
+    
+    # 1. Connect
+    service = QiskitRuntimeService()
+    backend = service.backend(BACKEND_NAME)
+    print(f"   Connected to: {backend.name} (V2 Mode)")
+    
+    # 🔍 狙击区间：高精度扫描 0.22 - 0.28
+    # 加上 0.268 (暗物质标准值) 作为特邀嘉宾
+    fine_grain_sweep = SPEC["gammas"]
+    
+    print(f"🔬 Microscope set to: {fine_grain_sweep}")
+    
+    # 链只建一次、编译一次，γ 在 PUB 里扫描 (编译结果落盘缓存，重跑直接命中)
+    cache = TranspileCache()
+    # 初始布局固定为按当前校准选出的最优链，编译不再做布局搜索
+    template = sediment_template(CHAIN_LENGTH)
+    transpiled = transpile_template(template, backend, cache=cache, initial_layout=chain_layouts([template], backend)[0])
+    # ZNE: 编译好的模板每个倍率只折叠一次，和原电路放进同一个 job (扫描点标签带上实际倍率)
+    pubs, points = build_pubs(SPEC, [transpiled])
+    scales = list(dict.fromkeys(row["scale"] for row in points))
+        
+    print(f"🛫 Submitting High-Precision Job (8192 shots, ZNE scales {scales})...")
+    
+    # 登记进在途任务表 (points 带上折叠倍率)，之后用 python -m sediment.jobs watch 取回落盘
+    manager = JobManager(service=service)
+    with execution_mode(EXECUTION_MODE, backend) as mode:
+        # === 关键修正 ===
+        sampler = Sampler(mode=mode)
+        sampler.options.default_shots = N_SHOTS
+        sampler.options.dynamical_decoupling.enable = DYNAMICAL_DECOUPLING
+        # ===============
+        job_id = asyncio.run(manager.submit("fig2_sniper", sampler, pubs, points=points,
+                                            metadata=job_metadata([SPEC], BACKEND_NAME, zne_scales=scales),
+                                            max_executions=MAX_EXECUTIONS))
+    
+    print(f"✅ Job Submitted! ID: {job_id}")
+    
+    # 存个档，这可能是诺奖级的数据
+    with open("sniper_scan_history.txt", "a") as f:
+        f.write(f"{datetime.datetime.now()} | {BACKEND_NAME} | ID: {job_id} | Target: 0.268\n")
+        
+    print("⏳ 等待 IBM 排队... (这把 8192 shots 会慢一点，耐心等)")
+
+if __name__ == "__main__":
+    try:
+        run_sniper_scan()
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -1,173 +1,257 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import json
-import datetime
-from scipy.optimize import curve_fit
-from qiskit import QuantumCircuit
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-
-# ==========================================
-# 📏 Project Sediment: FINITE SIZE SCALING (FSS)
-#    融合版：Gemini A 的物理思想 + Gemini B 的工程架构
-# ==========================================
-
-BACKEND_NAME = 'ibm_torino'
-N_SHOTS = 8192  # 保持高精度
-DATA_FILENAME = "fss_scaling_data.json"
-PLOT_FILENAME = "fig_fss_scaling_trend.pdf"
-
-# 实验参数
-LENGTHS = [16, 20, 24, 28]  # 宇宙尺度扫描
-COOLING_SWEEP = [0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28] # 狙击区间
-
-def create_sediment_circuit(length, cooling_factor):
-    qc = QuantumCircuit(length)
-    # 1. Chaos Source
-    qc.h(0); qc.cx(0, 1); qc.rx(np.pi/1.3, 0); qc.rz(np.pi/2.5, 1); qc.cx(1, 0)
-    qc.barrier()
-    # 2. Sedimentation Channel
-    for i in range(length - 1):
-        qc.cx(i, i+1); qc.h(i); qc.cx(i+1, i) 
-        # Cooling (Fixed Ratio 0.5 as per Paper 1)
-        theta = cooling_factor * np.pi 
-        qc.rz(theta, i+1); qc.rx(theta * 0.5, i+1)
-        qc.barrier()
-    qc.measure_all()
-    return qc
-
-def analyze_and_plot(all_results, job_id):
-    print("\n[Analysis] 正在计算标度漂移 (Scaling Drift)...")
-    
-    # 存储每个长度下的最佳 Cooling Factor
-    best_cfs = []
-    min_probs = []
-    
-    plt.style.use('seaborn-v0_8-paper')
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    colors = ['#FF4500', '#2E8B57', '#4169E1', '#800080'] # 区分不同长度
-    
-    # 解析数据
-    result_idx = 0
-    raw_data_storage = {}
-    
-    for i, L in enumerate(LENGTHS):
-        probs = []
-        current_cfs = []
-        
-        # 提取该长度下的所有 CF 结果
-        for cf in COOLING_SWEEP:
-            pub_result = all_results[result_idx]
-            counts = pub_result.data.meas.get_counts()
-            total = sum(counts.values())
-            
-            # 统计末端比特 Q_last 的激发率
-            excited = 0
-            for bitstring, count in counts.items():
-                if bitstring.startswith('1'): # Q_last is '1'
-                    excited += count
-            
-            prob = excited / total
-            probs.append(prob)
-            current_cfs.append(cf)
-            result_idx += 1
-            
-        # 找到该长度下的最低点
-        min_p = min(probs)
-        min_idx = probs.index(min_p)
-        best_cf = current_cfs[min_idx]
-        
-        best_cfs.append(best_cf)
-        min_probs.append(min_p)
-        
-        raw_data_storage[f"L{L}"] = {"cfs": current_cfs, "probs": probs}
-        
-        # 绘制子图 1: 势井形状
-        ax1.plot(current_cfs, probs, 'o--', color=colors[i], label=f'L={L} (Min @ {best_cf})')
-        print(f"L={L:<2} | Minimum Dip at CF={best_cf} (Prob={min_p:.4f})")
-
-    # 子图 1 设置
-    ax1.set_title("Sedimentation Well Profile vs System Size")
-    ax1.set_xlabel("Cooling Factor γ")
-    ax1.set_ylabel("Horizon Excitation P(1)")
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-    ax1.axvline(0.25, color='gray', linestyle=':', alpha=0.5)
-    ax1.axvline(0.268, color='gold', linestyle='--', alpha=0.8, label='Cosmic 0.268')
-
-    # 子图 2: 标度趋势 (Scaling Trend)
-    # 我们看 Best CF 是否随 1/L 变化
-    inv_L = [1/x for x in LENGTHS]
-    ax2.plot(inv_L, best_cfs, 'D-', color='black', markersize=8)
-    
-    # 简单的线性拟合 extrapolation
-    if len(best_cfs) > 1:
-        z = np.polyfit(inv_L, best_cfs, 1)
-        p = np.poly1d(z)
-        x_trend = np.linspace(0, max(inv_L)*1.1, 100)
-        ax2.plot(x_trend, p(x_trend), 'r--', alpha=0.6, label='Extrapolation')
-        
-        # 计算 L -> infinity (1/L = 0) 的截距
-        limit_val = z[1] 
-        ax2.scatter([0], [limit_val], color='red', s=100, marker='*', label=f'Limit L→∞: {limit_val:.3f}')
-        print(f"\n🚀 [Extrapolation] 当宇宙无限大时，沉积点趋向于: {limit_val:.4f}")
-
-    ax2.set_title("Finite Size Scaling: Where is the limit?")
-    ax2.set_xlabel("Inverse System Size (1/L)")
-    ax2.set_ylabel("Optimal Cooling Factor")
-    ax2.invert_xaxis() # 习惯上把 0 (无限大) 放在右边，或者左边，这里反转让 0 在左
-    ax2.axhline(0.268, color='gold', linestyle='--', label='Target 0.268')
-    ax2.legend()
-    ax2.grid(True)
-
-    # 保存
-    plt.tight_layout()
-    plt.savefig(PLOT_FILENAME, format='pdf')
-    
-    # 存JSON
-    with open(DATA_FILENAME, 'w') as f:
-        json.dump({"job_id": job_id, "raw": raw_data_storage, "scaling": best_cfs}, f)
-    print(f"💾 数据已保存: {DATA_FILENAME}")
-    print(f"📉 趋势图已生成: {PLOT_FILENAME}")
-    plt.show()
-
-def run_fss_experiment():
-    print(f"📏 Loading FSS Protocol on {BACKEND_NAME}...")
-    service = QiskitRuntimeService()
-    backend = service.backend(BACKEND_NAME)
-    print(f"   Connected to: {backend.name}")
-    
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=3) # 必须用 level 3 优化以对抗噪声
-    
-    circuits = []
-    print(f"🧪 Building universes L={LENGTHS}...")
-    
-    for L in LENGTHS:
-        for cf in COOLING_SWEEP:
-            qc = create_sediment_circuit(L, cf)
-            transpiled = pm.run(qc)
-            circuits.append(transpiled)
-            
-    print(f"🛫 Submitting {len(circuits)} circuits (Batch Job)...")
-    
-    # 修正 V2 接口
-    sampler = Sampler(mode=backend)
-    sampler.options.default_shots = N_SHOTS
-    
-    job = sampler.run(circuits)
-    print(f"✅ Job ID: {job.job_id()}")
-    
-    # 存底
-    with open("fss_job_history.txt", "a") as f:
-        f.write(f"{datetime.datetime.now()} | {job.job_id()} | FSS Scan\n")
-        
-    print("⏳ 等待结果中... (请耐心等待，数据量较大)")
-    
-    try:
-        results = job.result()
-        analyze_and_plot(results, job.job_id())
-    except Exception as e:
-        print(f"❌ Error: {e}")
-
-if __name__ == "__main__":
-    run_fss_experiment()
+import numpy as np
+import matplotlib.pyplot as plt
+import json
+import os
+import datetime
+import asyncio
+import contextlib
+from sediment.circuits import sediment_template, sweep_pub
+from sediment.spec import experiment_spec, build_pubs, job_metadata
+from sediment.marginals import sweep_ones, sweep_shots
+from sediment.layout import chain_layouts
+from sediment.jobs import JobManager
+from sediment.execution import DEFAULT_MAX_EXECUTIONS, execution_mode
+from sediment.bootstrap import fss_bootstrap, error_bars
+from sediment.allocation import (allocated_pubs, binomial_variance, fss_sensitivity,
+                                 neyman_allocation, predicted_stderr)
+
+# ==========================================
+# 📏 Project Sediment: FINITE SIZE SCALING (FSS)
+#    融合版：Gemini A 的物理思想 + Gemini B 的工程架构
+# ==========================================
+
+# 链长 / γ / shots / 缓解选项统一来自 sediment.spec (随任务写进档案)，
+# 例如开启随机编译: experiment_spec("fss", mitigation={"twirls": 32})
+SPEC = experiment_spec("fss")
+BACKEND_NAME = SPEC["backend"]
+N_SHOTS = SPEC["shots"]  # 保持高精度
+DATA_FILENAME = "fss_scaling_data.json"
+PLOT_FILENAME = "fig_fss_scaling_trend.pdf"
+
+# 实验参数
+LENGTHS = SPEC["lengths"]        # 宇宙尺度扫描
+COOLING_SWEEP = SPEC["gammas"]   # 狙击区间
+N_WORKERS = None  # 并行编译进程数 (None = 全部 CPU 核)
+
+# shot 分配: None = 每点平铺 N_SHOTS；'intercept' / 'slope' = 先跑试探批次，
+# 再把同样的总预算按 L→∞ 截距 / 标度斜率的 Neyman 最优方案分给各点
+SHOT_TARGET = None
+PILOT_SHOTS = 1024
+MIN_SHOTS = 256
+
+# 随机编译 (Pauli 旋转): 0 = 关闭；K > 0 时每个扫描点生成 K 个旋转实例，N_SHOTS 均分，结果合并回每点一份计数
+TWIRLS = SPEC["mitigation"]["twirls"]
+
+# 误差棒: shot 层面的 bootstrap，传播到 best_cf / min_prob / L→∞ 截距
+N_BOOTSTRAP = 2000
+BOOTSTRAP_SEED = 2025
+
+# 执行模式: 单批次放进一个 Batch (分块后只排一次队)；试探 + 正式两批有先后依赖，用 Session
+EXECUTION_MODE = "batch"
+MAX_EXECUTIONS = DEFAULT_MAX_EXECUTIONS  # 每个 runtime job 的执行次数 (绑定数 x shots) 上限，超出即分块
+
+# 离线模式: 本地 MPS 模拟 (无噪声参考曲线，不排队)，SEDIMENT_OFFLINE=1 开启
+OFFLINE = os.environ.get("SEDIMENT_OFFLINE", "0") == "1"
+MPS_BOND_DIM = 64
+
+def analyze_and_plot(all_results, job_id, counts=None):
+    print("\n[Analysis] 正在计算标度漂移 (Scaling Drift)...")
+    
+    # 存储每个长度下的最佳 Cooling Factor
+    best_cfs = []
+    min_probs = []
+    
+    plt.style.use('seaborn-v0_8-paper')
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    colors = ['#FF4500', '#2E8B57', '#4169E1', '#800080'] # 区分不同长度
+    
+    # 解析数据 (按提交顺序展开: 每个 L 一个 PUB，PUB 内按 γ 排列)
+    # 末端比特 Q_last 的 1 计数，一次向量化算完所有 PUB (分配模式下由调用方合并好 (ones, shots) 传入)
+    if counts is None:
+        counts = (sweep_ones(all_results, qubit=-1), sweep_shots(all_results))
+    ones, shots = counts
+    all_p1 = ones / shots
+    boot, reps = fss_bootstrap(ones, shots, LENGTHS, COOLING_SWEEP, replicates=N_BOOTSTRAP, seed=BOOTSTRAP_SEED)
+    best_lo, best_hi = boot["best_cf"]["ci"]
+    raw_data_storage = {}
+    # 扫描点按 (L, γ) 排列，直接整形成网格
+    grid_p1 = all_p1.reshape(len(LENGTHS), len(COOLING_SWEEP))
+    grid_shots = shots.reshape(len(LENGTHS), len(COOLING_SWEEP))
+    
+    for i, L in enumerate(LENGTHS):
+        # 该长度下的所有 CF 结果
+        probs = [float(p) for p in grid_p1[i]]
+        current_cfs = list(COOLING_SWEEP)
+            
+        # 井底位置取二次拟合顶点 (与 shot 分配优化的目标量一致)，最低概率仍取观测值
+        min_p = min(probs)
+        best_cf = float(boot["best_cf"]["value"][i])
+        
+        best_cfs.append(best_cf)
+        min_probs.append(min_p)
+        
+        n = grid_shots[i]
+        raw_data_storage[f"L{L}"] = {"cfs": current_cfs, "probs": probs, "shots": n.tolist()}
+        
+        # 绘制子图 1: 势井形状 (误差棒为二项分布 1σ)
+        p = np.array(probs)
+        ax1.errorbar(current_cfs, probs, yerr=np.sqrt(p * (1 - p) / n), fmt='o--', capsize=3,
+                     color=colors[i], label=f'L={L} (Dip @ {best_cf:.3f})')
+        print(f"L={L:<2} | Minimum Dip at CF={best_cf:.3f} [{best_lo[i]:.2f}, {best_hi[i]:.2f}] (Prob={min_p:.4f})")
+
+    # 子图 1 设置
+    ax1.set_title("Sedimentation Well Profile vs System Size")
+    ax1.set_xlabel("Cooling Factor γ")
+    ax1.set_ylabel("Horizon Excitation P(1)")
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    ax1.axvline(0.25, color='gray', linestyle=':', alpha=0.5)
+    ax1.axvline(0.268, color='gold', linestyle='--', alpha=0.8, label='Cosmic 0.268')
+
+    # 子图 2: 标度趋势 (Scaling Trend)
+    # 我们看 Best CF 是否随 1/L 变化
+    inv_L = [1/x for x in LENGTHS]
+    ax2.errorbar(inv_L, best_cfs, yerr=error_bars(best_cfs, reps["best_cf"]), fmt='D-', color='black',
+                 markersize=8, capsize=4)
+    
+    # 简单的线性拟合 extrapolation
+    if len(best_cfs) > 1:
+        z = np.polyfit(inv_L, best_cfs, 1)
+        p = np.poly1d(z)
+        x_trend = np.linspace(0, max(inv_L)*1.1, 100)
+        ax2.plot(x_trend, p(x_trend), 'r--', alpha=0.6, label='Extrapolation')
+        
+        # 计算 L -> infinity (1/L = 0) 的截距
+        limit_val = z[1] 
+        limit_lo, limit_hi = boot["intercept"]["ci"]
+        ax2.errorbar([0], [limit_val], yerr=error_bars(limit_val, reps["intercept"]).reshape(2, 1),
+                     color='red', markersize=14, fmt='*', capsize=4,
+                     label=f'Limit L→∞: {limit_val:.3f} [{limit_lo:.3f}, {limit_hi:.3f}]')
+        print(f"\n🚀 [Extrapolation] 当宇宙无限大时，沉积点趋向于: {limit_val:.4f} "
+              f"({boot['level']:.0%} CI [{limit_lo:.4f}, {limit_hi:.4f}])")
+
+    ax2.set_title("Finite Size Scaling: Where is the limit?")
+    ax2.set_xlabel("Inverse System Size (1/L)")
+    ax2.set_ylabel("Optimal Cooling Factor")
+    ax2.invert_xaxis() # 习惯上把 0 (无限大) 放在右边，或者左边，这里反转让 0 在左
+    ax2.axhline(0.268, color='gold', linestyle='--', label='Target 0.268')
+    ax2.legend()
+    ax2.grid(True)
+
+    # 保存
+    plt.tight_layout()
+    plt.savefig(PLOT_FILENAME, format='pdf')
+    
+    # 存JSON
+    with open(DATA_FILENAME, 'w') as f:
+        json.dump({"job_id": job_id, "raw": raw_data_storage, "scaling": best_cfs, "uncertainty": boot}, f)
+    print(f"💾 数据已保存: {DATA_FILENAME}")
+    print(f"📉 趋势图已生成: {PLOT_FILENAME}")
+    plt.show()
+
+def analyze_twirled(all_results, job_id):
+    """旋转任务先把各实例的 shots 合并回每个扫描点，再走同一套分析"""
+    from sediment.twirling import merge_twirls
+    return analyze_and_plot(merge_twirls(all_results), job_id)
+
+def run_fss_experiment():
+    print(f"🧪 Building universes L={LENGTHS}...")
+    templates = [sediment_template(L) for L in LENGTHS]
+    
+    if OFFLINE:
+        # 逻辑电路本身就是一维最近邻链，不需要编译
+        from sediment.mps import MPSSampler
+        print(f"📏 Loading FSS Protocol on local MPS simulator (χ={MPS_BOND_DIM})...")
+        circuits = templates
+        sampler = MPSSampler(max_bond=MPS_BOND_DIM)
+    else:
+        # 编译栈与 runtime 只在提交时导入: 只重画图 (import analyze_and_plot) 不付这部分启动时间
+        from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+        from sediment.cache import TranspileCache
+        from sediment.transpile import transpile_sweep
+        print(f"📏 Loading FSS Protocol on {BACKEND_NAME}...")
+        service = QiskitRuntimeService()
+        backend = service.backend(BACKEND_NAME)
+        print(f"   Connected to: {backend.name}")
+        
+        # 每个 L 只编译一次 (必须用 level 3 优化以对抗噪声)，多进程并行，γ 扫描放进参数数组
+        # 初始布局固定为按当前校准选出的最优链 (按校准快照缓存)，链上不插 SWAP
+        cache = TranspileCache()  # 输入不变时重跑完全跳过编译
+        transpiled = transpile_sweep(templates, backend, max_workers=N_WORKERS, cache=cache,
+                                     layouts=chain_layouts(templates, backend))
+        circuits = transpiled
+            
+    points = [{"L": L, "gamma": cf} for L in LENGTHS for cf in COOLING_SWEEP]
+    metadata = job_metadata([SPEC], BACKEND_NAME, offline=OFFLINE)
+    # PUB 与扫描点标签由 spec 统一生成 (开启旋转时 K 个实例只是参数数组的一个轴)
+    pubs, job_points = build_pubs(SPEC, circuits)
+    if TWIRLS:
+        print(f"🎲 Pauli twirling: {TWIRLS} instances/point, {pubs[0][2]} shots each")
+    print(f"🛫 Submitting {len(pubs)} PUBs x {len(COOLING_SWEEP)} γ (Batch Job)...")
+    
+    # 提交与等待交给异步作业管理器: 在途任务表落盘，中断后可用 python -m sediment.jobs watch 续跑
+    manager = JobManager(service=None if OFFLINE else service)
+    # 分析函数都是模块级的，任务表记下 "脚本:函数"，python -m sediment.jobs watch 续跑时可直接导入
+    manager.register_analysis("fss", analyze_and_plot)
+    manager.register_analysis("fss_twirled", analyze_twirled)
+
+    async def campaign():
+        job_id = await manager.submit("fss", sampler, pubs, points=job_points,
+                                      analysis="fss_twirled" if TWIRLS else "fss", metadata=metadata,
+                                      max_executions=MAX_EXECUTIONS)
+        print(f"✅ Job ID: {job_id}")
+
+        # 存底
+        with open("fss_job_history.txt", "a") as f:
+            f.write(f"{datetime.datetime.now()} | {job_id} | FSS Scan\n")
+
+        print("⏳ 等待结果中... (请耐心等待，数据量较大)")
+        # 原始 shots 落盘后自动调用 analyze_and_plot
+        await manager.wait([job_id])
+
+    async def allocated_campaign():
+        # 1. 试探批次: 每点 PILOT_SHOTS，估计各点方差和目标量的灵敏度
+        budget = len(points) * N_SHOTS
+        pilot_pubs = [sweep_pub(c, COOLING_SWEEP, PILOT_SHOTS) for c in circuits]
+        pilot_id = await manager.submit("fss_pilot", sampler, pilot_pubs, points=points, metadata=metadata)
+        pilot = (await manager.wait([pilot_id]))[pilot_id]
+        ones, shots = sweep_ones(pilot), sweep_shots(pilot)
+
+        sweeps = [COOLING_SWEEP] * len(LENGTHS)
+        sensitivity = fss_sensitivity(LENGTHS, sweeps, (ones / shots).reshape(len(LENGTHS), -1), SHOT_TARGET)
+        variance = binomial_variance(ones, shots)
+        remaining = budget - int(shots.sum())
+        alloc = neyman_allocation(sensitivity, variance, remaining, min_shots=MIN_SHOTS, granularity=64)
+        flat = np.full(len(points), remaining / len(points))
+        print(f"🎚️ 分配目标 [{SHOT_TARGET}]: 预测标准误 {predicted_stderr(sensitivity, variance, shots + flat):.4f} (平铺)"
+              f" -> {predicted_stderr(sensitivity, variance, shots + alloc):.4f} (分配)")
+
+        # 2. 正式批次: shots 相同的点合并成一个 PUB，逐 PUB 指定 shots
+        main_pubs, index = allocated_pubs(circuits, sweeps, alloc)
+        job_id = await manager.submit("fss", sampler, main_pubs, points=[points[k] for k in index], metadata=metadata,
+                                      max_executions=MAX_EXECUTIONS)
+        print(f"✅ Job ID: {job_id} (pilot {pilot_id})")
+        with open("fss_job_history.txt", "a") as f:
+            f.write(f"{datetime.datetime.now()} | {job_id} | FSS Scan (allocated, pilot {pilot_id})\n")
+        main = (await manager.wait([job_id]))[job_id]
+
+        # 3. 两批合并后再分析
+        ones[index] += sweep_ones(main)
+        shots[index] += sweep_shots(main)
+        analyze_and_plot(None, job_id, counts=(ones, shots))
+
+    if TWIRLS and SHOT_TARGET is not None:
+        print("⚠️ shot 分配模式暂不支持随机编译，本次按 TWIRLS = 0 运行")
+    mode = EXECUTION_MODE if SHOT_TARGET is None else "session"
+    try:
+        with contextlib.nullcontext() if OFFLINE else execution_mode(mode, backend) as target:
+            if not OFFLINE:
+                # 修正 V2 接口
+                sampler = Sampler(mode=target)
+            sampler.options.default_shots = N_SHOTS
+            asyncio.run(campaign() if SHOT_TARGET is None else allocated_campaign())
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+if __name__ == "__main__":
+    run_fss_experiment()
@@ -1,81 +1,59 @@
-import numpy as np
-import datetime
-from qiskit import QuantumCircuit
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-
-# ==========================================
-# 🎯 FIG 7: THE FINAL STRESS TEST (ULTIMATE)
-# ==========================================
-
-BACKEND_NAME = 'ibm_torino'
-L = 20                       # 保持与 Fig. 5 一致
-N_SHOTS = 8192               # 高精度采样
-GAMMA_SWEEP = [0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28]
-NOISE_LEVELS = [0.0, 0.05, 0.10] # 0%, 5%, 10% 噪声注入
-
-def create_fig7_circuit(gamma, noise_injection=0.0):
-    """
-    基于 shengbei2.py 的黄金电路，并加入主动噪声注入
-    """
-    qc = QuantumCircuit(L)
-    
-    # 1. 黄金混沌源 (Chaos Source) - 严格保持一致
-    qc.h(0); qc.cx(0, 1); qc.rx(np.pi/1.3, 0); qc.rz(np.pi/2.5, 1); qc.cx(1, 0)
-    qc.barrier()
-    
-    # 2. 沉积演化 (10 步 Trotter)
-    for _ in range(10):
-        for i in range(L - 1):
-            # 基础参数
-            j_val = 2.0
-            g_val = gamma
-            
-            # 主动注入系统噪声 (模拟控制不精准)
-            if noise_injection > 0:
-                j_val *= (1 + np.random.uniform(-noise_injection, noise_injection))
-                g_val *= (1 + np.random.uniform(-noise_injection, noise_injection))
-            
-            # Ising 相互作用
-            qc.cx(i, i+1)
-            qc.rz(j_val, i+1)
-            qc.cx(i, i+1)
-            
-            # 沉积冷却项 (关键比例 1 : 0.5)
-            qc.rz(g_val * np.pi, i+1)
-            qc.rx(0.5 * g_val * np.pi, i+1)
-    
-    # 3. 测量视界及其邻居 (Q17, Q18, Q19) - 对应最后三个比特
-    # Qiskit 测量到 classical bits [0, 1, 2]
-    qc.measure_all() 
-    return qc
-
-def run_experiment():
-    service = QiskitRuntimeService()
-    backend = service.backend(BACKEND_NAME)
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=3)
-    
-    all_circuits = []
-    metadata = []
-
-    print(f"🛠️  正在构建 Fig. 7 实验矩阵 (3 噪声级 x 7 采样点)...")
-    for nl in NOISE_LEVELS:
-        for g in GAMMA_SWEEP:
-            qc = create_fig7_circuit(g, noise_injection=nl)
-            transpiled = pm.run(qc)
-            all_circuits.append(transpiled)
-            metadata.append({"gamma": g, "noise": nl})
-
-    print(f"🛫 提交至 {BACKEND_NAME} (Job ID 将在稍后显示)...")
-    sampler = Sampler(mode=backend)
-    sampler.options.default_shots = N_SHOTS
-    job = sampler.run(all_circuits)
-    
-    print(f"✅ 任务已锁定: {job.job_id()}")
-    return job.job_id()
-# 在你文件的最底部添加：
-if __name__ == "__main__":
-    job_id = run_experiment()
-    print(f"🚀 任务已成功发射！请前往 IBM Quantum 官网查看 Job ID: {job_id}")
-
-# 等明天下午额度恢复，直接执行 run_experiment()
+import asyncio
+import datetime
+from sediment.circuits import fig7_ensemble_template
+from sediment.spec import experiment_spec, build_pubs, job_metadata
+from sediment.layout import chain_layouts
+from sediment.jobs import JobManager
+from sediment.execution import DEFAULT_MAX_EXECUTIONS, execution_mode
+
+# ==========================================
+# 🎯 FIG 7: THE FINAL STRESS TEST (ULTIMATE)
+# ==========================================
+
+SPEC = experiment_spec("fig7_noise")  # 参数的唯一来源 (sediment.spec)，随任务写进档案
+BACKEND_NAME = SPEC["backend"]
+L = SPEC["lengths"][0]               # 保持与 Fig. 5 一致
+N_SHOTS = SPEC["shots"]              # 高精度采样 (每点总 shots，均分给各无序实现)
+GAMMA_SWEEP = SPEC["gammas"]
+NOISE_LEVELS = SPEC["noise_levels"]  # 0%, 5%, 10% 噪声注入
+N_REALIZATIONS = SPEC["realizations"]  # 每个 (γ, 噪声级) 的无序实现数
+DISORDER_SEED = SPEC["seed"]         # 无序抽样种子 (写进任务元数据，可复现)
+EXECUTION_MODE = "batch"             # 分块后的各 runtime job 放进同一个 Batch，只排一次队
+MAX_EXECUTIONS = DEFAULT_MAX_EXECUTIONS
+
+def run_experiment():
+    # runtime 与编译栈在提交时才导入 (import 本模块取 SPEC 等常量不连 IBM)
+    from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+    from sediment.cache import TranspileCache
+    from sediment.transpile import transpile_template
+
+    service = QiskitRuntimeService()
+    backend = service.backend(BACKEND_NAME)
+    cache = TranspileCache()
+
+    print(f"🛠️  正在构建 Fig. 7 实验矩阵 ({len(NOISE_LEVELS)} 噪声级 x {len(GAMMA_SWEEP)} 采样点 x {N_REALIZATIONS} 无序实现)...")
+    # 噪声注入倍率全部参数化: 整个系综只编译一个模板，
+    # 所有随机角度一次抽出，每个无序实现只是参数数组里的一行
+    # 砖墙式排布 (SPEC["layering"]): 同层的键并行，深度随步数而不随链长增长
+    template = fig7_ensemble_template(L, SPEC["trotter_steps"], SPEC["layering"])
+    transpiled = transpile_template(template, backend, cache=cache, initial_layout=chain_layouts([template], backend)[0])
+    all_pubs, metadata = build_pubs(SPEC, [transpiled])
+
+    print(f"🛫 提交至 {BACKEND_NAME} (Job ID 将在稍后显示)...")
+    # 只提交不等待: 任务登记进在途任务表，之后用 python -m sediment.jobs watch 取回并落盘
+    manager = JobManager(service=service)
+    with execution_mode(EXECUTION_MODE, backend) as mode:
+        sampler = Sampler(mode=mode)
+        sampler.options.default_shots = N_SHOTS
+        job_id = asyncio.run(manager.submit("fig7_noise", sampler, all_pubs, points=metadata,
+                                            metadata=job_metadata([SPEC], BACKEND_NAME, L=L),
+                                            max_executions=MAX_EXECUTIONS))
+    
+    print(f"✅ 任务已锁定: {job_id}")
+    return job_id
+# 在你文件的最底部添加：
+if __name__ == "__main__":
+    job_id = run_experiment()
+    print(f"🚀 任务已成功发射！请前往 IBM Quantum 官网查看 Job ID: {job_id}")
+
+# 等明天下午额度恢复，直接执行 run_experiment()
@@ -1,210 +1,226 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import json
-import datetime
-import os
-
-# Qiskit 核心组件
-from qiskit import QuantumCircuit
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-
-# IBM Runtime V2 最新接口
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-
-# ==========================================
-# 🌌 Project Sediment: Dark Matter Simulation
-#    Target Backend: ibm_torino (133-qubit Heron)
-# ==========================================
-
-# 配置区
-BACKEND_NAME = 'ibm_torino'      # 🎯 锁定目标
-CHAIN_LENGTH = 20                # 传输链长度
-N_SHOTS = 4096                   # 采样精度
-SCRAMBLING_DEPTH = 5             # 混沌深度
-DATA_FILENAME = "sediment_data_torino.json"
-PLOT_FILENAME = "fig_sediment_signal.pdf"
-
-# ==========================================
-# 📐 系统校准 (System Calibration)
-# ==========================================
-class SystemCalibration:
-    NOISE_FLOOR = 0.004        # 0.4% 基准底噪
-    
-    @staticmethod
-    def validate_setup(chain_len):
-        print(f"\n[Calibration] Checking constraints...")
-        if chain_len > 120:
-             print("⚠️ WARNING: Exceeding coherence limits.")
-        else:
-             print(f"✅ Sedimentation Path: OK ({chain_len} qubits)")
-        print("---------------------------------------------------")
-
-# ==========================================
-# 🧪 电路构建 (Circuit Construction)
-# ==========================================
-def create_sediment_circuit(length, cooling_factor=0.1):
-    qc = QuantumCircuit(length)
-    
-    # --- PHASE I: 混沌源 (Scrambling Source) ---
-    qc.h(0)
-    qc.cx(0, 1)
-    qc.rx(np.pi/1.3, 0) 
-    qc.rz(np.pi/2.5, 1)
-    qc.cx(1, 0)
-    qc.barrier()
-    
-    # --- PHASE II: 沉积通道 (Sedimentation Channel) ---
-    for i in range(length - 1):
-        qc.cx(i, i+1)
-        qc.h(i)
-        qc.cx(i+1, i) 
-        
-        # 冷却/几何相互作用
-        theta = cooling_factor * np.pi 
-        qc.rz(theta, i+1) 
-        qc.rx(theta * 0.5, i+1)
-        qc.barrier()
-
-    # --- PHASE III: 探测 (Detection) ---
-    qc.measure_all()
-    return qc
-
-# ==========================================
-# 📊 数据分析与绘图 (Analysis & Plotting)
-# ==========================================
-def save_and_plot(cooling_sweep, results, job_id):
-    print("\n[Analysis] Extracting sedimentation signals...")
-    
-    signal_intensities = []
-    
-    # 目标态: 全零态 '00...0' (代表沉积出的有序结构)
-    target_state = '0' * CHAIN_LENGTH 
-    
-    # SamplerV2 的结果遍历方式
-    for i, pub_result in enumerate(results):
-        # 提取 Counts
-        data_pub = pub_result.data.meas.get_counts()
-        
-        # 计算概率
-        total_counts = sum(data_pub.values())
-        target_counts = data_pub.get(target_state, 0)
-        prob = target_counts / total_counts
-        signal_intensities.append(prob)
-        print(f"   > CF={cooling_sweep[i]}: Signal={prob:.4f}")
-
-    # 保存原始数据
-    timestamp = datetime.datetime.now().isoformat()
-    data_packet = {
-        "job_id": job_id,
-        "backend": BACKEND_NAME,
-        "timestamp": timestamp,
-        "parameters": {
-            "cooling_sweep": cooling_sweep,
-            "chain_length": CHAIN_LENGTH,
-            "shots": N_SHOTS
-        },
-        "results": {
-            "signal_intensities": signal_intensities
-        }
-    }
-    
-    with open(DATA_FILENAME, 'w') as f:
-        json.dump(data_packet, f, indent=4)
-    print(f"💾 Raw data saved to: {DATA_FILENAME}")
-
-    # 绘制矢量图
-    try:
-        plt.style.use('seaborn-v0_8-paper')
-    except:
-        pass # 如果样式不支持就用默认的
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-    
-    # 数据线
-    ax.plot(cooling_sweep, signal_intensities, 'o-', color='#8A2BE2', 
-            linewidth=2, markersize=8, label='Exp. Signal (Torino)')
-    
-    # 底噪线
-    ax.axhline(y=SystemCalibration.NOISE_FLOOR, color='gray', linestyle='--', 
-               alpha=0.6, label='Noise Floor (<0.4%)')
-    
-    # 假设区域 (金色)
-    ax.axvspan(0.15, 0.30, color='gold', alpha=0.15, label='Hypothesis Zone')
-
-    # 标注
-    ax.set_title(f"Project Sediment: Cooling-Induced Phase Transition\nBackend: {BACKEND_NAME} | ID: {job_id[-6:]}", fontsize=12)
-    ax.set_xlabel(r"Cooling Factor $\gamma$", fontsize=12)
-    ax.set_ylabel(r"Sedimentation Signal (Survival $P_{0...0}$)", fontsize=12)
-    ax.legend()
-    ax.grid(True, linestyle=':', alpha=0.6)
-    
-    # 保存 PDF
-    plt.tight_layout()
-    plt.savefig(PLOT_FILENAME, format='pdf', dpi=300)
-    print(f"📉 Vector plot generated: {PLOT_FILENAME}")
-    plt.show()
-
-# ==========================================
-# 🚀 实验执行主程序 (Execution)
-# ==========================================
-def run_experiment():
-    SystemCalibration.validate_setup(CHAIN_LENGTH)
-    
-    print(f"🚀 Initializing Project Sediment on {BACKEND_NAME}...")
-    
-    # 1. 连接服务
-    service = QiskitRuntimeService()
-    backend = service.backend(BACKEND_NAME)
-    print(f"   Connected to: {backend.name} (v2)")
-    
-    # 2. 编译电路
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=3)
-    
-    cooling_sweep = [0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
-    circuits = []
-    
-    print(f"🧪 Building {len(cooling_sweep)} universe models...")
-    for cf in cooling_sweep:
-        qc = create_sediment_circuit(CHAIN_LENGTH, cooling_factor=cf)
-        transpiled = pm.run(qc)
-        circuits.append(transpiled)
-        
-    print(f"🛫 Submitting job to {BACKEND_NAME}...")
-    
-    # ====================================================
-    # 🔥 V2 核心修正区 (The Fix)
-    # ====================================================
-    
-    # Fix 1: 使用 mode=backend 而不是 backend=backend
-    sampler = Sampler(mode=backend)
-    
-    # Fix 2: Shots 必须在 options 里设置，不能在 run 里传
-    sampler.options.default_shots = N_SHOTS
-    
-    # 提交任务 (V2 自动把电路列表处理为 Pubs)
-    job = sampler.run(circuits)
-    # ====================================================
-    
-    print(f"🆔 Job ID: {job.job_id()}")
-    
-    # 存个底
-    with open("sediment_job_history.txt", "a") as f:
-        f.write(f"{datetime.datetime.now()} | {BACKEND_NAME} | ID: {job.job_id()}\n")
-
-    print("⏳ Waiting for results in queue (grab a coffee)...")
-    
-    # 阻塞等待结果
-    try:
-        result = job.result() 
-        print("✅ Job completed! Processing data...")
-        save_and_plot(cooling_sweep, result, job.job_id())
-        
-    except Exception as e:
-        print(f"❌ Error retrieval failed: {e}")
-        print("   (Don't panic! Check your IBM Quantum Dashboard with the Job ID)")
-
-if __name__ == "__main__":
-    try:
-        run_experiment()
-    except Exception as e:
-        print(f"❌ Execution Failed: {e}")
+import matplotlib.pyplot as plt
+import json
+import datetime
+import os
+import asyncio
+import numpy as np
+
+# 共享沉积链模板 (IBM Runtime V2 接口、编译栈、MPS 模拟器在 run_experiment 里按需导入，
+# 只调用 save_and_plot 重画图时不加载)
+from sediment.circuits import sediment_template
+from sediment.marginals import sweep_all_zero_probability, sweep_apply, sweep_shots
+from sediment.readout import job_calibration
+from sediment.spec import experiment_spec, build_pubs, job_metadata
+from sediment.layout import chain_layouts
+from sediment.jobs import JobManager
+
+# ==========================================
+# 🌌 Project Sediment: Dark Matter Simulation
+#    Target Backend: ibm_torino (133-qubit Heron)
+# ==========================================
+
+# 配置区
+SPEC = experiment_spec("preliminary")  # γ 扫描 / shots / 读出校准的唯一来源 (sediment.spec)
+BACKEND_NAME = SPEC["backend"]   # 🎯 锁定目标
+OFFLINE = os.environ.get("SEDIMENT_OFFLINE", "0") == "1"  # 本地 MPS 模拟，不连 IBM
+MPS_BOND_DIM = 64
+CHAIN_LENGTH = SPEC["lengths"][0]  # 传输链长度
+N_SHOTS = SPEC["shots"]            # 采样精度
+SCRAMBLING_DEPTH = 5             # 混沌深度
+DATA_FILENAME = "sediment_data_torino.json"
+PLOT_FILENAME = "fig_sediment_signal.pdf"
+
+# ==========================================
+# 📐 系统校准 (System Calibration)
+# ==========================================
+class SystemCalibration:
+    # 底噪不再硬编码: 取 (读出缓解后) 全零估计量的标准误 × NOISE_FLOOR_SIGMAS
+    NOISE_FLOOR_SIGMAS = 2.0
+
+    @staticmethod
+    def noise_floor(stderr):
+        return SystemCalibration.NOISE_FLOOR_SIGMAS * float(np.max(stderr))
+
+    @staticmethod
+    def validate_setup(chain_len):
+        print(f"\n[Calibration] Checking constraints...")
+        if chain_len > 120:
+             print("⚠️ WARNING: Exceeding coherence limits.")
+        else:
+             print(f"✅ Sedimentation Path: OK ({chain_len} qubits)")
+        print("---------------------------------------------------")
+
+# ==========================================
+# 📊 数据分析与绘图 (Analysis & Plotting)
+# ==========================================
+def save_and_plot(cooling_sweep, results, job_id, backend_label=BACKEND_NAME, store=None):
+    print("\n[Analysis] Extracting sedimentation signals...")
+
+    # 读出校准 PUB 和实验 PUB 在同一个 job 里，先拆开并算出每个比特的混淆矩阵
+    calibration = job_calibration(job_id, store)
+    experiment = results if calibration is None else calibration.split(results)
+
+    # 目标态: 全零态 '00...0' (代表沉积出的有序结构)
+    # 直接在打包的 shot 数组上统计 Hamming 重量为 0 的比例
+    signal_intensities = [float(p) for p in sweep_all_zero_probability(experiment)]
+    if calibration is None:
+        # 旧任务没有读出校准 PUB: 退回未缓解的原始信号，误差取二项分布标准误
+        print("⚠️ 该任务没有读出校准 PUB，下面是未缓解的原始信号")
+        raw = np.array(signal_intensities)
+        signal, signal_err = signal_intensities, np.sqrt(raw * (1 - raw) / sweep_shots(experiment)).tolist()
+    else:
+        # 缓解后的全零概率 (逐 shot 乘逐比特逆矩阵因子，不构造 2^L 矩阵)，附标准误
+        mitigated = sweep_apply(experiment, lambda bits: np.stack(calibration.all_zero_probability(bits), -1))
+        signal, signal_err = mitigated[:, 0].tolist(), mitigated[:, 1].tolist()
+        print(f"   Readout error: P(1|0) = {calibration.p10.mean():.4f}, P(0|1) = {calibration.p01.mean():.4f} (mean over qubits)")
+    noise_floor = SystemCalibration.noise_floor(signal_err)
+
+    for i, prob in enumerate(signal_intensities):
+        suffix = "" if calibration is None else f" | Mitigated={signal[i]:.4f}"
+        print(f"   > CF={cooling_sweep[i]}: Signal={prob:.4f}{suffix} ± {signal_err[i]:.4f}")
+
+    # 保存原始数据
+    timestamp = datetime.datetime.now().isoformat()
+    data_packet = {
+        "job_id": job_id,
+        "backend": backend_label,
+        "timestamp": timestamp,
+        "parameters": {
+            "cooling_sweep": cooling_sweep,
+            "chain_length": CHAIN_LENGTH,
+            "shots": N_SHOTS
+        },
+        "results": {
+            "signal_intensities": signal_intensities,
+            "mitigated_intensities": None if calibration is None else signal,
+            "mitigated_stderr": None if calibration is None else signal_err,
+            "noise_floor": noise_floor
+        },
+        "readout_calibration": None if calibration is None else calibration.to_dict()
+    }
+    
+    with open(DATA_FILENAME, 'w') as f:
+        json.dump(data_packet, f, indent=4)
+    print(f"💾 Raw data saved to: {DATA_FILENAME}")
+
+    # 绘制矢量图
+    try:
+        plt.style.use('seaborn-v0_8-paper')
+    except:
+        pass # 如果样式不支持就用默认的
+
+    fig, ax = plt.subplots(figsize=(8, 6))
+    
+    # 数据线
+    ax.plot(cooling_sweep, signal_intensities, 'o--', color='#8A2BE2', alpha=0.4,
+            linewidth=1.5, markersize=6, label='Exp. Signal (raw)')
+    ax.errorbar(cooling_sweep, signal, yerr=signal_err, fmt='o-', color='#8A2BE2', linewidth=2, markersize=8,
+                capsize=3, label='Exp. Signal (' + ('raw' if calibration is None else 'readout-mitigated') + ')')
+    
+    # 底噪线 (来自缓解估计量的统计误差)
+    ax.axhline(y=noise_floor, color='gray', linestyle='--', 
+               alpha=0.6, label=f'Noise Floor ({SystemCalibration.NOISE_FLOOR_SIGMAS:g}σ = {noise_floor:.2%})')
+    
+    # 假设区域 (金色)
+    ax.axvspan(0.15, 0.30, color='gold', alpha=0.15, label='Hypothesis Zone')
+
+    # 标注
+    ax.set_title(f"Project Sediment: Cooling-Induced Phase Transition\nBackend: {backend_label} | ID: {job_id[-6:]}", fontsize=12)
+    ax.set_xlabel(r"Cooling Factor $\gamma$", fontsize=12)
+    ax.set_ylabel(r"Sedimentation Signal (Survival $P_{0...0}$)", fontsize=12)
+    ax.legend()
+    ax.grid(True, linestyle=':', alpha=0.6)
+    
+    # 保存 PDF
+    plt.tight_layout()
+    plt.savefig(PLOT_FILENAME, format='pdf', dpi=300)
+    print(f"📉 Vector plot generated: {PLOT_FILENAME}")
+    plt.show()
+
+def analyze_job_result(results, job_id):
+    """作业管理器的分析回调 (模块级，续跑时可按路径导入)，后端标签取自档案"""
+    from sediment.store import ResultStore
+    store = ResultStore()
+    save_and_plot(SPEC["gammas"], results, job_id, store.archive(job_id).metadata.get("backend", BACKEND_NAME), store)
+
+# ==========================================
+# 🚀 实验执行主程序 (Execution)
+# ==========================================
+def run_experiment():
+    SystemCalibration.validate_setup(CHAIN_LENGTH)
+    backend_label = f"mps_simulator(χ={MPS_BOND_DIM})" if OFFLINE else BACKEND_NAME
+    
+    print(f"🚀 Initializing Project Sediment on {backend_label}...")
+    
+    cooling_sweep = SPEC["gammas"]
+    print(f"🧪 Building {len(cooling_sweep)} universe models...")
+    template = sediment_template(CHAIN_LENGTH)
+    
+    if OFFLINE:
+        # 离线: 逻辑链直接交给 MPS 模拟器 (无噪声参考)
+        from sediment.mps import MPSSampler
+        pubs, points = build_pubs(SPEC, [template])
+        sampler = MPSSampler(max_bond=MPS_BOND_DIM)
+    else:
+        # 1. 连接服务 (IBM Runtime V2 最新接口)
+        from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+        from sediment.cache import TranspileCache
+        from sediment.transpile import transpile_template
+        service = QiskitRuntimeService()
+        backend = service.backend(BACKEND_NAME)
+        print(f"   Connected to: {backend.name} (v2)")
+        
+        # 2. 编译电路 (模板只编译一次，γ 作为参数扫描；结果落盘缓存)
+        cache = TranspileCache()
+        transpiled = transpile_template(template, backend, cache=cache,
+                                        initial_layout=chain_layouts([template], backend)[0])
+        # 读出校准电路 (全0 / 全1) 放在同一个 job 的末尾，测量映射与实验电路一致
+        pubs, points = build_pubs(SPEC, [transpiled])
+        
+        # Fix 1: 使用 mode=backend 而不是 backend=backend
+        sampler = Sampler(mode=backend)
+        
+    print(f"🛫 Submitting job to {backend_label}...")
+    
+    # ====================================================
+    # 🔥 V2 核心修正区 (The Fix)
+    # ====================================================
+    
+    # Fix 2: Shots 必须在 options 里设置，不能在 run 里传
+    sampler.options.default_shots = N_SHOTS
+    
+    # ====================================================
+
+    # 提交任务 (一个参数扫描 PUB 覆盖全部 γ)，由作业管理器轮询；完整原始 shots 自动落盘
+    manager = JobManager(service=None if OFFLINE else service)
+    manager.register_analysis("preliminary", analyze_job_result)
+
+    async def campaign():
+        job_id = await manager.submit("preliminary", sampler, pubs, points=points,
+                                      analysis="preliminary", metadata=job_metadata([SPEC], backend_label))
+
+        print(f"🆔 Job ID: {job_id}")
+
+        # 存个底
+        with open("sediment_job_history.txt", "a") as f:
+            f.write(f"{datetime.datetime.now()} | {backend_label} | ID: {job_id}\n")
+
+        print("⏳ Waiting for results in queue (grab a coffee)...")
+        return job_id, await manager.wait([job_id])
+
+    # 异步轮询 (指数退避)，任务完成即调用 save_and_plot
+    try:
+        job_id, results = asyncio.run(campaign())
+        if results[job_id] is None:
+            raise RuntimeError(f"job finished as {manager.table[job_id]['status']}")
+        print("✅ Job completed!")
+
+    except Exception as e:
+        print(f"❌ Error retrieval failed: {e}")
+        print("   (Don't panic! Check your IBM Quantum Dashboard with the Job ID)")
+
+if __name__ == "__main__":
+    try:
+        run_experiment()
+    except Exception as e:
+        print(f"❌ Execution Failed: {e}")
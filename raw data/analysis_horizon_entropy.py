@@ -0,0 +1,70 @@
+import matplotlib.pyplot as plt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sediment.shadows import archive_bases, pauli_expectation, renyi2_entropy
+from sediment.spec import job_spec
+from sediment.store import ResultStore, fetch_result
+
+# ==========================================
+# 🎯 随机测量任务 (python -m sediment submit horizon_shadows)
+# ==========================================
+JOB_ID = "REPLACE_WITH_HORIZON_SHADOWS_JOB_ID"
+EXPERIMENT = "horizon_shadows"
+# 视界末端的子系统 (负数 = 从链尾数起，Q19 即 -1)
+SUBSYSTEMS = {"Q19": [-1], "Q18–Q19": [-2, -1], "Q17–Q19": [-3, -2, -1]}
+
+
+def analyze_horizon_entropy():
+    print(f"🕵️‍♂️ 拉取随机测量任务: {JOB_ID} ...")
+    try:
+        results = fetch_result(JOB_ID, lite=True)
+    except Exception as e:
+        print(f"❌ 拉取失败: {e}")
+        return
+    store = ResultStore()
+    archive = store.archive(JOB_ID)
+    spec = job_spec(JOB_ID, store, name=EXPERIMENT)
+    if spec is None or not spec["shadows"]:
+        print("❌ 该任务不是随机测量任务 (spec 里 shadows = 0)")
+        return
+    gammas = spec["gammas"]
+    # 只看未折叠 (ZNE 倍率 1) 的 PUB，每个链长一个
+    pubs = sorted({row["pub"] for row in archive.points
+                   if row.get("experiment") == EXPERIMENT and "basis" in row and row["scale"] == 1.0})
+
+    plt.style.use('seaborn-v0_8-paper')
+    fig, ax = plt.subplots(figsize=(8, 6))
+    colors = ['#C71585', '#1f77b4', '#2ca02c']
+    for k in pubs:
+        bits = results[k].data.meas
+        L = bits.num_bits
+        bases = archive_bases(archive, k, bits.shape)
+        print(f"\n📊 L={L}: {spec['shadows']} 个随机设置 x {bits.num_shots} shots / γ")
+        print(f"{'γ':<6} | " + " | ".join(f"S2({label})" for label in SUBSYSTEMS) + " | ⟨Z18 Z19⟩")
+        table = {label: renyi2_entropy(bits, qubits) for label, qubits in SUBSYSTEMS.items()}
+        zz, zz_err = pauli_expectation(bits, bases, {-2: "Z", -1: "Z"})
+        for i, g in enumerate(gammas):
+            cells = " | ".join(f"{table[label][0][i]:.3f}±{table[label][1][i]:.3f}" for label in SUBSYSTEMS)
+            print(f"{g:<6} | {cells} | {zz[i]:+.3f}±{zz_err[i]:.3f}")
+        for (label, qubits), color in zip(SUBSYSTEMS.items(), colors):
+            entropy, sigma = table[label]
+            ax.errorbar(gammas, entropy, yerr=sigma, fmt='o-', color=color, capsize=3,
+                        label=f'$S_2$({label}), L={L}')
+            # 最大熵 (完全热化) 基准: |A| bit
+            ax.axhline(y=len(qubits), color=color, linestyle=':', linewidth=1, alpha=0.6)
+
+    ax.set_title(f"Horizon Rényi-2 Entropy (Randomized Measurements)\nJob ID: {JOB_ID[-6:]}", fontsize=12)
+    ax.set_xlabel(r"Cooling Factor $\gamma$", fontsize=12)
+    ax.set_ylabel(r"$S_2 = -\log_2 \mathrm{tr}\,\rho_A^2$ (bit)", fontsize=12)
+    ax.legend()
+    ax.grid(True, linestyle=':', alpha=0.6)
+
+    filename = "fig_horizon_entropy.pdf"
+    plt.tight_layout()
+    plt.savefig(filename, format='pdf')
+    print(f"\n📉 矢量图已生成: {filename}")
+    plt.show()
+
+if __name__ == "__main__":
+    analyze_horizon_entropy()
@@ -1,89 +1,108 @@
-import matplotlib.pyplot as plt
-from qiskit_ibm_runtime import QiskitRuntimeService
-
-# ==========================================
-# 🎯 你的目标 Job ID
-# ==========================================
-JOB_ID = "d59pm5vp3tbc73asembg"
-
-def analyze_horizon_temperature():
-    print(f"🕵️‍♂️ 正在连接 IBM Cloud 拉取任务: {JOB_ID} ...")
-    
-    # 1. 获取数据
-    try:
-        service = QiskitRuntimeService()
-        job = service.job(JOB_ID)
-        results = job.result()
-        print("✅ 数据拉取成功！开始对 Q19 (视界末端) 进行热力学分析...")
-    except Exception as e:
-        print(f"❌ 拉取失败: {e}")
-        return
-
-    # 参数列表 (对应之前的实验设置)
-    cooling_sweep = [0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5]
-    
-    # 存储结果
-    q19_excitation_probs = []
-
-    print("\n📊 视界温度读数 (Horizon Temperature Readings):")
-    print(f"{'Cooling (γ)':<12} | {'P(Q19=1) [激发率]':<20} | {'物理状态'}")
-    print("-" * 60)
-
-    # 2. 遍历每一个 Cooling Factor 的实验结果
-    for i, pub_result in enumerate(results):
-        # SamplerV2 获取 counts
-        counts = pub_result.data.meas.get_counts()
-        total_shots = sum(counts.values())
-        
-        excited_shots = 0
-        
-        # 3. 核心逻辑：只盯着 Q19 看
-        # Qiskit 的 bitstring 是 "Q19 Q18 ... Q0"
-        # 所以 Q19 对应的是字符串的第 0 位 (startswith)
-        for bitstring, count in counts.items():
-            if bitstring.startswith('1'):  # Q19 是 1
-                excited_shots += count
-        
-        prob = excited_shots / total_shots
-        q19_excitation_probs.append(prob)
-        
-        # 简单判断状态
-        status = "🔥 HOT (Random)"
-        if prob < 0.48: status = "❄️ COLD (Sediment?)"
-        if prob > 0.52: status = "💥 EJECTED (Entropy Dump)"
-        if 0.48 <= prob <= 0.52: status = "〰️ Noise/Thermal"
-        
-        print(f"CF={cooling_sweep[i]:<9} | {prob:.5f}              | {status}")
-
-    # ==========================================
-    # 📈 自动画图 (这是给审稿人看的关键证据)
-    # ==========================================
-    plt.style.use('seaborn-v0_8-paper')
-    fig, ax = plt.subplots(figsize=(8, 6))
-    
-    # 绘制曲线
-    ax.plot(cooling_sweep, q19_excitation_probs, 'o-', color='#C71585', 
-            linewidth=2, markersize=8, label='Horizon Excitation P(Q19=1)')
-    
-    # 绘制 0.5 随机线 (热混沌基准)
-    ax.axhline(y=0.5, color='gray', linestyle='--', linewidth=1.5, label='Thermal Chaos Limit (0.5)')
-    
-    # 高亮之前的信号区域 (MI Spike Zone)
-    ax.axvspan(0.15, 0.30, color='gold', alpha=0.2, label='Correlation Zone (from MI)')
-
-    # 标注
-    ax.set_title(f"Thermodynamics of the Horizon (Q19)\nJob ID: {JOB_ID[-6:]}", fontsize=12)
-    ax.set_xlabel(r"Cooling Factor $\gamma$", fontsize=12)
-    ax.set_ylabel(r"Excitation Probability $P(1)$", fontsize=12)
-    ax.legend()
-    ax.grid(True, linestyle=':', alpha=0.6)
-    
-    # 保存
-    filename = "fig_horizon_q19.pdf"
-    plt.tight_layout()
-    plt.savefig(filename, format='pdf')
-    print(f"\n📉 矢量图已生成: {filename}")
-    plt.show()
-
-if __name__ == "__main__":
-    analyze_horizon_temperature()
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sediment.correlations import job_correlations, sweep_correlation_lengths
+from sediment.marginals import sweep_apply, sweep_p1
+from sediment.readout import job_calibration
+from sediment.spec import experiment_spec, job_spec
+from sediment.store import fetch_result
+
+# ==========================================
+# 🎯 你的目标 Job ID
+# ==========================================
+JOB_ID = "d59pm5vp3tbc73asembg"
+
+def analyze_horizon_temperature():
+    print(f"🕵️‍♂️ 正在连接 IBM Cloud 拉取任务: {JOB_ID} ...")
+    
+    # 1. 获取数据
+    try:
+        results = fetch_result(JOB_ID, lite=True)  # 第一次拉取后原始 shots 落盘，之后离线读取
+        print("✅ 数据拉取成功！开始对 Q19 (视界末端) 进行热力学分析...")
+    except Exception as e:
+        print(f"❌ 拉取失败: {e}")
+        return
+
+    # 读出误差: Q19 的 P(1|0) / P(0|1) 直接平移、压缩激发率，有校准 PUB 时按 2x2 逆矩阵还原
+    calibration = job_calibration(JOB_ID)
+    if calibration is None:
+        print("⚠️ 该任务没有读出校准 PUB，激发率未做读出缓解")
+        horizon_probs = sweep_p1(results, qubit=-1)
+    else:
+        print(f"📏 Q19 读出误差: P(1|0) = {calibration.p10[-1]:.4f}, P(0|1) = {calibration.p01[-1]:.4f}")
+        horizon_probs = sweep_apply(calibration.split(results), lambda bits: calibration.p1(bits, -1))
+
+    # 全链两比特互信息 -> 每个 γ 的关联长度 ξ_MI (关联区不再手填)
+    correlations = job_correlations(results, calibration=calibration)
+    xi_mi = sweep_correlation_lengths(correlations, "mi")
+
+    # 参数列表: 任务档案里记录的 spec，旧任务退回初步实验的注册参数
+    cooling_sweep = (job_spec(JOB_ID) or experiment_spec("preliminary"))["gammas"]
+    
+    # 存储结果
+    q19_excitation_probs = []
+
+    print("\n📊 视界温度读数 (Horizon Temperature Readings):")
+    print(f"{'Cooling (γ)':<12} | {'P(Q19=1) [激发率]':<20} | {'ξ_MI':<6} | {'物理状态'}")
+    print("-" * 70)
+
+    # 2. 遍历每一个 Cooling Factor 的实验结果
+    # 3. 核心逻辑：只盯着 Q19 看
+    # Qiskit 的 bitstring 是 "Q19 Q18 ... Q0"，Q19 即最高位 (qubit=-1)
+    # 直接在打包的 shot 数组上一次算完所有扫描点
+    for i, prob in enumerate(horizon_probs):
+        prob = float(prob)
+        q19_excitation_probs.append(prob)
+        
+        # 简单判断状态
+        status = "🔥 HOT (Random)"
+        if prob < 0.48: status = "❄️ COLD (Sediment?)"
+        if prob > 0.52: status = "💥 EJECTED (Entropy Dump)"
+        if 0.48 <= prob <= 0.52: status = "〰️ Noise/Thermal"
+        
+        print(f"CF={cooling_sweep[i]:<9} | {prob:.5f}              | {xi_mi[i]:<6.2f} | {status}")
+
+    # ==========================================
+    # 📈 自动画图 (这是给审稿人看的关键证据)
+    # ==========================================
+    plt.style.use('seaborn-v0_8-paper')
+    fig, ax = plt.subplots(figsize=(8, 6))
+    
+    # 绘制曲线
+    ax.plot(cooling_sweep, q19_excitation_probs, 'o-', color='#C71585', 
+            linewidth=2, markersize=8, label='Horizon Excitation P(Q19=1)')
+    
+    # 绘制 0.5 随机线 (热混沌基准)
+    ax.axhline(y=0.5, color='gray', linestyle='--', linewidth=1.5, label='Thermal Chaos Limit (0.5)')
+    
+    # 关联区: ξ_MI 不低于其峰值一半的 γ 范围 (拟合全部失败时不画)
+    ax_xi = ax.twinx()
+    ax_xi.plot(cooling_sweep, xi_mi, 's--', color='#DAA520', linewidth=1.5, markersize=6,
+               label=r'Correlation Length $\xi_{MI}$')
+    ax_xi.set_ylabel(r"$\xi_{MI}$ (sites)", fontsize=12)
+    if np.isfinite(xi_mi).any():
+        zone = np.asarray(cooling_sweep)[xi_mi >= 0.5 * np.nanmax(xi_mi)]
+        ax.axvspan(zone.min(), zone.max(), color='gold', alpha=0.2, label='Correlation Zone (from MI)')
+    else:
+        print("⚠️ 所有 γ 的互信息都在 shot 噪声底以下，未标出关联区")
+
+    # 标注
+    ax.set_title(f"Thermodynamics of the Horizon (Q19)\nJob ID: {JOB_ID[-6:]}", fontsize=12)
+    ax.set_xlabel(r"Cooling Factor $\gamma$", fontsize=12)
+    ax.set_ylabel(r"Excitation Probability $P(1)$", fontsize=12)
+    handles, labels = ax.get_legend_handles_labels()
+    handles_xi, labels_xi = ax_xi.get_legend_handles_labels()
+    ax.legend(handles + handles_xi, labels + labels_xi)
+    ax.grid(True, linestyle=':', alpha=0.6)
+    
+    # 保存
+    filename = "fig_horizon_q19.pdf"
+    plt.tight_layout()
+    plt.savefig(filename, format='pdf')
+    print(f"\n📉 矢量图已生成: {filename}")
+    plt.show()
+
+if __name__ == "__main__":
+    analyze_horizon_temperature()
@@ -0,0 +1,6 @@
+"""
+Project Sediment 共享组件: 电路模板、编译、执行与分析.
+
+各 exp_*.py 驱动脚本与 data analysis/ 下的绘图脚本都从这里导入,
+保证所有实验使用同一条沉积链.
+"""
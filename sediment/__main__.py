@@ -0,0 +1,5 @@
+from sediment.cli import main
+
+# 用法: python -m sediment {show|compile|submit|fetch|analyze} ...
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import numpy as np
+
+from sediment.circuits import sweep_pub
+from sediment.marginals import bit_column, pub_bitarrays
+
+# ==========================================
+# 🎯 自适应 γ 搜索 (Adaptive Dip Search)
+#    先粗扫，再用加权二次拟合估计势井底 γ*，
+#    之后每一轮只在 γ* 附近加点、加 shots，直到 γ* 的置信区间够窄
+# ==========================================
+
+Z_95 = 1.96
+
+
+def fit_well(gammas, ones, shots):
+    """
+    加权二次拟合 P(γ) = a γ² + b γ + c，返回 (γ*, σ_γ*, 系数).
+    权重来自二项分布误差；σ_γ* 由协方差矩阵按 delta 方法传播.
+    开口向下 (没有井) 时返回 (None, None, 系数).
+    """
+    gammas = np.asarray(gammas, dtype=float)
+    shots = np.asarray(shots, dtype=float)
+    p = np.asarray(ones, dtype=float) / shots
+    # p 取 0 或 1 时用 1/(n+2) 修正，避免权重无穷大
+    p_safe = (np.asarray(ones, dtype=float) + 1) / (shots + 2)
+    sigma = np.sqrt(p_safe * (1 - p_safe) / shots)
+    coeffs, cov = np.polyfit(gammas, p, 2, w=1 / sigma, cov="unscaled")
+    a, b, _ = coeffs
+    if a <= 0:
+        return None, None, coeffs
+    center = -b / (2 * a)
+    grad = np.array([b / (2 * a ** 2), -1 / (2 * a), 0.0])
+    return center, float(np.sqrt(grad @ cov @ grad)), coeffs
+
+
+class DipSearch:
+    """
+    单个链长的搜索状态. 同一 γ 的多轮观测会合并 (ones / shots 累加).
+    用法: gammas, shots = search.propose(); ...执行...; search.update(gammas, ones, shots)
+    """
+
+    def __init__(self, lo, hi, coarse_points=7, refine_points=4, shots=1024, shot_growth=2.0,
+                 target_halfwidth=0.005, fit_window=None, max_rounds=6, shot_budget=None):
+        self.lo = lo
+        self.hi = hi
+        self.coarse_points = coarse_points
+        self.refine_points = refine_points
+        self.shots = shots
+        self.shot_growth = shot_growth
+        self.target_halfwidth = target_halfwidth
+        self.fit_window = fit_window or (hi - lo) / 3
+        self.max_rounds = max_rounds
+        self.shot_budget = shot_budget
+        self.ones = {}
+        self.counts = {}
+        self.round = 0
+        self.center = None
+        self.stderr = None
+        self.done = False
+        self.converged = False
+        self.stop_reason = None   # "converged" / "budget" / "rounds"
+
+    @property
+    def gammas(self):
+        return np.array(sorted(self.counts))
+
+    @property
+    def probs(self):
+        return np.array([self.ones[g] / self.counts[g] for g in sorted(self.counts)])
+
+    @property
+    def total_shots(self):
+        return int(sum(self.counts.values()))
+
+    @property
+    def halfwidth(self):
+        return None if self.stderr is None else Z_95 * self.stderr
+
+    def propose(self):
+        """下一轮的 (γ 列表, 每点 shots)"""
+        shots = int(round(self.shots * self.shot_growth ** self.round))
+        if self.center is None:
+            return np.linspace(self.lo, self.hi, self.coarse_points).round(6), shots
+        gammas = self._refine_points()
+        if self.shot_budget is not None:
+            # 最后一轮把剩余预算平分，不超支
+            shots = max(1, min(shots, (self.shot_budget - self.total_shots) // len(gammas)))
+        return gammas, shots
+
+    def _refine_points(self):
+        # 顶点位置主要由两侧斜率决定，所以点对称铺在 γ* 两边，半径随置信区间收缩
+        radius = self.fit_window / 2
+        if self.halfwidth is not None:
+            radius = min(radius, max(4 * self.halfwidth, 4 * self.target_halfwidth))
+        gammas = np.clip(self.center + np.linspace(-radius, radius, self.refine_points), self.lo, self.hi)
+        return np.unique(gammas.round(6))
+
+    def update(self, gammas, ones, shots):
+        for g, k in zip(np.round(gammas, 6), ones):
+            g = float(g)
+            self.ones[g] = self.ones.get(g, 0) + int(k)
+            self.counts[g] = self.counts.get(g, 0) + int(shots)
+        self.round += 1
+        self._fit()
+        # 拟合失败时 halfwidth 是粗扫间距，不可能小于目标，所以不会误判收敛
+        self.converged = self.halfwidth is not None and self.halfwidth <= self.target_halfwidth
+        if self.converged:
+            self.stop_reason = "converged"
+        elif self.shot_budget is not None and self.total_shots >= self.shot_budget:
+            self.stop_reason = "budget"
+        elif self.round >= self.max_rounds:
+            self.stop_reason = "rounds"
+        self.done = self.stop_reason is not None
+
+    def _fit(self):
+        gammas, probs = self.gammas, self.probs
+        anchor = self.center if self.center is not None else gammas[int(np.argmin(probs))]
+        near = np.abs(gammas - anchor) <= self.fit_window / 2
+        if near.sum() < 3:
+            near = np.argsort(np.abs(gammas - anchor))[:3]
+        ones = np.array([self.ones[g] for g in gammas[near]])
+        counts = np.array([self.counts[g] for g in gammas[near]])
+        center, stderr, self.coeffs = fit_well(gammas[near], ones, counts)
+        if center is None or not self.lo <= center <= self.hi:
+            # 拟合失败: 退回观测最低点，误差取粗扫间距 (不允许据此判定收敛)
+            center = gammas[int(np.argmin(probs))]
+            stderr = (self.hi - self.lo) / max(self.coarse_points - 1, 1) / Z_95
+        self.center, self.stderr = float(center), float(stderr)
+
+    def summary(self):
+        """未收敛时 best_cf / ci95 为 None，最后一次拟合只作为 estimate 记录，不当结果用"""
+        ci95 = [self.center - self.halfwidth, self.center + self.halfwidth]
+        return {
+            "converged": self.converged,
+            "stop_reason": self.stop_reason,
+            "best_cf": self.center if self.converged else None,
+            "ci95": ci95 if self.converged else None,
+            "estimate": self.center,
+            "estimate_ci95": ci95,
+            "rounds": self.round,
+            "total_shots": self.total_shots,
+            "gammas": self.gammas.tolist(),
+            "probs": self.probs.tolist(),
+            "shots": [self.counts[g] for g in sorted(self.counts)],
+        }
+
+
+def adaptive_scan(searches, execute, verbose=True):
+    """
+    多个链长并行搜索: 每一轮把所有未收敛的提议打包成一次 execute 调用 (一个 job).
+    execute({key: (gammas, shots)}) -> {key: ones 数组}
+    """
+    while not all(s.done for s in searches.values()):
+        requests = {key: s.propose() for key, s in searches.items() if not s.done}
+        observed = execute(requests)
+        for key, (gammas, shots) in requests.items():
+            searches[key].update(gammas, observed[key], shots)
+            if verbose:
+                s = searches[key]
+                print(f"   [{key}] round {s.round}: γ* = {s.center:.4f} ± {s.halfwidth:.4f} "
+                      f"({s.total_shots} shots)")
+    return searches
+
+
+def sampler_executor(templates, run, qubit=-1):
+    """
+    templates: {key: 已编译模板}；run(pubs) -> PrimitiveResult.
+    每个 key 一个 PUB (circuit, γ 数组, shots)，shots 按 PUB 单独指定.
+    """
+    def execute(requests):
+        keys = list(requests)
+        pubs = [sweep_pub(templates[key], requests[key][0], requests[key][1]) for key in keys]
+        results = run(pubs)
+        ones = [bit_column(bits, qubit).sum(axis=-1) for bits in pub_bitarrays(results)]
+        return dict(zip(keys, ones))
+    return execute
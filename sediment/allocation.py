@@ -0,0 +1,112 @@
+import numpy as np
+
+from sediment.bootstrap import vertex_replicates
+from sediment.circuits import sweep_pub
+
+# ==========================================
+# 🎚️ 统计最优 shot 分配 (Shot Allocation)
+#    目标量 θ = f(p_1 … p_k) 的方差 ≈ Σ s_i² v_i / n_i (s_i = ∂θ/∂p_i, v_i = p_i(1-p_i))
+#    总 shots 固定时最优解是 Neyman 分配: n_i ∝ |s_i| √v_i
+#    s_i、v_i 用一次低 shots 的试探批次 (pilot) 估计
+# ==========================================
+
+
+def binomial_variance(ones, shots):
+    """单 shot 方差 p(1-p)，p 用 (k+1)/(n+2) 平滑，避免试探批次里 p=0 或 1 时分不到 shots"""
+    p = (np.asarray(ones, dtype=float) + 1) / (np.asarray(shots, dtype=float) + 2)
+    return p * (1 - p)
+
+
+# ---------- 目标量对各点 P(1) 的灵敏度 ----------
+def dip_sensitivity(gammas, probs):
+    """
+    井底位置 γ* (二次拟合顶点) 对各点的导数 ∂γ*/∂p_i.
+    拟合是线性最小二乘 β = H p，故 ∂γ*/∂p = ∇_β γ* · H.
+    开口向下 (试探批次里还看不出井) 时退回均匀灵敏度.
+    """
+    gammas = np.asarray(gammas, dtype=float)
+    design = np.vander(gammas, 3)
+    hat = np.linalg.pinv(design)
+    a, b, _ = hat @ np.asarray(probs, dtype=float)
+    if a <= 0:
+        return np.ones_like(gammas)
+    grad = np.array([b / (2 * a ** 2), -1 / (2 * a), 0.0])
+    return grad @ hat
+
+
+def dip_location(gammas, probs):
+    """二次拟合顶点；没有井时退回观测最低点"""
+    return float(vertex_replicates(np.asarray(probs, dtype=float), gammas))
+
+
+def difference_sensitivity(num_points, plus, minus):
+    """两组点平均 P(1) 之差 (如不同噪声级的视界 P(1))"""
+    sensitivity = np.zeros(num_points)
+    sensitivity[list(plus)] = 1.0 / len(plus)
+    sensitivity[list(minus)] = -1.0 / len(minus)
+    return sensitivity
+
+
+def fss_sensitivity(lengths, sweeps, probs, quantity="intercept"):
+    """
+    FSS 外推: best_cf(L) 对 1/L 做线性拟合，quantity='slope' 或 'intercept' (L→∞ 极限).
+    sweeps / probs: 每个 L 一组 γ 与 P(1)；返回按 (L, γ) 展平的灵敏度.
+    """
+    x = 1.0 / np.asarray(lengths, dtype=float)
+    dx = x - x.mean()
+    sxx = np.sum(dx ** 2)
+    if quantity == "slope":
+        weights = dx / sxx
+    elif quantity == "intercept":
+        weights = 1.0 / len(x) - x.mean() * dx / sxx
+    else:
+        raise ValueError(f"未知的 FSS 目标量: {quantity}")
+    return np.concatenate([w * dip_sensitivity(g, p) for w, g, p in zip(weights, sweeps, probs)])
+
+
+# ---------- 分配 ----------
+def neyman_allocation(sensitivity, variance, budget, min_shots=0, granularity=1):
+    """
+    在 Σ n_i = budget 下最小化 Var θ. 每点至少 min_shots，结果为 granularity 的整数倍.
+    """
+    sensitivity = np.asarray(sensitivity, dtype=float)
+    weights = np.abs(sensitivity) * np.sqrt(np.asarray(variance, dtype=float))
+    k = len(weights)
+    units = budget // granularity
+    floor_units = -(-min_shots // granularity)
+    if units < k * floor_units:
+        raise ValueError(f"预算 {budget} 不够每点 {min_shots} shots")
+    if weights.sum() == 0:
+        weights = np.ones(k)
+
+    ideal = floor_units + (units - k * floor_units) * weights / weights.sum()
+    alloc = np.floor(ideal).astype(np.int64)
+    # 最大余数法补足取整损失
+    leftover = units - alloc.sum()
+    alloc[np.argsort(alloc - ideal)[:leftover]] += 1
+    return alloc * granularity
+
+
+def predicted_stderr(sensitivity, variance, shots):
+    """delta 方法给出的目标量标准误"""
+    return float(np.sqrt(np.sum(np.asarray(sensitivity) ** 2 * np.asarray(variance) / np.asarray(shots))))
+
+
+def allocated_pubs(circuits, sweeps, shots):
+    """
+    按分配结果组装 PUB: 同一电路里 shots 相同的点合并成一个 (circuit, values, shots).
+    shots 按 (电路, γ) 展平. 返回 (pubs, index)，index[j] 是第 j 个结果点对应的展平位置.
+    """
+    pubs = []
+    index = []
+    offset = 0
+    shots = np.asarray(shots)
+    for circuit, gammas in zip(circuits, sweeps):
+        gammas = np.asarray(gammas, dtype=float)
+        local = shots[offset:offset + len(gammas)]
+        for n in np.unique(local):
+            chosen = np.flatnonzero(local == n)
+            pubs.append(sweep_pub(circuit, gammas[chosen], int(n)))
+            index.extend((offset + chosen).tolist())
+        offset += len(gammas)
+    return pubs, np.array(index)
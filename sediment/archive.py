@@ -0,0 +1,204 @@
+import json
+import os
+
+import numpy as np
+
+from sediment.containers import LocalDataBin, LocalPubResult, LocalResult, PackedBits
+
+# ==========================================
+# 🧱 列式 shot 档案 (Columnar Shot Archive)
+#    目录结构:
+#      manifest.json               扫描元数据 (每个点的 L / γ / 噪声 / shots / job ID)
+#      pub{i}__{寄存器}.npy        每个 PUB 一块, 形状 (点数, 字节数, shots)
+#    字节按列存放: 取某个比特只需读对应字节行，配合 mmap 不用整块载入.
+#    读取不依赖 qiskit (sediment.containers)，重画图时省掉整个 qiskit 的导入
+# ==========================================
+
+FORMAT_NAME = "sediment-shots"
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def _jsonable(obj):
+    return json.loads(json.dumps(obj, default=str))
+
+
+def _chunk_name(pub, register):
+    return f"pub{pub}__{register}.npy"
+
+
+def write_archive(path, results, points=None, job_id=None, metadata=None):
+    """
+    把 PrimitiveResult 写成档案.
+    points: 按提交顺序、每个扫描点一个 dict (如 {"L": 20, "gamma": 0.25, "noise": 0.0})，可省略.
+    """
+    os.makedirs(path, exist_ok=True)
+    pubs = []
+    table = []
+    for i, pub_result in enumerate(results):
+        shape = tuple(pub_result.data.shape)
+        registers = {}
+        shots = None
+        for name in pub_result.data.keys():
+            bits = getattr(pub_result.data, name)
+            shots = bits.num_shots
+            packed = bits.array.reshape((-1, shots, bits.array.shape[-1]))
+            columnar = np.ascontiguousarray(packed.transpose(0, 2, 1))
+            tmp_path = os.path.join(path, _chunk_name(i, name) + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, columnar)
+            os.replace(tmp_path, os.path.join(path, _chunk_name(i, name)))
+            registers[name] = {"num_bits": bits.num_bits, "num_bytes": bits.array.shape[-1]}
+        pubs.append({"shape": list(shape), "shots": shots, "registers": registers,
+                     "metadata": _jsonable(pub_result.metadata)})
+        for j in range(int(np.prod(shape, dtype=int))):
+            table.append({"pub": i, "index": j, "shots": shots})
+
+    if points is not None:
+        if len(points) != len(table):
+            raise ValueError(f"points 数量 ({len(points)}) 与扫描点数量 ({len(table)}) 不一致")
+        for row, extra in zip(table, points):
+            row.update(_jsonable(extra))
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "job_id": job_id,
+        "pubs": pubs,
+        "points": table,
+        "job_metadata": _jsonable(getattr(results, "metadata", {})),
+        "metadata": _jsonable(metadata or {}),
+    }
+    tmp_path = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    # manifest 最后写入: 它存在即代表档案完整
+    os.replace(tmp_path, os.path.join(path, MANIFEST))
+
+
+class ShotArchive:
+    """只读打开档案；所有数据块都以 mmap 方式按需读取"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} 不是 {FORMAT_NAME} 档案")
+        self._chunks = {}
+
+    @property
+    def job_id(self):
+        return self.manifest["job_id"]
+
+    @property
+    def points(self):
+        return self.manifest["points"]
+
+    @property
+    def metadata(self):
+        return self.manifest["metadata"]
+
+    def _register(self, pub, register):
+        if register is None:
+            register = next(iter(self.manifest["pubs"][pub]["registers"]))
+        return register
+
+    def chunk(self, pub, register=None):
+        """(点数, 字节数, shots) 的 memmap"""
+        register = self._register(pub, register)
+        key = (pub, register)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(os.path.join(self.path, _chunk_name(pub, register)), mmap_mode="r")
+        return self._chunks[key]
+
+    def select(self, **criteria):
+        """按元数据筛选扫描点，如 select(L=20, gamma=0.25)；浮点比较容差 1e-9"""
+        chosen = []
+        for k, row in enumerate(self.points):
+            ok = True
+            for key, value in criteria.items():
+                have = row.get(key)
+                if isinstance(value, float) and isinstance(have, (int, float)):
+                    ok = ok and abs(have - value) < 1e-9
+                else:
+                    ok = ok and have == value
+            if ok:
+                chosen.append(k)
+        return chosen
+
+    def bits(self, point, register=None):
+        """单个扫描点的 PackedBits (BitArray 的只读接口，只读这一点的数据)"""
+        row = self.points[point]
+        register = self._register(row["pub"], register)
+        num_bits = self.manifest["pubs"][row["pub"]]["registers"][register]["num_bits"]
+        block = self.chunk(row["pub"], register)[row["index"]]
+        return PackedBits(np.ascontiguousarray(block.T), num_bits)
+
+    def bit_column(self, point, qubit, register=None):
+        """单个扫描点、单个比特的 0/1 列；只读取一行字节"""
+        row = self.points[point]
+        register = self._register(row["pub"], register)
+        info = self.manifest["pubs"][row["pub"]]["registers"][register]
+        if qubit < 0:
+            qubit += info["num_bits"]
+        byte_row = info["num_bytes"] - 1 - qubit // 8
+        block = self.chunk(row["pub"], register)[row["index"], byte_row]
+        return (np.asarray(block) >> (qubit % 8)) & 1
+
+    def p1(self, qubit=-1, points=None, register=None):
+        """各扫描点的 P(qubit=1)"""
+        if points is None:
+            points = range(len(self.points))
+        return np.array([self.bit_column(k, qubit, register).mean() for k in points])
+
+    def to_result(self, lite=False):
+        """
+        整体载入为与 job.result() 同构的 PrimitiveResult.
+        lite=True 时返回 sediment.containers 的轻量容器 (接口相同，不导入 qiskit).
+        """
+        pub_results = []
+        for i, pub in enumerate(self.manifest["pubs"]):
+            shape = tuple(pub["shape"])
+            meas = {}
+            for name, info in pub["registers"].items():
+                columnar = self.chunk(i, name)
+                packed = np.ascontiguousarray(columnar.transpose(0, 2, 1))
+                meas[name] = PackedBits(packed.reshape(shape + packed.shape[1:]), info["num_bits"])
+            pub_results.append(LocalPubResult(LocalDataBin(shape, **meas), metadata=pub["metadata"]))
+        result = LocalResult(pub_results, metadata=self.manifest["job_metadata"])
+        return result if lite else result.to_qiskit()
+
+
+# ==========================================
+# 📝 JSON 派生视图 (供 data analysis/figS*.py 使用)
+# ==========================================
+def fss_view(archive, qubit=-1):
+    """fss_scaling_data.json 格式: {"job_id", "raw": {"L16": {"cfs", "probs", "shots"}}, "scaling"}"""
+    return _legacy(archive, "fss", qubit)
+
+
+def sniper_view(archive, qubit=-1):
+    """sniper_evidence_0268.json 格式: parameters / results / highlight"""
+    return _legacy(archive, "sniper", qubit)
+
+
+def _legacy(archive, view, qubit):
+    # 与 sediment.spec.legacy_view 同一条路径: 只取倍率 1 的扫描点，读出校准点不参与
+    from sediment.spec import legacy_view, spec_grid
+    grid = spec_grid(archive, qubit=qubit)
+    return legacy_view(grid, archive.job_id, {"view": view}, archive.metadata.get("backend"))
+
+
+def export_json(view, filename):
+    with open(filename, "w") as f:
+        json.dump(view, f, indent=4)
+
+
+if __name__ == "__main__":
+    # 用法: python -m sediment.archive <档案目录> {fss|sniper} <输出.json>
+    import sys
+    archive_path, view_name, out_name = sys.argv[1:4]
+    views = {"fss": fss_view, "sniper": sniper_view}
+    export_json(views[view_name](ShotArchive(archive_path)), out_name)
+    print(f"💾 JSON 视图已导出: {out_name}")
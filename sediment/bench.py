@@ -0,0 +1,351 @@
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ==========================================
+# 🏁 流水线基准 (Pipeline Benchmark)
+#    建电路 -> 编译 (FakeTorino，离线 Heron) -> 边缘分布提取 -> bootstrap -> FSS 塌缩拟合，
+#    按链长 L 与 shots 扫描. 每个用例在独立的 spawn 子进程里跑 (互不预热缓存，峰值内存各自独立)，
+#    结果写成 JSON；给出基线 JSON 时逐用例比较，超出阈值退出码为 1
+# ==========================================
+
+LENGTHS = (16, 20, 24, 28, 64, 127)
+SHOTS = (1_000, 10_000, 100_000)
+STAGES = ("build_sediment", "build_fig7", "transpile_sediment", "transpile_fig7", "marginals", "bootstrap", "fss_fit")
+PER_LENGTH = ("build_sediment", "build_fig7", "transpile_sediment", "transpile_fig7")   # 与 shots 无关
+PER_SHOTS = ("bootstrap", "fss_fit")                                                    # 所有链长一起
+DEFAULT_REPEATS = 3
+REPEAT_BUDGET = 5.0          # 秒: 累计超过它的用例不再重复 (L=127 没有固定链，level-3 布局搜索一次 ~25 s)
+DEFAULT_MAX_SLOWDOWN = 0.25  # 比基线慢 25% 以上算回归
+DEFAULT_MAX_MEMORY = 0.25    # 峰值内存多 25% 以上算回归
+MIN_SECONDS = 0.005          # 绝对差小于它的计时差异视为抖动
+MIN_BYTES = 16 * 1024 ** 2   # 绝对差小于它的内存差异视为抖动
+DEFAULT_OUT = "bench_results.json"
+SEED = 2025
+
+# 合成的 FSS 曲线: 1 - 2 P(1) = L^{-β/ν} f((γ - γ_c) L^{1/ν})，f 为高斯井
+MODEL = {"gamma_c": 0.25, "nu": 2.0, "beta": 0.2, "width": 0.5, "depth": 0.8}
+
+
+def case_key(case):
+    """
+    如 "marginals[L=20,shots=1000]"、"bootstrap[lengths=16/20/24,shots=1000]"；与链长 / shots 无关的维度省略.
+    所有链长一起跑的阶段把链长集合写进 key，不同链长集合的结果不会被拿来互相比较
+    """
+    dims = []
+    if case.get("L") is not None:
+        dims.append(f"L={case['L']}")
+    if case.get("lengths"):
+        dims.append("lengths=" + "/".join(str(L) for L in case["lengths"]))
+    if case.get("shots") is not None:
+        dims.append(f"shots={case['shots']}")
+    return f"{case['stage']}[{','.join(dims)}]"
+
+
+def bench_cases(lengths=LENGTHS, shots=SHOTS, stages=STAGES):
+    cases = []
+    for stage in stages:
+        if stage not in STAGES:
+            raise ValueError(f"未知的基准阶段 {stage}，可选 {STAGES}")
+        if stage in PER_LENGTH:
+            cases += [{"stage": stage, "L": L, "shots": None} for L in lengths]
+        elif stage in PER_SHOTS:
+            if len(lengths) < 2:
+                raise ValueError(f"{stage} 要对 1/L 外推 / 做塌缩，至少需要两个链长，收到 {list(lengths)}")
+            cases += [{"stage": stage, "L": None, "shots": n, "lengths": list(lengths)} for n in shots]
+        else:
+            cases += [{"stage": stage, "L": L, "shots": n} for L in lengths for n in shots]
+    return cases
+
+
+# ==========================================
+# 🧪 合成数据 (不连网、可复现)
+# ==========================================
+def _gammas():
+    from sediment.spec import experiment_spec
+    return experiment_spec("fss")["gammas"]
+
+
+def synthetic_bits(num_bits, shots, points, seed=SEED):
+    """随机打包比特 (points, shots, 字节数)；首字节 (大端) 只保留有效的高位比特"""
+    from sediment.containers import PackedBits
+
+    rng = np.random.default_rng(seed)
+    nbytes = -(-num_bits // 8)
+    array = rng.integers(0, 256, size=(points, shots, nbytes), dtype=np.uint8)
+    array[..., 0] &= (1 << (num_bits - 8 * (nbytes - 1))) - 1
+    return PackedBits(array, num_bits)
+
+
+def synthetic_counts(lengths, gammas, shots, seed=SEED):
+    """按 MODEL 生成各 (L, γ) 的 1 计数，形状 (n_L, n_γ)"""
+    L = np.asarray(lengths, dtype=float)[:, None]
+    x = (np.asarray(gammas, dtype=float)[None, :] - MODEL["gamma_c"]) * L ** (1 / MODEL["nu"])
+    p1 = 0.5 * (1 - MODEL["depth"] * L ** (-MODEL["beta"] / MODEL["nu"]) * np.exp(-(x / MODEL["width"]) ** 2))
+    ones = np.random.default_rng(seed).binomial(shots, p1)
+    return ones, np.full(ones.shape, shots)
+
+
+# ==========================================
+# ⏱️ 各阶段: setup(case) -> run()，run 返回附加信息 (写进结果)
+# ==========================================
+def _setup_build(case):
+    import qiskit.circuit  # noqa: F401  circuits 里是延迟导入，导入时间 / 内存不计入建电路
+
+    from sediment.circuits import fig7_ensemble_template, sediment_template
+
+    build = sediment_template if case["stage"] == "build_sediment" else fig7_ensemble_template
+
+    def run():
+        qc = build(case["L"])
+        return {"size": qc.size(), "parameters": qc.num_parameters}
+    return run
+
+
+def _setup_transpile(case):
+    from qiskit_ibm_runtime.fake_provider import FakeTorino
+
+    from sediment.circuits import fig7_ensemble_template, sediment_template
+    from sediment.layout import TWO_QUBIT_OPS, chain_layouts
+    from sediment.transpile import DEFAULT_SEED, transpile_template
+
+    backend = FakeTorino()
+    build = sediment_template if case["stage"] == "transpile_sediment" else fig7_ensemble_template
+    template = build(case["L"])
+    start = time.perf_counter()
+    try:
+        layout = chain_layouts([template], backend, cache=False)[0]
+    except ValueError:
+        # 重六边形耦合图上没有这么长的简单路径 (L=127)，交给 level-3 布局搜索
+        layout = None
+    layout_seconds = time.perf_counter() - start
+
+    def run():
+        transpiled = transpile_template(template, backend, seed_transpiler=DEFAULT_SEED, initial_layout=layout)
+        ops = transpiled.count_ops()
+        return {"backend": backend.name, "depth": transpiled.depth(),
+                "two_qubit": sum(ops.get(name, 0) for name in TWO_QUBIT_OPS),
+                "pinned_layout": layout is not None, "layout_seconds": layout_seconds}
+    return run
+
+
+def _setup_marginals(case):
+    from sediment.containers import LocalDataBin, LocalPubResult, LocalResult
+    from sediment.marginals import sweep_all_zero_probability, sweep_ones, sweep_zero_density
+
+    points = len(_gammas())
+    bits = synthetic_bits(case["L"], case["shots"], points)
+    results = LocalResult([LocalPubResult(LocalDataBin((points,), meas=bits))])
+
+    def run():
+        sweep_ones(results)
+        sweep_zero_density(results)
+        sweep_all_zero_probability(results)
+        return {"points": points, "bytes": int(bits.array.nbytes)}
+    return run
+
+
+def _setup_bootstrap(case):
+    from sediment.bootstrap import DEFAULT_REPLICATES, fss_bootstrap
+
+    gammas = _gammas()
+    ones, shots = synthetic_counts(case["lengths"], gammas, case["shots"])
+
+    def run():
+        summary, _ = fss_bootstrap(ones, shots, case["lengths"], gammas, seed=SEED)
+        return {"replicates": DEFAULT_REPLICATES, "intercept": float(summary["intercept"]["value"])}
+    return run
+
+
+def _setup_fss_fit(case):
+    import scipy.optimize  # noqa: F401  collapse 里是延迟导入，不计入拟合
+
+    from sediment.collapse import fit_collapse
+
+    gammas = np.asarray(_gammas(), dtype=float)
+    ones, shots = synthetic_counts(case["lengths"], gammas, case["shots"])
+    curves = [{"L": L, "gamma": gammas, "p1": ones[k] / shots[k], "shots": shots[k].astype(float)}
+              for k, L in enumerate(case["lengths"])]
+
+    def run():
+        # 子进程里再开进程池只会测到 spawn 开销，这里固定串行
+        fit = fit_collapse(curves, max_workers=1)
+        return {"gamma_c": fit["gamma_c"], "nu": fit["nu"], "beta": fit["beta"]}
+    return run
+
+
+SETUPS = {
+    "build_sediment": _setup_build,
+    "build_fig7": _setup_build,
+    "transpile_sediment": _setup_transpile,
+    "transpile_fig7": _setup_transpile,
+    "marginals": _setup_marginals,
+    "bootstrap": _setup_bootstrap,
+    "fss_fit": _setup_fss_fit,
+}
+
+
+def _rss():
+    """Linux: (当前 RSS, 峰值 RSS) 字节，读 /proc/self/status；其他平台为 None"""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+    except OSError:
+        return None
+    return tuple(int(fields[name].split()[0]) * 1024 for name in ("VmRSS", "VmHWM"))
+
+
+def _reset_peak_rss():
+    """把峰值 RSS (VmHWM) 重置为当前 RSS (Linux >= 4.0 的 clear_refs)，成功返回 True"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return _rss() is not None
+
+
+def run_case(case, repeats=DEFAULT_REPEATS):
+    """
+    在当前进程里跑一个用例: 准备输入后计时 repeats 次 (取最快)，总耗时超过 REPEAT_BUDGET 即停.
+    peak_bytes 只算这一阶段本身: 第一次运行前把峰值 RSS 重置到当前值，取运行中峰值减起点
+    (含 qiskit 的 Rust 原生分配)；不支持重置时改用 tracemalloc 单独跑一次 (只计 Python / numpy 分配).
+    """
+    run = SETUPS[case["stage"]](case)
+    peak, source = None, None
+    if _reset_peak_rss():
+        start_rss = _rss()[0]
+        source = "rss"
+    seconds, info = [], {}
+    while len(seconds) < repeats and sum(seconds) < REPEAT_BUDGET:
+        start = time.perf_counter()
+        info = run()
+        seconds.append(time.perf_counter() - start)
+        if source == "rss" and peak is None:
+            peak = _rss()[1] - start_rss
+    if source is None:
+        import tracemalloc
+        tracemalloc.start()
+        run()
+        peak, source = tracemalloc.get_traced_memory()[1], "tracemalloc"
+        tracemalloc.stop()
+    return dict(case, key=case_key(case), seconds=min(seconds), runs=seconds, peak_bytes=int(peak),
+                memory_source=source, info=info)
+
+
+def _run_case_task(args):
+    return run_case(*args)
+
+
+def run_benchmarks(cases, repeats=DEFAULT_REPEATS, isolate=True, verbose=True):
+    """isolate=True: 每个用例一个新 spawn 进程 (串行，不与其他用例争 CPU)"""
+    results = []
+    if isolate:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx, max_tasks_per_child=1) as pool:
+            for result in pool.map(_run_case_task, [(case, repeats) for case in cases]):
+                results.append(result)
+                if verbose:
+                    _print_result(result)
+    else:
+        for case in cases:
+            results.append(run_case(case, repeats))
+            if verbose:
+                _print_result(results[-1])
+    return results
+
+
+def _print_result(result):
+    print(f"   {result['key']:<40} {result['seconds'] * 1e3:10.1f} ms  (x{len(result['runs'])})"
+          f"  峰值 +{result['peak_bytes'] / 1024 ** 2:8.1f} MiB")
+
+
+def environment():
+    import qiskit
+    return {"python": platform.python_version(), "numpy": np.__version__, "qiskit": qiskit.__version__,
+            "platform": platform.platform(), "machine": platform.machine(), "cpu_count": os.cpu_count()}
+
+
+# ==========================================
+# 📉 基线比较
+# ==========================================
+def compare(report, baseline, max_slowdown=DEFAULT_MAX_SLOWDOWN, max_memory=DEFAULT_MAX_MEMORY,
+            min_seconds=MIN_SECONDS, min_bytes=MIN_BYTES):
+    """
+    逐用例 (按 key) 比较，返回回归列表 [{"key", "metric", "baseline", "current", "ratio"}].
+    相对阈值和绝对阈值都超出才算回归；基线里没有的用例跳过，内存来源不同时不比内存.
+    """
+    reference = {row["key"]: row for row in baseline["results"]}
+    regressions = []
+    for row in report["results"]:
+        base = reference.get(row["key"])
+        if base is None:
+            continue
+        checks = [("seconds", max_slowdown, min_seconds)]
+        if base.get("memory_source") == row["memory_source"]:
+            checks.append(("peak_bytes", max_memory, min_bytes))
+        for metric, relative, absolute in checks:
+            old, new = base[metric], row[metric]
+            if new > old * (1 + relative) and new - old > absolute:
+                regressions.append({"key": row["key"], "metric": metric, "baseline": old, "current": new,
+                                    "ratio": new / old if old else float("inf")})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sediment.bench", description="建电路 -> 编译 -> 分析 流水线基准")
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(LENGTHS))
+    parser.add_argument("--shots", type=int, nargs="+", default=list(SHOTS))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="每个用例最多计时次数 (取最快)")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="结果 JSON")
+    parser.add_argument("--baseline", default=None, help="基线 JSON (之前某次的结果文件)，有回归时退出码 1")
+    parser.add_argument("--save-baseline", default=None, metavar="PATH", help="把本次结果另存为基线")
+    parser.add_argument("--max-slowdown", type=float, default=DEFAULT_MAX_SLOWDOWN, help="允许的相对变慢")
+    parser.add_argument("--max-memory", type=float, default=DEFAULT_MAX_MEMORY, help="允许的相对峰值内存增长")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS, help="低于此绝对差的计时变化不算回归")
+    parser.add_argument("--in-process", action="store_true", help="不开子进程 (调试用，峰值内存会互相影响)")
+    args = parser.parse_args(argv)
+
+    cases = bench_cases(args.lengths, args.shots, args.stages)
+    print(f"🏁 {len(cases)} 个用例: L={args.lengths}, shots={args.shots}")
+    results = run_benchmarks(cases, args.repeats, isolate=not args.in_process)
+    report = {"timestamp": datetime.datetime.now().isoformat(), "environment": environment(),
+              "repeats": args.repeats, "results": results}
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 {path}")
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("environment", {}).get("platform") != report["environment"]["platform"]:
+        print("⚠️ 基线来自不同的机器 / 平台，计时比较仅供参考")
+    regressions = compare(report, baseline, args.max_slowdown, args.max_memory, args.min_seconds)
+    for r in regressions:
+        unit, scale = ("ms", 1e3) if r["metric"] == "seconds" else ("MiB", 1 / 1024 ** 2)
+        print(f"   ❌ {r['key']:<40} {r['metric']}: {r['baseline'] * scale:.1f} -> {r['current'] * scale:.1f} {unit}"
+              f" (x{r['ratio']:.2f})")
+    if regressions:
+        print(f"❌ {len(regressions)} 项回归 (阈值: 时间 +{args.max_slowdown:.0%}，内存 +{args.max_memory:.0%})")
+        return 1
+    print(f"✅ 与基线 {args.baseline} 相比无回归")
+    return 0
+
+
+if __name__ == "__main__":
+    # 用法: python -m sediment.bench                                全量 (L x shots)，写 bench_results.json
+    #       python -m sediment.bench --save-baseline bench_baseline.json
+    #       python -m sediment.bench --baseline bench_baseline.json  有回归时退出码 1
+    #       python -m sediment.bench --lengths 16 20 --shots 1000 --stages marginals bootstrap
+    sys.exit(main())
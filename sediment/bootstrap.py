@@ -0,0 +1,156 @@
+import numpy as np
+
+# ==========================================
+# 🎲 向量化 Bootstrap 误差棒 (Vectorized Bootstrap)
+#    所有重抽样都是一次批量 NumPy 运算，没有逐 replicate 的 Python 循环；
+#    replicate 维度按块处理，内存上限固定
+# ==========================================
+
+DEFAULT_REPLICATES = 1000
+DEFAULT_LEVEL = 0.95
+DEFAULT_CHUNK_BYTES = 64 * 1024 ** 2
+
+
+def _rng(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+def _chunks(replicates, per_replicate_bytes, chunk_bytes):
+    size = max(1, int(chunk_bytes // max(per_replicate_bytes, 1)))
+    for start in range(0, replicates, size):
+        yield min(size, replicates - start)
+
+
+# ---------- 重抽样 ----------
+def bootstrap_p1(ones, shots, replicates=DEFAULT_REPLICATES, seed=None):
+    """
+    单比特 P(1) 的 bootstrap replicate，形状 (replicates,) + ones.shape.
+    从 n 个 shot 中有放回抽 n 个，1 的个数正好服从 Binomial(n, k/n)，
+    所以直接抽二项分布，与逐 shot 重抽完全等价但不需要 shot 数组.
+    """
+    rng = _rng(seed)
+    ones = np.asarray(ones)
+    shots = np.asarray(shots)
+    draws = rng.binomial(shots, ones / shots, size=(replicates,) + ones.shape)
+    return draws / shots
+
+
+def bootstrap_histogram(counts, replicates=DEFAULT_REPLICATES, seed=None):
+    """
+    多结果观测量 (Hamming 重量直方图、k 比特边缘分布) 的 bootstrap: 每点一次多项分布抽样.
+    counts: (..., bins) 计数；返回 (replicates, ..., bins) 的概率.
+    """
+    rng = _rng(seed)
+    counts = np.asarray(counts)
+    shots = counts.sum(axis=-1)
+    draws = rng.multinomial(shots, counts / shots[..., None], size=(replicates,) + shots.shape)
+    return draws / shots[..., None]
+
+
+def resample_shots(samples, statistic, replicates=DEFAULT_REPLICATES, seed=None,
+                   chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    通用路径: 对 shot 数组 samples (points, shots[, k]) 逐点独立地有放回重抽 shots，
+    statistic 接收 (r, points, shots[, k]) 返回 (r, ...). 按块拼接成 (replicates, ...).
+    """
+    rng = _rng(seed)
+    samples = np.asarray(samples)
+    points, shots = samples.shape[:2]
+    row_bytes = samples[0, 0].nbytes if samples.ndim > 2 else samples.itemsize
+    per_replicate = points * shots * (8 + row_bytes)
+    rows = np.arange(points)[None, :, None]
+    parts = []
+    for r in _chunks(replicates, per_replicate, chunk_bytes):
+        idx = rng.integers(0, shots, size=(r, points, shots))
+        parts.append(np.asarray(statistic(samples[rows, idx])))
+    return np.concatenate(parts, axis=0)
+
+
+# ---------- 汇总 ----------
+def confidence_interval(replicates, level=DEFAULT_LEVEL):
+    """百分位区间，沿 replicate 轴 (axis 0)；返回 (lo, hi)"""
+    alpha = (1 - level) / 2
+    lo, hi = np.percentile(replicates, [100 * alpha, 100 * (1 - alpha)], axis=0)
+    return lo, hi
+
+
+def summarize(estimate, replicates, level=DEFAULT_LEVEL):
+    """{"value", "stderr", "ci"}，可直接写进 JSON"""
+    lo, hi = confidence_interval(replicates, level)
+    return {
+        "value": np.asarray(estimate).tolist(),
+        "stderr": np.std(replicates, axis=0, ddof=1).tolist(),
+        "ci": [np.asarray(lo).tolist(), np.asarray(hi).tolist()],
+    }
+
+
+def error_bars(estimate, replicates, level=DEFAULT_LEVEL):
+    """matplotlib errorbar 用的非对称 yerr (2, ...)"""
+    lo, hi = confidence_interval(replicates, level)
+    return np.clip([np.asarray(estimate) - lo, hi - np.asarray(estimate)], 0, None)
+
+
+# ---------- 沿分析流程传播 ----------
+def dip_replicates(p1, gammas):
+    """沿最后一轴找最低点: 返回 (best_cf, min_prob)，形状 = p1.shape[:-1]"""
+    k = np.argmin(p1, axis=-1)
+    best = np.asarray(gammas)[k]
+    lowest = np.take_along_axis(p1, k[..., None], axis=-1)[..., 0]
+    return best, lowest
+
+
+def vertex_replicates(p1, gammas):
+    """
+    沿最后一轴做二次拟合，返回顶点 γ* = -b/2a，形状 = p1.shape[:-1].
+    拟合是线性最小二乘，所有 replicate 共用一个 hat 矩阵；开口向下时退回观测最低点.
+    """
+    gammas = np.asarray(gammas, dtype=float)
+    hat = np.linalg.pinv(np.vander(gammas, 3))
+    coeffs = np.asarray(p1, dtype=float) @ hat.T
+    a, b = coeffs[..., 0], coeffs[..., 1]
+    grid = gammas[np.argmin(p1, axis=-1)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(a > 0, -b / (2 * a), grid)
+
+
+def extrapolate_replicates(lengths, best_cfs):
+    """
+    best_cf 对 1/L 的线性外推，best_cfs 形状 (..., n_L).
+    polyfit 对多列 y 一次求解，返回 (slope, intercept)，intercept 即 L→∞ 极限.
+    """
+    x = 1.0 / np.asarray(lengths, dtype=float)
+    best_cfs = np.asarray(best_cfs, dtype=float)
+    flat = best_cfs.reshape(-1, best_cfs.shape[-1])
+    slope, intercept = np.polyfit(x, flat.T, 1)
+    return slope.reshape(best_cfs.shape[:-1]), intercept.reshape(best_cfs.shape[:-1])
+
+
+def fss_bootstrap(ones, shots, lengths, gammas, replicates=DEFAULT_REPLICATES, level=DEFAULT_LEVEL,
+                  seed=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    FSS 整条分析链的 bootstrap: P(1) -> 每个 L 的 best_cf / min_prob -> 1/L 外推.
+    best_cf 取二次拟合顶点 (与 allocation.dip_location 一致)，min_prob 为观测最低点.
+    ones / shots 按 (L, γ) 展平或为 (n_L, n_γ)；返回各量的 summarize 结果与 replicate 数组.
+    """
+    rng = _rng(seed)
+    shape = (len(lengths), len(gammas))
+    ones = np.asarray(ones).reshape(shape)
+    shots = np.asarray(shots).reshape(shape)
+    p1 = ones / shots
+    best, lowest = vertex_replicates(p1, gammas), dip_replicates(p1, gammas)[1]
+    slope, intercept = extrapolate_replicates(lengths, best)
+
+    reps = {"best_cf": [], "min_prob": [], "slope": [], "intercept": []}
+    for r in _chunks(replicates, ones.size * 16, chunk_bytes):
+        p1_reps = bootstrap_p1(ones, shots, r, rng)
+        b, m = vertex_replicates(p1_reps, gammas), dip_replicates(p1_reps, gammas)[1]
+        s, i = extrapolate_replicates(lengths, b)
+        for key, value in zip(reps, (b, m, s, i)):
+            reps[key].append(value)
+    reps = {key: np.concatenate(value, axis=0) for key, value in reps.items()}
+
+    estimates = {"best_cf": best, "min_prob": lowest, "slope": slope, "intercept": intercept}
+    summary = {key: summarize(estimates[key], reps[key], level) for key in reps}
+    summary["level"] = level
+    summary["replicates"] = replicates
+    return summary, reps
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import io
+import os
+
+import qiskit
+from qiskit import qpy
+
+# ==========================================
+# 💾 编译缓存 (Transpilation Cache)
+#    level-3 编译结果按内容寻址存成 QPY，重复扫描直接读盘
+# ==========================================
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sediment", "transpile")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def circuit_fingerprint(circuit):
+    """逻辑电路的结构哈希 (门、比特、参数表达式)，与 Parameter 的 uuid 无关"""
+    h = hashlib.sha256()
+    h.update(f"{circuit.num_qubits}|{circuit.num_clbits}|".encode())
+    for creg in circuit.cregs:
+        h.update(f"creg:{creg.name}:{creg.size}|".encode())
+    for instruction in circuit.data:
+        op = instruction.operation
+        qubits = [circuit.find_bit(q).index for q in instruction.qubits]
+        clbits = [circuit.find_bit(c).index for c in instruction.clbits]
+        params = [str(p) for p in op.params]
+        h.update(f"{op.name}{qubits}{clbits}{params}|".encode())
+    return h.hexdigest()
+
+
+def calibration_timestamp(backend):
+    try:
+        properties = backend.properties()
+    except Exception:
+        return ""
+    if properties is None:
+        return ""
+    return str(getattr(properties, "last_update_date", ""))
+
+
+def target_fingerprint(backend):
+    """后端 target 指纹: 耦合图、基础门与校准时间，任一变化都会让旧缓存失效"""
+    edges = sorted(tuple(e) for e in backend.coupling_map.get_edges())
+    basis = sorted(backend.operation_names)
+    payload = f"{backend.num_qubits}|{edges}|{basis}|{calibration_timestamp(backend)}|{qiskit.__version__}"
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class TranspileCache:
+    """
+    文件名格式: <backend>__<target 指纹>__<key>.qpy
+    LRU 依据文件 mtime，命中时刷新；多个进程共用同一目录也不需要索引文件.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get("SEDIMENT_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, circuit, backend, optimization_level=3, seed_transpiler=None, initial_layout=None):
+        """返回 '<target 指纹>__<内容哈希>'，target 指纹同时用于失效判断"""
+        target = target_fingerprint(backend)
+        payload = f"{circuit_fingerprint(circuit)}|{backend.name}|{target}|{optimization_level}|{seed_transpiler}"
+        if initial_layout is not None:
+            payload += f"|layout:{list(initial_layout)}"
+        return f"{target}__{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def _path(self, key, backend):
+        return os.path.join(self.directory, f"{backend.name}__{key}.qpy")
+
+    def invalidate_stale(self, backend, current=None):
+        """删除同一后端但 target 已变化 (重新校准、耦合图变动) 的缓存"""
+        current = current or target_fingerprint(backend)
+        removed = 0
+        for path in glob.glob(os.path.join(self.directory, f"{glob.escape(backend.name)}__*.qpy")):
+            if os.path.basename(path).split("__")[1] != current:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def get(self, key, backend):
+        path = self._path(key, backend)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                circuit = qpy.load(f)[0]
+        except Exception:
+            # 损坏的缓存文件直接丢弃，重新编译
+            os.remove(path)
+            return None
+        os.utime(path)
+        return circuit
+
+    def put(self, key, backend, circuit):
+        buffer = io.BytesIO()
+        qpy.dump(circuit, buffer)
+        self.invalidate_stale(backend, current=key.split("__")[0])
+        path = self._path(key, backend)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """按最近使用时间淘汰，直到总大小不超过 max_bytes"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.qpy")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.directory, "*.qpy")):
+            os.remove(path)
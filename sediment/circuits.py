@@ -0,0 +1,154 @@
+import numpy as np
+
+# ==========================================
+# 🧪 Project Sediment: 共享电路模板
+#    整条链只建一次，γ 作为 Parameter 留到提交时再绑定.
+#    qiskit 在建电路时才导入: 只读常量 / 组装扫描点的分析代码不必付出 qiskit 的导入时间
+# ==========================================
+
+FIG7_TROTTER_STEPS = 10
+FIG7_COUPLING = 2.0
+# 每个 Trotter 步内键的排布: "serial" 逐键串行 (原始阶梯, 深度 O(L·steps))，
+# "even-odd" / "odd-even" 砖墙式两层，同层的键互不相交、并行执行 (深度 O(steps))
+LAYERINGS = ("serial", "even-odd", "odd-even")
+
+
+def _chaos_source(qc):
+    # 黄金混沌源 (Chaos Source) - 所有实验严格保持一致
+    qc.h(0); qc.cx(0, 1); qc.rx(np.pi/1.3, 0); qc.rz(np.pi/2.5, 1); qc.cx(1, 0)
+    qc.barrier()
+
+
+def sediment_template(length):
+    """沉积链模板: 冷却角 γ 为未绑定的 Parameter"""
+    from qiskit import QuantumCircuit
+    from qiskit.circuit import Parameter
+
+    gamma = Parameter("γ")
+    qc = QuantumCircuit(length)
+    _chaos_source(qc)
+
+    # 沉积通道 (Cooling 比例固定为 1 : 0.5)
+    theta = gamma * np.pi
+    for i in range(length - 1):
+        qc.cx(i, i+1); qc.h(i); qc.cx(i+1, i)
+        qc.rz(theta, i+1); qc.rx(theta * 0.5, i+1)
+        qc.barrier()
+
+    qc.measure_all()
+    return qc
+
+
+def create_sediment_circuit(length, cooling_factor=0.1):
+    return sediment_template(length).assign_parameters([cooling_factor])
+
+
+def trotter_layers(length, layering="even-odd"):
+    """一个 Trotter 步内的键 (i, i+1) 按层分组: [[i, ...], ...]，同层的键互不相交"""
+    bonds = range(length - 1)
+    if layering == "serial":
+        return [[i] for i in bonds]
+    if layering not in LAYERINGS:
+        raise ValueError(f"layering 必须是 {LAYERINGS} 之一，收到 {layering}")
+    even, odd = list(bonds[0::2]), list(bonds[1::2])
+    layers = [even, odd] if layering == "even-odd" else [odd, even]
+    return [layer for layer in layers if layer]
+
+
+def fig7_ensemble_template(length, steps=FIG7_TROTTER_STEPS, layering="serial"):
+    """
+    Fig. 7 的 Trotter 无序系综模板 (默认 10 步).
+    除 γ 外，每个门的噪声注入倍率也是 Parameter: δJ[k]、δg[k] (k = 步 × (L-1) + 键序号)，
+    J = J0 (1 + δJ)，γ' = γ (1 + δg). 只编译一次，每个无序实现只是一组参数绑定.
+    layering 只改变同一步内键的先后 (见 trotter_layers)，参数编号与之无关，同一组无序抽样通用.
+    """
+    from qiskit import QuantumCircuit
+    from qiskit.circuit import Parameter, ParameterVector
+
+    gamma = Parameter("γ")
+    n_bonds = steps * (length - 1)
+    dj = ParameterVector("δJ", n_bonds)
+    dg = ParameterVector("δg", n_bonds)
+    qc = QuantumCircuit(length)
+    _chaos_source(qc)
+
+    layers = trotter_layers(length, layering)
+    for step in range(steps):
+        for layer in layers:
+            for i in layer:
+                k = step * (length - 1) + i
+                # Ising 相互作用 (噪声注入: 模拟控制不精准)
+                qc.cx(i, i+1)
+                qc.rz(FIG7_COUPLING * (1 + dj[k]), i+1)
+                qc.cx(i, i+1)
+
+                # 沉积冷却项 (关键比例 1 : 0.5)
+                g_val = gamma * (1 + dg[k])
+                qc.rz(g_val * np.pi, i+1)
+                qc.rx(0.5 * g_val * np.pi, i+1)
+
+    # 测量视界及其邻居 (Q17, Q18, Q19) - 对应最后三个比特
+    qc.measure_all()
+    return qc
+
+
+def fig7_disorder(length, noise_levels, realizations, seed=None, steps=FIG7_TROTTER_STEPS):
+    """
+    一次抽出全部无序实现，形状 (n_noise, realizations, 2, n_bonds)；[..., 0, :] 是 δJ，[..., 1, :] 是 δg.
+    各噪声级共用同一组 U(-1, 1) 基础随机数、只按幅度缩放，噪声级之间的差别不混入抽样涨落.
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(-1.0, 1.0, size=(realizations, 2, steps * (length - 1)))
+    return np.asarray(noise_levels, dtype=float)[:, None, None, None] * base
+
+
+def fig7_template(length, noise_injection=0.0, seed=None):
+    """
+    单个噪声实现的 Fig. 7 模板 (γ 仍为 Parameter)，整条 γ 扫描共用同一个实现.
+    """
+    template = fig7_ensemble_template(length)
+    disorder = fig7_disorder(length, [noise_injection], 1, seed)[0, 0]
+    bindings = {p: disorder[0 if p.vector.name == "δJ" else 1, p.index]
+                for p in template.parameters if p.name != "γ"}
+    return template.assign_parameters(bindings)
+
+
+def create_fig7_circuit(gamma, noise_injection=0.0, length=20):
+    return fig7_template(length, noise_injection).assign_parameters([gamma])
+
+
+# ==========================================
+# 🛠️ PUB 组装
+# ==========================================
+def sweep_pub(transpiled, gammas, shots=None):
+    """把整条 γ 扫描打包成一个 SamplerV2 PUB: (circuit, values[, shots])"""
+    values = np.asarray(gammas, dtype=float).reshape(-1, transpiled.num_parameters)
+    if shots is None:
+        return (transpiled, values)
+    return (transpiled, values, shots)
+
+
+def fig7_ensemble_pub(transpiled, gammas, disorder, shots=None):
+    """
+    (噪声级, γ, 无序实现) 全部打包成一个 PUB，参数数组形状 (n_noise, n_γ, R, n_params).
+    列按 transpiled.parameters 的顺序逐个对应，与编译器如何排列参数无关.
+    """
+    n_noise, realizations, _, n_bonds = disorder.shape
+    gammas = np.asarray(gammas, dtype=float)
+    shape = (n_noise, len(gammas), realizations)
+    full = np.concatenate([np.broadcast_to(gammas[None, :, None, None], shape + (1,)),
+                           np.broadcast_to(disorder.reshape(n_noise, 1, realizations, 2 * n_bonds),
+                                           shape + (2 * n_bonds,))], axis=-1)
+    column = {"γ": 0}
+    for v, name in enumerate(("δJ", "δg")):
+        column.update({f"{name}[{k}]": 1 + v * n_bonds + k for k in range(n_bonds)})
+    values = full[..., [column[p.name] for p in transpiled.parameters]]
+    if shots is None:
+        return (transpiled, values)
+    return (transpiled, values, shots)
+
+
+def fig7_ensemble_points(length, noise_levels, gammas, realizations):
+    """与 fig7_ensemble_pub 展平顺序一致的扫描点元数据"""
+    return [{"L": length, "gamma": g, "noise": nl, "realization": r}
+            for nl in noise_levels for g in gammas for r in range(realizations)]
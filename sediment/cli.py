@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+
+from sediment.execution import DEFAULT_MAX_EXECUTIONS, DEFAULT_MODE, MODES
+from sediment.spec import (VIEW_FILENAMES, build_batch, compile_spec, grid_view, job_metadata, legacy_view,
+                           load_specs, spec_grid, spec_points)
+from sediment.readout import CALIBRATION_FILE
+from sediment.store import ResultStore, fetch_result
+
+# ==========================================
+# 🧭 统一入口: python -m sediment <命令> <spec ...>
+#    show     打印展开后的 spec
+#    compile  编译 (结果进 TranspileCache)，打印深度 / 两比特门数
+#    submit   编译 + 合并成一个逻辑任务提交 (--wait 等待并分析)；
+#             过大时分块，各块放进同一个 Batch / Session (--mode)
+#    fetch    拉取任务并落盘 (旧任务用 --spec 重建扫描点标签)
+#    analyze  按档案里的 spec 重建网格，导出 JSON
+#    编译 / 提交才用得到的模块 (qiskit、runtime、缓存、含噪模拟) 在命令内部导入，
+#    show / fetch / analyze 只读本地档案，启动不付这部分时间
+# ==========================================
+
+MPS_BOND_DIM = 64
+HISTORY_FILENAME = "sediment_job_history.txt"
+
+
+def _offline(args):
+    return args.offline or os.environ.get("SEDIMENT_OFFLINE", "0") == "1"
+
+
+def _specs(sources):
+    specs = [spec for source in sources for spec in load_specs(source)]
+    names = [spec["name"] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"同一次提交里的实验名必须互不相同: {names}")
+    return specs
+
+
+def _connect(specs):
+    from qiskit_ibm_runtime import QiskitRuntimeService
+    backends = {spec["backend"] for spec in specs}
+    if len(backends) != 1:
+        raise ValueError(f"合并提交的实验必须使用同一后端，收到 {sorted(backends)}")
+    service = QiskitRuntimeService()
+    return service, service.backend(backends.pop())
+
+
+def cmd_show(args):
+    print(json.dumps(_specs(args.specs), indent=2, ensure_ascii=False))
+
+
+def cmd_compile(args):
+    from sediment.cache import TranspileCache
+    from sediment.layout import circuit_layout
+
+    specs = _specs(args.specs)
+    backend = None if _offline(args) else _connect(specs)[1]
+    cache = TranspileCache()
+    for spec in specs:
+        for L, circuit in zip(spec["lengths"], compile_spec(spec, backend, cache=cache, max_workers=args.workers)):
+            ops = circuit.count_ops()
+            two_q = sum(n for name, n in ops.items() if name in ("cx", "cz", "ecr"))
+            print(f"   [{spec['name']}] L={L:<3} depth={circuit.depth():<5} 2q={two_q:<5} params={circuit.num_parameters}")
+            if backend is not None:
+                print(f"      chain: {circuit_layout(circuit)}")
+
+
+def analyze_job(job_id, store=None, out_dir="."):
+    """按档案里记录的 spec 逐个实验重建网格并导出 JSON，返回 {实验名: 网格}"""
+    store = store or ResultStore()
+    archive = store.archive(job_id)
+    specs = archive.metadata.get("specs")
+    if not specs:
+        raise ValueError(f"任务 {job_id} 的档案里没有 spec (旧任务请先 fetch --spec)")
+    grids = {}
+    for spec in specs:
+        grid = spec_grid(archive, spec["name"])
+        grids[spec["name"]] = grid
+        filename = os.path.join(out_dir, f"{spec['name']}_{job_id}.json")
+        with open(filename, "w") as f:
+            json.dump(grid_view(grid, job_id, spec), f, indent=2)
+        print(f"💾 [{spec['name']}] 网格 {tuple(len(v) for v in grid['axes'].values())} -> {filename}")
+        if spec["view"]:
+            filename = os.path.join(out_dir, VIEW_FILENAMES[spec["view"]])
+            with open(filename, "w") as f:
+                json.dump(legacy_view(grid, job_id, spec, archive.metadata.get("backend")), f, indent=4)
+            print(f"💾 [{spec['name']}] {spec['view']} 视图 -> {filename}")
+    return grids
+
+
+def analyze_submitted(results, job_id):
+    """作业管理器的分析回调 (模块级，续跑时可按路径导入)，输出目录取自提交时记进档案的 out_dir"""
+    store = ResultStore()
+    analyze_job(job_id, store, store.archive(job_id).metadata.get("out_dir", "."))
+
+
+def cmd_submit(args):
+    from sediment.cache import TranspileCache
+    from sediment.execution import execution_mode
+    from sediment.jobs import JobManager
+    from sediment.layout import circuit_layout
+    from sediment.noisy import DEFAULT_TRAJECTORIES, load_calibration
+
+    specs = _specs(args.specs)
+    offline = _offline(args)
+    if offline:
+        service, backend = None, None
+        label = f"mps_simulator(χ={MPS_BOND_DIM})"
+        if args.noise:
+            calibration = load_calibration(args.noise)
+            label = f"noisy_mps(χ={MPS_BOND_DIM}, {calibration['backend']})"
+    else:
+        service, backend = _connect(specs)
+        label = backend.name
+
+    cache = TranspileCache()
+    circuits = [compile_spec(spec, backend, cache=cache, max_workers=args.workers) for spec in specs]
+    pubs, points = build_batch(specs, circuits)
+    # 实际使用的物理比特链随任务记进档案 (figS1 据此画真实映射)
+    layouts = {} if offline else {spec["name"]: [circuit_layout(c) for c in cs] for spec, cs in zip(specs, circuits)}
+    name = "+".join(spec["name"] for spec in specs)
+    print(f"🛫 [{name}] {len(pubs)} PUBs / {len(points)} 扫描点 -> {label}")
+
+    manager = JobManager(service=service)
+    manager.register_analysis("spec", analyze_submitted)
+
+    async def campaign(sampler):
+        job_id = await manager.submit(name, sampler, pubs, points=points, analysis="spec",
+                                      metadata=job_metadata(specs, label, offline=offline, mode=args.mode,
+                                                            layouts=layouts, out_dir=os.path.abspath(args.out_dir)),
+                                      max_executions=args.max_executions)
+        with open(HISTORY_FILENAME, "a") as f:
+            f.write(f"{datetime.datetime.now()} | {label} | ID: {job_id} | {name}\n")
+        # 离线任务只活在本进程里，必须当场等待
+        if args.wait or offline:
+            await manager.wait([job_id])
+        return job_id
+
+    # 离线 MPS 没有排队，执行模式只对真机有意义
+    with contextlib.nullcontext() if offline else execution_mode(args.mode, backend) as mode:
+        if offline:
+            from sediment.mps import MPSSampler
+            sampler = MPSSampler(max_bond=MPS_BOND_DIM)
+            if args.noise:
+                from sediment.noisy import NoisyMPSSampler
+                sampler = NoisyMPSSampler(calibration, trajectories=args.trajectories or DEFAULT_TRAJECTORIES,
+                                          max_workers=args.workers,
+                                          max_bond=MPS_BOND_DIM)
+        else:
+            from qiskit_ibm_runtime import SamplerV2 as Sampler
+            sampler = Sampler(mode=mode)
+            # DD 是整个 job 的选项: 任一实验要求即开启
+            sampler.options.dynamical_decoupling.enable = any(s["mitigation"]["dynamical_decoupling"] for s in specs)
+        job_id = asyncio.run(campaign(sampler))
+    print(f"✅ Job ID: {job_id}")
+    return job_id
+
+
+def cmd_fetch(args):
+    store = ResultStore()
+    points = None
+    if args.spec:
+        specs = _specs(args.spec)
+        points = [p for spec in specs for p in spec_points(spec)]
+        if args.job_id in store:
+            # 本地已有 (例如重画脚本先前不带标签拉过)，fetch_result 不会再写扫描点，在这里补标签
+            stored = store.archive(args.job_id).points
+            if len(points) != len(stored):
+                raise ValueError(f"--spec 给出 {len(points)} 个扫描点，任务 {args.job_id} 的档案里有 "
+                                 f"{len(stored)} 个: spec 与该任务不符")
+            if any("L" in row or "gamma" in row for row in stored):
+                if any(row.get(k) != p.get(k) for row, p in zip(stored, points) for k in ("L", "gamma")):
+                    raise ValueError(f"任务 {args.job_id} 的档案里已有不同的扫描点标签: spec 与该任务不符")
+            else:
+                store.update_points(args.job_id, points)
+                # 按旧标签算出的读出校准缓存作废
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(store.path(args.job_id), CALIBRATION_FILE))
+                print(f"🏷️ 已为 {args.job_id} 补写 {len(points)} 个扫描点标签")
+    fetch_result(args.job_id, store=store, points=points)
+    if args.spec and not store.archive(args.job_id).metadata.get("specs"):
+        # 旧任务补记 spec，之后可直接 analyze
+        store.update_metadata(args.job_id, specs=specs)
+    print(f"📦 {args.job_id} 已在本地结果仓库: {store.path(args.job_id)}")
+
+
+def cmd_analyze(args):
+    analyze_job(args.job_id, out_dir=args.out_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sediment", description="Project Sediment 实验入口")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name, func, help_text in [("show", cmd_show, "打印展开后的 spec"),
+                                  ("compile", cmd_compile, "编译并缓存"),
+                                  ("submit", cmd_submit, "合并提交 (一个 job)")]:
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("specs", nargs="+", help="实验名 (见 sediment.spec.EXPERIMENTS) 或 spec JSON 文件")
+        p.add_argument("--offline", action="store_true", help="本地 MPS 模拟 (同 SEDIMENT_OFFLINE=1)")
+        p.add_argument("--workers", type=int, default=None, help="并行编译进程数")
+        p.set_defaults(func=func)
+    sub.choices["submit"].add_argument("--wait", action="store_true", help="等待完成并分析")
+    sub.choices["submit"].add_argument("--out-dir", default=".", help="分析结果输出目录")
+    sub.choices["submit"].add_argument("--mode", choices=MODES, default=DEFAULT_MODE,
+                                       help="job: 各块独立排队；batch / session: 同组只排一次队")
+    sub.choices["submit"].add_argument("--max-executions", type=int, default=DEFAULT_MAX_EXECUTIONS,
+                                       help="每个 runtime job 的执行次数 (绑定数 x shots) 上限，超出即分块")
+    sub.choices["submit"].add_argument("--noise", default=None, metavar="CALIBRATION_JSON",
+                                       help="离线时用含噪轨迹模拟 (校准快照见 python -m sediment.noisy)")
+    sub.choices["submit"].add_argument("--trajectories", type=int, default=None,
+                                       help="含噪模拟每个扫描点的轨迹数 (默认 sediment.noisy.DEFAULT_TRAJECTORIES)")
+
+    p = sub.add_parser("fetch", help="拉取任务并落盘")
+    p.add_argument("job_id")
+    p.add_argument("--spec", nargs="+", help="旧任务: 用这些 spec 重建扫描点标签")
+    p.set_defaults(func=cmd_fetch)
+
+    p = sub.add_parser("analyze", help="按 spec 重建网格并导出 JSON")
+    p.add_argument("job_id")
+    p.add_argument("--out-dir", default=".")
+    p.set_defaults(func=cmd_analyze)
+
+    args = parser.parse_args(argv)
+    if args.command == "submit":
+        # 含噪轨迹模拟只在离线时使用，真机提交时这两个参数会被悄悄忽略
+        if args.noise and not _offline(args):
+            sub.choices["submit"].error("--noise 只用于离线含噪模拟，请同时给出 --offline (或 SEDIMENT_OFFLINE=1)")
+        if args.trajectories is not None and not args.noise:
+            sub.choices["submit"].error("--trajectories 只对 --noise 含噪模拟有效")
+    return args.func(args)
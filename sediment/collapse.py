@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sediment.bootstrap import bootstrap_p1
+
+# ==========================================
+# 🧩 有限尺寸标度数据塌缩 (FSS Data Collapse)
+#    x = (γ - γ_c) L^{1/ν},  y = m L^{β/ν},  m = 1 - 2 P(1)
+#    代价函数: 每条曲线的点插值到其它曲线上比较 (只算重叠区间)，
+#    对整个参数网格一次向量化计算；再从最好的若干网格点并行做局部优化.
+#    搜索在 (γ_c, 1/ν, β) 上进行: ν 的大值区间被压到 1/ν → 0 附近，
+#    数据偏好 ν → ∞ 时拟合会贴到 1/ν 下界，并在结果里被标记出来，而不是卡在某个 ν 上限
+# ==========================================
+
+DEFAULT_BOUNDS = ((0.15, 0.35), (0.05, 3.5), (0.0, 1.0))   # (γ_c, 1/ν, β)，即 ν ∈ [0.29, 20]
+NAMES = ("gamma_c", "nu", "beta")
+BOUND_TOL = 1e-3   # 距边界不足 (上限 - 下限) 的这个比例即视为贴边
+DEFAULT_GRID = (25, 25, 25)
+DEFAULT_CHUNK_BYTES = 64 * 1024 ** 2
+_BAD_COST = 1e12
+
+
+def load_curves(fss_data, default_shots=8192):
+    """
+    fss_scaling_data.json -> 曲线列表 [{"L", "gamma", "p1", "shots"}]，按 γ 升序.
+    旧文件没有 shots 字段时用 default_shots.
+    """
+    curves = []
+    for key, raw in fss_data["raw"].items():
+        gammas = np.asarray(raw["cfs"], dtype=float)
+        order = np.argsort(gammas)
+        shots = np.broadcast_to(np.asarray(raw.get("shots", default_shots)), gammas.shape)
+        curves.append({
+            "L": int(key.lstrip("L")),
+            "gamma": gammas[order],
+            "p1": np.asarray(raw["probs"], dtype=float)[order],
+            "shots": np.asarray(shots, dtype=float)[order],
+        })
+    return sorted(curves, key=lambda c: c["L"])
+
+
+def rescale(curve, gamma_c, nu, beta, p1=None):
+    """单条曲线的塌缩坐标 (x, y)"""
+    p1 = curve["p1"] if p1 is None else p1
+    return (curve["gamma"] - gamma_c) * curve["L"] ** (1 / nu), (1 - 2 * p1) * curve["L"] ** (beta / nu)
+
+
+def collapse_cost(curves, gamma_c, nu, beta, p1=None, min_overlap=0.3, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    塌缩质量 (越小越好): 重叠区间内 Σ (y_i - y_j)² / (σ_i² + σ_j²) / 点对数，即约化 χ².
+    γ_c / ν / β 可以是任意形状 (可广播) 的数组，返回同形状的代价.
+    曲线 j 在 x_i 处的值等价于在 γ' = γ_c + (γ_i - γ_c)(L_i/L_j)^{1/ν} 处插值实测曲线，
+    所以插值始终在固定的实测 γ 网格上做，np.interp 对整个参数网格一次完成.
+    p1: 可选，替换各曲线的 P(1) (bootstrap 用)，列表与 curves 对齐.
+    min_overlap: 重叠点对至少占全部可能点对的比例，否则视为无效 (防止 ν→0 时只剩几个点的假塌缩).
+    """
+    gamma_c, nu, beta = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (gamma_c, nu, beta)))
+    shape = gamma_c.shape
+    gc, inv_nu, bn = gamma_c.ravel(), 1 / nu.ravel(), beta.ravel() / nu.ravel()
+
+    probs = [c["p1"] for c in curves] if p1 is None else p1
+    m = [1 - 2 * p for p in probs]
+    sigma = [2 * np.sqrt(np.clip(p * (1 - p), 1e-6, None) / c["shots"]) for p, c in zip(probs, curves)]
+    lengths = np.array([c["L"] for c in curves], dtype=float)
+    max_pairs = sum(len(c["gamma"]) for c in curves) * (len(curves) - 1)
+
+    cost = np.empty(gc.size)
+    per_param = 10 * max(len(c["gamma"]) for c in curves) * 8
+    step = max(1, int(chunk_bytes // per_param))
+    for start in range(0, gc.size, step):
+        sl = slice(start, start + step)
+        g0 = gc[sl, None]
+        total = np.zeros(len(g0))
+        count = np.zeros(len(g0))
+        # χ² 对整体缩放不变，除以 L_j^{β/ν} 后每对曲线只剩两列: (L_i/L_j)^{1/ν} 与 (L_i/L_j)^{β/ν}
+        log_l = np.log(lengths)
+        for j, target in enumerate(curves):
+            grid = target["gamma"]
+            for i, source in enumerate(curves):
+                if i == j:
+                    continue
+                log_ratio = log_l[i] - log_l[j]
+                ratio = np.exp(log_ratio * inv_nu[sl, None])
+                scale = np.exp(log_ratio * bn[sl, None])
+                g_prime = g0 + (source["gamma"][None, :] - g0) * ratio
+                inside = (g_prime >= grid[0]) & (g_prime <= grid[-1])
+                diff = m[i] * scale - np.interp(g_prime, grid, m[j])
+                var = (sigma[i] * scale) ** 2 + np.interp(g_prime, grid, sigma[j]) ** 2
+                total += np.sum(inside * (diff * diff / var), axis=1)
+                count += inside.sum(axis=1)
+        cost[sl] = np.where(count >= min_overlap * max_pairs, total / np.maximum(count, 1), _BAD_COST)
+    return cost.reshape(shape)
+
+
+def grid_search(curves, bounds=DEFAULT_BOUNDS, grid=DEFAULT_GRID, p1=None):
+    """在 (γ_c, 1/ν, β) 网格上一次算完代价，返回 (axes, cost[Gc, G1/ν, Gβ])"""
+    axes = [np.linspace(lo, hi, n) for (lo, hi), n in zip(bounds, grid)]
+    gamma_c, inv_nu, beta = np.meshgrid(*axes, indexing="ij")
+    return axes, collapse_cost(curves, gamma_c, 1 / inv_nu, beta, p1=p1)
+
+
+def _local_fit(args):
+    """x0 与返回值都是 (γ_c, ν, β)；优化本身在 (γ_c, 1/ν, β) 上做"""
+    from scipy.optimize import minimize
+
+    curves, x0, bounds, p1 = args
+    v0 = np.clip([x0[0], 1 / x0[1], x0[2]], [lo for lo, _ in bounds], [hi for _, hi in bounds])
+    res = minimize(lambda v: float(collapse_cost(curves, v[0], 1 / v[1], v[2], p1=p1)), v0,
+                   method="Nelder-Mead", bounds=bounds, options={"xatol": 1e-5, "fatol": 1e-8, "maxiter": 2000})
+    return np.array([res.x[0], 1 / res.x[1], res.x[2]]), float(res.fun)
+
+
+def at_bound(params, bounds=DEFAULT_BOUNDS, tol=BOUND_TOL):
+    """
+    (..., 3) 的 (γ_c, ν, β) -> (..., 3) 布尔数组: 该参数是否贴在搜索边界上 (ν 按 1/ν 的边界判断).
+    贴边的参数不是真正的极小值，其 bootstrap 置信区间也会被边界截断.
+    """
+    params = np.asarray(params, dtype=float)
+    v = np.stack([params[..., 0], 1 / params[..., 1], params[..., 2]], axis=-1)
+    lo, hi = np.array(bounds, dtype=float).T
+    margin = tol * (hi - lo)
+    return (v <= lo + margin) | (v >= hi - margin)
+
+
+def replicates_at_bound(reps, bounds=DEFAULT_BOUNDS, tol=BOUND_TOL):
+    """bootstrap replicate 中各参数贴边的比例 {名字: 比例}"""
+    return {name: float(frac) for name, frac in zip(NAMES, at_bound(reps, bounds, tol).mean(axis=0))}
+
+
+def _map(func, jobs, max_workers):
+    """与 transpile_sweep 一致: 单进程时串行，否则用 spawn 进程池 (fork 与 qiskit 线程池冲突)"""
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [func(job) for job in jobs]
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(func, jobs))
+
+
+def fit_collapse(curves, bounds=DEFAULT_BOUNDS, grid=DEFAULT_GRID, starts=8, max_workers=None):
+    """
+    网格粗搜 -> 代价最低的 starts 个网格点作为起点 -> 并行 Nelder-Mead.
+    bounds 按 (γ_c, 1/ν, β) 给出. 返回 {"gamma_c", "nu", "beta", "cost", "at_bound", "grid": (axes, cost)}，
+    at_bound 列出最优解贴在搜索边界上的参数名 (空列表 = 内部极小).
+    """
+    axes, cost = grid_search(curves, bounds, grid)
+    best = np.argsort(cost, axis=None)[:starts]
+    x0s = [np.array([axes[k][i] for k, i in enumerate(np.unravel_index(flat, cost.shape))]) for flat in best]
+    x0s = [np.array([x0[0], 1 / x0[1], x0[2]]) for x0 in x0s]
+    fits = _map(_local_fit, [(curves, x0, bounds, None) for x0 in x0s], max_workers)
+    x, fun = min(fits, key=lambda fit: fit[1])
+    flags = [name for name, flag in zip(NAMES, at_bound(x, bounds)) if flag]
+    return {"gamma_c": float(x[0]), "nu": float(x[1]), "beta": float(x[2]), "cost": fun, "at_bound": flags,
+            "grid": (axes, cost)}
+
+
+def _refit_replicates(args):
+    curves, p1_reps, x0, bounds = args
+    return np.array([_local_fit((curves, x0, bounds, list(p1)))[0] for p1 in p1_reps])
+
+
+def bootstrap_collapse(curves, best, replicates=200, bounds=DEFAULT_BOUNDS, seed=None, max_workers=None):
+    """
+    对每条曲线做二项 bootstrap，从最优解出发重新局部拟合.
+    返回 (replicates, 3) 的 (γ_c, ν, β) 数组；replicate 分块交给进程池.
+    贴边的 replicate 用 replicates_at_bound 检查 (比例高时置信区间是被边界截出来的).
+    """
+    rng = np.random.default_rng(seed)
+    draws = [bootstrap_p1(np.round(c["p1"] * c["shots"]).astype(np.int64), c["shots"].astype(np.int64),
+                          replicates, rng) for c in curves]
+    p1_reps = [[d[r] for d in draws] for r in range(replicates)]
+    x0 = np.array([best["gamma_c"], best["nu"], best["beta"]])
+    workers = max(1, min(max_workers or os.cpu_count() or 1, replicates))
+    blocks = [p1_reps[k::workers] for k in range(workers)]
+    parts = _map(_refit_replicates, [(curves, block, x0, bounds) for block in blocks if block], workers)
+    return np.concatenate(parts, axis=0)
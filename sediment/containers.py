@@ -0,0 +1,98 @@
+import numpy as np
+
+# ==========================================
+# 🪶 轻量结果容器 (Lightweight Result Containers)
+#    从本地档案重画图时不需要 qiskit: 这里的类只实现分析代码实际用到的只读接口
+#    (BitArray 的 array / num_bits / num_shots / shape，DataBin 的寄存器属性与 keys()，
+#    PrimitiveResult 的下标与迭代)，sediment.marginals 等模块对两者一视同仁.
+#    需要真正的 qiskit 对象时调用 to_qiskit()
+# ==========================================
+
+
+class PackedBits:
+    """与 BitArray 相同的打包格式: array (..., shots, 字节数)，大端字节、字节内小端"""
+
+    def __init__(self, array, num_bits):
+        self.array = array
+        self.num_bits = num_bits
+
+    @property
+    def shape(self):
+        return self.array.shape[:-2]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=int))
+
+    @property
+    def num_shots(self):
+        return self.array.shape[-2]
+
+    def __getitem__(self, index):
+        index = index if isinstance(index, tuple) else (index,)
+        if len(index) > self.ndim:
+            raise IndexError(f"只能索引扫描维度 (共 {self.ndim} 维)")
+        return PackedBits(self.array[index], self.num_bits)
+
+    def __repr__(self):
+        return f"PackedBits(<shape={self.shape}, num_shots={self.num_shots}, num_bits={self.num_bits}>)"
+
+    def to_qiskit(self):
+        from qiskit.primitives import BitArray
+        return BitArray(np.ascontiguousarray(self.array), self.num_bits)
+
+
+class LocalDataBin:
+    """按寄存器名存放 PackedBits，data.meas / data["meas"] / data.keys() 均可"""
+
+    def __init__(self, shape=(), **registers):
+        self.shape = tuple(shape)
+        self._registers = registers
+        for name, bits in registers.items():
+            setattr(self, name, bits)
+
+    def __getitem__(self, name):
+        return self._registers[name]
+
+    def keys(self):
+        return self._registers.keys()
+
+    def values(self):
+        return self._registers.values()
+
+    def items(self):
+        return self._registers.items()
+
+
+class LocalPubResult:
+    def __init__(self, data, metadata=None):
+        self.data = data
+        self.metadata = metadata or {}
+
+
+class LocalResult:
+    """PUB 结果列表 + 任务元数据，行为与 PrimitiveResult 一致 (下标、迭代、len)"""
+
+    def __init__(self, pub_results, metadata=None):
+        self._pub_results = list(pub_results)
+        self.metadata = metadata or {}
+
+    def __getitem__(self, index):
+        return self._pub_results[index]
+
+    def __iter__(self):
+        return iter(self._pub_results)
+
+    def __len__(self):
+        return len(self._pub_results)
+
+    def to_qiskit(self):
+        from qiskit.primitives import DataBin, PrimitiveResult, SamplerPubResult
+        pubs = [SamplerPubResult(DataBin(**{name: bits.to_qiskit() for name, bits in pub.data.items()},
+                                         shape=pub.data.shape), metadata=pub.metadata)
+                for pub in self._pub_results]
+        return PrimitiveResult(pubs, metadata=self.metadata)
@@ -0,0 +1,166 @@
+import itertools
+import threading
+import time
+
+import numpy as np
+
+from sediment.mps import DEFAULT_BOND_DIM, MPSSampler
+
+# ==========================================
+# 🧪 本地假 Runtime 服务 (Fake Runtime Service)
+#    模拟排队延迟的 QiskitRuntimeService / SamplerV2 / Batch / Session 替身，
+#    结果由 MPS 模拟器给出，用来离线验证作业管理流程
+# ==========================================
+
+
+class FakeRuntimeService:
+    """
+    接口对齐 QiskitRuntimeService 中用到的部分: backend(name)、job(job_id).
+    设备串行执行: 独立任务在设备空闲后还要再排 queue_delay + U(0, jitter) 秒 (其他用户的任务)，
+    之后运行 run_time 秒；同一 Batch / Session 里只有第一个任务排队，其余紧接着运行.
+    """
+
+    def __init__(self, queue_delay=1.0, jitter=0.0, run_time=0.2, max_bond=DEFAULT_BOND_DIM, seed=None):
+        self.queue_delay = queue_delay
+        self.jitter = jitter
+        self.run_time = run_time
+        self.max_bond = max_bond
+        self._rng = np.random.default_rng(seed)
+        self._seed = seed
+        self._jobs = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._device_free = time.monotonic()
+        self._sessions = {}
+
+    def backend(self, name="fake_torino"):
+        return FakeRuntimeBackend(name, self)
+
+    def job(self, job_id):
+        if job_id not in self._jobs:
+            raise KeyError(f"Job {job_id} not found")
+        return self._jobs[job_id]
+
+    def _submit(self, backend, pubs, shots, session_id=None):
+        with self._lock:
+            job_id = f"fake-{next(self._ids):04d}"
+            now = time.monotonic()
+            if self._sessions.get(session_id) is not None:
+                start = max(now, self._device_free)
+            else:
+                start = max(now, self._device_free) + self.queue_delay + self.jitter * self._rng.random()
+                if session_id is not None:
+                    self._sessions[session_id] = start
+            self._device_free = start + self.run_time
+            seed = None if self._seed is None else self._seed + len(self._jobs)
+            job = FakeRuntimeJob(job_id, backend, pubs, shots, start, self.run_time,
+                                 MPSSampler(max_bond=self.max_bond, default_shots=shots, seed=seed),
+                                 session_id=session_id)
+            self._jobs[job_id] = job
+        return job
+
+    def _open_session(self):
+        with self._lock:
+            session_id = f"fake-session-{len(self._sessions):03d}"
+            self._sessions[session_id] = None
+        return session_id
+
+
+class FakeRuntimeBackend:
+    def __init__(self, name, service):
+        self.name = name
+        self.service = service
+
+    def __repr__(self):
+        return f"<FakeRuntimeBackend('{self.name}')>"
+
+
+class FakeRuntimeJob:
+    def __init__(self, job_id, backend, pubs, shots, start_at, run_time, sampler, session_id=None):
+        self._job_id = job_id
+        self._backend = backend
+        self._pubs = pubs
+        self._shots = shots
+        self._start_at = start_at
+        self._done_at = start_at + run_time
+        self._sampler = sampler
+        self._result = None
+        self.session_id = session_id
+
+    def job_id(self):
+        return self._job_id
+
+    def backend(self):
+        return self._backend
+
+    def status(self):
+        now = time.monotonic()
+        if now < self._start_at:
+            return "QUEUED"
+        if now < self._done_at:
+            return "RUNNING"
+        return "DONE"
+
+    def done(self):
+        return self.status() == "DONE"
+
+    def result(self):
+        """与真实任务一样阻塞到完成"""
+        wait = self._done_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        if self._result is None:
+            self._result = self._sampler.run(self._pubs, shots=self._shots).result()
+        return self._result
+
+
+class FakeSession:
+    """
+    Session 的替身 (可作上下文管理器). 第一个任务排队，之后的任务在设备上紧接着运行.
+    真实 Batch 允许任务的经典部分并行，但设备上同样是串行的，这里两者不作区分.
+    """
+
+    def __init__(self, backend, max_time=None):
+        self._backend = backend
+        self.max_time = max_time
+        self.session_id = backend.service._open_session()
+        self.closed = False
+
+    def backend(self):
+        return self._backend.name
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeBatch(FakeSession):
+    pass
+
+
+class FakeSampler:
+    """SamplerV2(mode=...) 的替身；mode 为 FakeRuntimeBackend 或 FakeBatch / FakeSession"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.backend = mode._backend if isinstance(mode, FakeSession) else mode
+        self.options = _Options()
+
+    def run(self, pubs, *, shots=None):
+        shots = shots or self.options.default_shots
+        session_id = None
+        if isinstance(self.mode, FakeSession):
+            if self.mode.closed:
+                raise RuntimeError(f"{self.mode.session_id} 已关闭，不再接受新任务")
+            session_id = self.mode.session_id
+        return self.backend.service._submit(self.backend, list(pubs), shots, session_id=session_id)
+
+
+class _Options:
+    def __init__(self):
+        self.default_shots = 4096
@@ -0,0 +1,327 @@
+import asyncio
+import datetime
+import importlib
+import importlib.util
+import json
+import os
+import sys
+
+from sediment.execution import chunk_pubs, default_shots, merge_chunks, plan_chunks
+from sediment.store import ResultStore
+
+# ==========================================
+# 🛰️ 异步作业管理 (Async Job Manager)
+#    一次提交多个实验矩阵，并发轮询 (指数退避)，
+#    在途任务表落盘 (重启后可续)，任务完成即落盘 shots 并触发对应分析.
+#    过大的提交可切成多个 runtime job (见 sediment.execution)，在表里仍是一个逻辑任务
+# ==========================================
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "sediment", "jobs.json")
+TERMINAL_STATES = {"DONE", "ERROR", "CANCELLED", "LOST"}
+# 本地 PrimitiveJob 没有排队，短间隔轮询 (退避上限也低)，不给离线运行平添秒级等待
+LOCAL_POLL_INTERVAL = 0.05
+LOCAL_MAX_INTERVAL = 1.0
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 本仓库各入口注册的分析名 -> 可导入路径，兜底任务表里还没有 analysis_path 的旧条目
+KNOWN_ANALYSES = {
+    "spec": "sediment.cli:analyze_submitted",
+    "fss": os.path.join(ROOT, "exp_fig5_finite_size_scaling.py") + ":analyze_and_plot",
+    "fss_twirled": os.path.join(ROOT, "exp_fig5_finite_size_scaling.py") + ":analyze_twirled",
+    "preliminary": os.path.join(ROOT, "exp_preliminary_sedimentation.py") + ":analyze_job_result",
+}
+
+
+def _status_name(status):
+    """runtime 返回字符串，本地 PrimitiveJob 返回 JobStatus 枚举，统一成大写字符串"""
+    return str(getattr(status, "name", status)).upper()
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def analysis_path(func):
+    """模块级函数 -> 可导入的 "模块:函数" (脚本里定义的函数用脚本的绝对路径)；lambda / 闭包返回 None"""
+    name = getattr(func, "__qualname__", "")
+    if "<" in name or "." in name:
+        return None
+    module = sys.modules.get(func.__module__)
+    if func.__module__ == "__main__" or func.__module__.startswith("_sediment_analysis_"):
+        path = getattr(module, "__file__", None)
+        return f"{os.path.abspath(path)}:{name}" if path else None
+    return f"{func.__module__}:{name}"
+
+
+def load_analysis(path):
+    """analysis_path 的逆操作; 脚本按文件导入 (__name__ 不是 "__main__"，不会重跑实验)"""
+    module_name, _, name = path.rpartition(":")
+    if module_name.endswith(".py"):
+        # 和直接运行脚本一样，让脚本所在目录可导入
+        sys.path.insert(0, os.path.dirname(module_name))
+        spec = importlib.util.spec_from_file_location(
+            "_sediment_analysis_" + os.path.splitext(os.path.basename(module_name))[0], module_name)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, name)
+
+
+def _group_status(statuses):
+    """分块任务的总状态: 任一块失败即失败，全部 DONE 才 DONE"""
+    for bad in ("ERROR", "CANCELLED", "LOST"):
+        if bad in statuses:
+            return bad
+    if all(status == "DONE" for status in statuses):
+        return "DONE"
+    if any(status in ("RUNNING", "DONE") for status in statuses):
+        return "RUNNING"
+    return statuses[0]
+
+
+class JobManager:
+    """
+    在途任务表 (JSON) 结构: {job_id: {name, backend, status, submitted, updated,
+                                       points, metadata, analysis, analysis_path, analyzed, local, session}}
+    analysis 存注册名，真正的函数由 register_analysis(name, func) 提供，func(results, job_id)；
+    模块级函数另存 analysis_path ("模块:函数")，重启续跑时没注册也能按路径导入.
+    分块提交的任务另有 chunks (各块 runtime job ID)、plan 与 shapes (拼回结果用)，
+    逻辑 job_id 取第一块的 ID.
+    """
+
+    def __init__(self, service=None, table_path=None, store=None,
+                 poll_interval=5.0, max_interval=300.0, backoff=2.0):
+        self.service = service
+        self.table_path = table_path or os.environ.get("SEDIMENT_JOB_TABLE", DEFAULT_TABLE_PATH)
+        self.store = store or ResultStore()
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.table = self._load()
+        self._handles = {}
+        self._analyses = {}
+        self._paths = {}
+
+    # ---------- 任务表持久化 ----------
+    def _load(self):
+        if not os.path.exists(self.table_path):
+            return {}
+        with open(self.table_path) as f:
+            return json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.table_path)), exist_ok=True)
+        tmp_path = self.table_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.table, f, indent=2)
+        os.replace(tmp_path, self.table_path)
+
+    def _update(self, job_id, **fields):
+        self.table[job_id].update(fields, updated=_now())
+        self._save()
+
+    def pending(self):
+        return [job_id for job_id, entry in self.table.items() if entry["status"] not in TERMINAL_STATES]
+
+    def forget(self, job_id):
+        self.table.pop(job_id, None)
+        self._handles.pop(job_id, None)
+        self._save()
+
+    def register_analysis(self, name, func):
+        self._analyses[name] = func
+        self._paths[name] = analysis_path(func)
+
+    def _resolve_analysis(self, job_id):
+        """任务的分析函数: 先查注册表，再按任务表里的 analysis_path (或 KNOWN_ANALYSES) 导入；都没有就报错，不静默跳过"""
+        entry = self.table[job_id]
+        name = entry["analysis"]
+        if name is None or name in self._analyses:
+            return self._analyses.get(name)
+        path = entry.get("analysis_path") or KNOWN_ANALYSES.get(name)
+        if path is None:
+            raise LookupError(f"[{entry['name']}] 任务 {job_id} 的分析 '{name}' 未注册，任务表里也没有可导入的路径")
+        try:
+            func = load_analysis(path)
+        except Exception as e:
+            raise LookupError(f"[{entry['name']}] 任务 {job_id} 的分析 '{name}' 无法从 {path} 导入: {e}") from e
+        self._analyses[name] = func
+        return func
+
+    # ---------- 提交 ----------
+    async def submit(self, name, sampler, pubs, points=None, analysis=None, metadata=None, max_executions=None):
+        """
+        sampler.run(pubs) 放到线程里执行 (网络请求会阻塞)，返回 job_id.
+        max_executions: 每个 runtime job 的执行次数预算，超出时分块并发提交
+        (sampler 绑定到 Batch / Session 时各块同组运行).
+        """
+        chunks = {}
+        plan, shapes = plan_chunks(pubs, default_shots(sampler), max_executions) if max_executions else ([], [])
+        if len(plan) > 1:
+            chunk_lists = chunk_pubs(pubs, plan, default_shots(sampler))
+            jobs = await asyncio.gather(*(asyncio.to_thread(sampler.run, chunk) for chunk in chunk_lists))
+            chunks = {"chunks": [job.job_id() for job in jobs], "plan": plan, "shapes": shapes}
+            print(f"✂️ [{name}] {len(pubs)} PUBs 切成 {len(jobs)} 个 runtime job")
+        else:
+            jobs = [await asyncio.to_thread(sampler.run, pubs)]
+        for job in jobs:
+            self._handles[job.job_id()] = job
+        job_id = jobs[0].job_id()
+        metadata = dict(metadata or {})
+        if analysis is not None and self._paths.get(analysis) is None:
+            print(f"⚠️ [{name}] 分析 '{analysis}' 不是模块级函数，重启后无法按路径续跑分析")
+        self.table[job_id] = {
+            "name": name,
+            "backend": metadata.get("backend"),
+            "status": "QUEUED",
+            "submitted": _now(),
+            "updated": _now(),
+            "points": points,
+            "metadata": metadata,
+            "analysis": analysis,
+            "analysis_path": self._paths.get(analysis),
+            "analyzed": False,
+            # 本地模拟任务没有远端记录，进程退出后无法恢复
+            "local": self.service is None,
+            "session": getattr(jobs[0], "session_id", None),
+            **chunks,
+        }
+        self._save()
+        print(f"🛫 [{name}] 已提交: {job_id}")
+        return job_id
+
+    async def submit_many(self, matrices):
+        """matrices: [{"name", "sampler", "pubs", "points", "analysis", "metadata"}, ...]，并发提交"""
+        return await asyncio.gather(*(self.submit(**matrix) for matrix in matrices))
+
+    # ---------- 轮询 ----------
+    def _handle(self, job_id, local=False):
+        if job_id in self._handles:
+            return self._handles[job_id]
+        if local or self.service is None:
+            return None
+        job = self.service.job(job_id)
+        self._handles[job_id] = job
+        return job
+
+    def _handles_for(self, job_id):
+        """逻辑任务对应的全部 runtime job (未分块时只有它自己)；有一块取不回就返回 None"""
+        entry = self.table[job_id]
+        jobs = [self._handle(chunk_id, entry.get("local")) for chunk_id in entry.get("chunks") or [job_id]]
+        return None if any(job is None for job in jobs) else jobs
+
+    async def watch(self, job_id):
+        """轮询单个任务直到终态；DONE 时落盘并运行分析，返回 PrimitiveResult (否则 None)"""
+        entry = self.table[job_id]
+        name = entry["name"]
+        if entry["status"] not in TERMINAL_STATES:
+            try:
+                jobs = await asyncio.to_thread(self._handles_for, job_id)
+            except Exception as e:
+                print(f"❌ [{name}] 无法取回任务 {job_id}: {e}")
+                self._update(job_id, status="LOST")
+                return None
+            if jobs is None:
+                if entry.get("local"):
+                    print(f"⚠️ [{name}] 本地任务 {job_id} 已随进程结束，标记为 LOST")
+                    self._update(job_id, status="LOST")
+                return None
+
+            local = entry.get("local")
+            interval = LOCAL_POLL_INTERVAL if local else self.poll_interval
+            max_interval = LOCAL_MAX_INTERVAL if local else self.max_interval
+            while True:
+                statuses = await asyncio.gather(*(asyncio.to_thread(job.status) for job in jobs))
+                status = _group_status([_status_name(s) for s in statuses])
+                if status != entry["status"]:
+                    print(f"   [{name}] {job_id}: {entry['status']} -> {status}")
+                    self._update(job_id, status=status)
+                if status in TERMINAL_STATES:
+                    break
+                await asyncio.sleep(interval)
+                interval = min(interval * self.backoff, max_interval)
+
+            if status != "DONE":
+                print(f"❌ [{name}] 任务 {job_id} 结束于 {status}")
+                return None
+            results = await asyncio.gather(*(asyncio.to_thread(job.result) for job in jobs))
+            if entry.get("chunks"):
+                # 各块按原 PUB 顺序与形状拼回一个结果，落盘后与未分块任务无异
+                results = merge_chunks(results, entry["plan"], entry["shapes"], job_ids=entry["chunks"])
+            else:
+                results = results[0]
+            if job_id not in self.store:
+                self.store.save(job_id, results, metadata=entry["metadata"], points=entry["points"])
+        elif entry["status"] == "DONE" and job_id in self.store:
+            # 上次运行已落盘、但分析尚未执行 (例如当时没有注册分析函数)
+            results = self.store.load(job_id)
+        else:
+            return None
+
+        self._analyze(job_id, results)
+        return results
+
+    def _analyze(self, job_id, results):
+        entry = self.table[job_id]
+        if entry["analyzed"]:
+            return
+        func = self._resolve_analysis(job_id)
+        if func is None:
+            return
+        try:
+            func(results, job_id)
+            self._update(job_id, analyzed=True)
+        except Exception as e:
+            print(f"❌ [{entry['name']}] 分析失败: {e}")
+
+    async def wait(self, job_ids=None):
+        """
+        并发轮询 (默认: 所有未结束 + 已完成待分析的任务)，返回 {job_id: results}.
+        有任务的分析函数找不到时，其余任务照常跑完 (结果都已落盘)，最后抛出 LookupError
+        """
+        if job_ids is None:
+            job_ids = [
+                job_id for job_id, entry in self.table.items()
+                if entry["status"] not in TERMINAL_STATES
+                or (entry["status"] == "DONE" and not entry["analyzed"] and entry["analysis"] is not None)
+            ]
+        results = await asyncio.gather(*(self.watch(job_id) for job_id in job_ids), return_exceptions=True)
+        for r in results:
+            if isinstance(r, BaseException) and not isinstance(r, LookupError):
+                raise r
+        errors = [r for r in results if isinstance(r, LookupError)]
+        if errors:
+            for e in errors:
+                print(f"❌ {e}")
+            raise LookupError(f"{len(errors)} 个任务的分析函数无法解析 (结果已落盘，可用 python -m sediment analyze 重画)")
+        return dict(zip(job_ids, results))
+
+    async def run(self, matrices):
+        """提交一组实验矩阵并等待它们全部完成"""
+        job_ids = await self.submit_many(matrices)
+        return await self.wait(job_ids)
+
+
+def print_table(manager):
+    for job_id, entry in manager.table.items():
+        flag = "✅" if entry["analyzed"] else "  "
+        extra = f" | {len(entry['chunks'])} 块" if entry.get("chunks") else ""
+        print(f"{flag} {job_id:<24} {entry['status']:<10} {entry['name']:<20} {entry['backend']} | {entry['submitted']}{extra}")
+
+
+if __name__ == "__main__":
+    # 用法: python -m sediment.jobs          查看任务表
+    #       python -m sediment.jobs watch    续跑在途任务 (结果落盘到 ResultStore)
+    if sys.argv[1:2] == ["watch"]:
+        from qiskit_ibm_runtime import QiskitRuntimeService
+        manager = JobManager(service=QiskitRuntimeService(), poll_interval=30.0)
+        print(f"⏳ 续跑 {len(manager.pending())} 个在途任务...")
+        try:
+            asyncio.run(manager.wait())
+        except LookupError as e:
+            print_table(manager)
+            sys.exit(f"❌ {e}")
+    else:
+        manager = JobManager()
+    print_table(manager)
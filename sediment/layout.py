@@ -0,0 +1,180 @@
+import hashlib
+import json
+import math
+import os
+
+# ==========================================
+# 🗺️ 链布局 (Chain Layout on Heavy-Hex)
+#    沉积链只有最近邻两比特门: 在耦合图上找一条长 L 的简单路径，
+#    按校准数据的门 / 读出误差加权取最优，作为初始布局固定下来 ->
+#    编译时跳过布局搜索、不插 SWAP. 结果按校准快照缓存
+# ==========================================
+
+DEFAULT_LAYOUT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sediment", "layout")
+DEFAULT_BEAM_WIDTH = 256
+DEFAULT_PER_ENDS = 2
+TWO_QUBIT_OPS = ("cz", "cx", "ecr")
+QUBIT_OPS = ("measure", "sx")   # 每个链上比特都要测量、都有单比特门
+
+
+def _log_cost(error):
+    """-log(1 - ε)；ε 缺失按 0，ε >= 1 (坏比特 / 坏耦合) 为 inf"""
+    if error is None:
+        return 0.0
+    return math.inf if error >= 1 else -math.log1p(-error)
+
+
+def error_costs(backend):
+    """
+    从 backend.target 读出每个比特与每条耦合的代价 (-log 保真度):
+    比特 = 读出 + 单比特门，耦合 = 两比特门 (两个方向取较小者).
+    返回 (qubit_cost: {q: c}, edge_cost: {(a, b): c}，a < b).
+    """
+    target = backend.target
+    qubit_cost = {q: 0.0 for q in range(backend.num_qubits)}
+    for name in QUBIT_OPS:
+        if name in target.operation_names:
+            for qargs, props in target[name].items():
+                if qargs is not None and props is not None:
+                    qubit_cost[qargs[0]] += _log_cost(props.error)
+    edge_cost = {}
+    for name in TWO_QUBIT_OPS:
+        if name not in target.operation_names:
+            continue
+        for qargs, props in target[name].items():
+            if qargs is None:
+                continue
+            edge = tuple(sorted(qargs))
+            cost = _log_cost(None if props is None else props.error)
+            edge_cost[edge] = min(cost, edge_cost.get(edge, math.inf))
+    return qubit_cost, edge_cost
+
+
+def calibration_fingerprint(qubit_cost, edge_cost):
+    """校准快照指纹: 耦合图 + 误差 (保留 6 位有效数字)，重新校准后缓存自动失效"""
+    payload = json.dumps([sorted((q, f"{c:.6g}") for q, c in qubit_cost.items()),
+                          sorted((list(e), f"{c:.6g}") for e, c in edge_cost.items())])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _beam_search(neighbors, qubit_cost, length, beam_width, per_ends):
+    # 束中元素: (代价, 路径 tuple, 已用比特的位掩码)
+    beam = [(qubit_cost[q], (q,), 1 << q) for q in qubit_cost if math.isfinite(qubit_cost[q]) and neighbors[q]]
+    for _ in range(length - 1):
+        best = {}
+        for cost, path, mask in beam:
+            for end, append in ((path[-1], True), (path[0], False)):
+                for n, bond in neighbors[end]:
+                    if mask >> n & 1:
+                        continue
+                    grown = path + (n,) if append else (n,) + path
+                    new_mask = mask | 1 << n
+                    new_cost = cost + bond + qubit_cost[n]
+                    key = (new_mask, min(grown[0], grown[-1]), max(grown[0], grown[-1]))
+                    if key not in best or new_cost < best[key][0]:
+                        best[key] = (new_cost, grown, new_mask)
+        # 同一对端点最多留 per_ends 条: 只按代价截断时束会挤进同一片区域，长链容易走进死胡同
+        beam, count = [], {}
+        for item in sorted(best.values(), key=lambda item: item[0]):
+            ends = (min(item[1][0], item[1][-1]), max(item[1][0], item[1][-1]))
+            if count.get(ends, 0) < per_ends:
+                count[ends] = count.get(ends, 0) + 1
+                beam.append(item)
+                if len(beam) == beam_width:
+                    break
+        if not beam:
+            return None
+    return min(beam, key=lambda item: item[0])
+
+
+def best_chain(qubit_cost, edge_cost, length, edge_weight=1.0, beam_width=DEFAULT_BEAM_WIDTH,
+               per_ends=DEFAULT_PER_ENDS):
+    """
+    束搜索: 从每个可用比特出发，每一步在路径两端各尝试接上一个未用的邻居，
+    同一 (比特集合, 两端) 只保留代价最低的一条，再保留代价最低的 beam_width 条.
+    路径代价 = Σ 比特代价 + edge_weight · Σ 耦合代价. 束走空时束宽 x4 重试两次.
+    ε = 1 的坏耦合不可用，所以能找到的最长链取决于当次校准.
+    返回 (路径, 代价)；找不到则 ValueError.
+    """
+    neighbors = {q: [] for q in qubit_cost}
+    for (a, b), cost in edge_cost.items():
+        if math.isfinite(cost) and math.isfinite(qubit_cost[a]) and math.isfinite(qubit_cost[b]):
+            neighbors[a].append((b, edge_weight * cost))
+            neighbors[b].append((a, edge_weight * cost))
+
+    for width in (beam_width, 4 * beam_width, 16 * beam_width):
+        found = _beam_search(neighbors, qubit_cost, length, width, per_ends)
+        if found is not None:
+            cost, path, _ = found
+            # 方向固定: 编号小的一端作为逻辑比特 0，结果可复现
+            return (list(path) if path[0] <= path[-1] else list(reversed(path))), cost
+    raise ValueError(f"耦合图上找不到长度为 {length} 的简单路径 (束宽最大 {16 * beam_width})")
+
+
+def two_qubit_weight(template):
+    """模板里平均每条键的两比特门数 (按键加权耦合误差)"""
+    bonds = max(template.num_qubits - 1, 1)
+    return sum(1 for inst in template.data if inst.operation.num_qubits == 2
+               and inst.operation.name != "barrier") / bonds
+
+
+class LayoutCache:
+    """
+    文件: <目录>/<backend>__<校准指纹>.json，内容 {"L|边权|束宽": {"path", "fidelity"}}.
+    校准变化后指纹不同，自然落到新文件.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get("SEDIMENT_LAYOUT_DIR", DEFAULT_LAYOUT_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, backend_name, fingerprint):
+        return os.path.join(self.directory, f"{backend_name}__{fingerprint}.json")
+
+    def load(self, backend_name, fingerprint):
+        path = self._path(backend_name, fingerprint)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def store(self, backend_name, fingerprint, key, entry):
+        entries = self.load(backend_name, fingerprint)
+        entries[key] = entry
+        path = self._path(backend_name, fingerprint)
+        with open(path + ".tmp", "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+def chain_layout(backend, length, edge_weight=2.0, beam_width=DEFAULT_BEAM_WIDTH, cache=None):
+    """
+    长 L 的最优链 (物理比特列表，第 k 个对应逻辑比特 k) 与估计保真度.
+    cache: LayoutCache，默认用 SEDIMENT_LAYOUT_DIR；传 False 关闭缓存.
+    """
+    qubit_cost, edge_cost = error_costs(backend)
+    if cache is None:
+        cache = LayoutCache()
+    key = f"{length}|{edge_weight:.4g}|{beam_width}"
+    if cache:
+        fingerprint = calibration_fingerprint(qubit_cost, edge_cost)
+        entry = cache.load(backend.name, fingerprint).get(key)
+        if entry is not None:
+            return entry["path"], entry["fidelity"]
+    path, cost = best_chain(qubit_cost, edge_cost, length, edge_weight, beam_width)
+    fidelity = math.exp(-cost)
+    if cache:
+        cache.store(backend.name, fingerprint, key, {"path": path, "fidelity": fidelity})
+    return path, fidelity
+
+
+def circuit_layout(transpiled):
+    """编译后电路实际使用的物理比特 (第 k 个对应逻辑比特 k)，用于记进任务元数据 / 画图"""
+    if transpiled.layout is None:
+        return list(range(transpiled.num_qubits))
+    return transpiled.layout.initial_index_layout(filter_ancillas=True)
+
+
+def chain_layouts(templates, backend, cache=None):
+    """每个模板一条链 (按模板的两比特门密度加权)，直接传给 transpile_sweep(layouts=...)"""
+    return [chain_layout(backend, t.num_qubits, two_qubit_weight(t), cache=cache)[0] for t in templates]
@@ -0,0 +1,118 @@
+import numpy as np
+
+# ==========================================
+# 📊 比特边缘分布引擎 (Vectorized Marginals)
+#    直接在 BitArray 的打包字节上做 NumPy 运算，不再 get_counts() + 逐串循环
+#    约定与 qiskit 一致: 比特 j 就是 bitstring[-(j+1)]，最高位 (startswith) 是 Q_last
+# ==========================================
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def _resolve_qubit(qubit, num_bits):
+    if qubit < 0:
+        qubit += num_bits
+    if not 0 <= qubit < num_bits:
+        raise IndexError(f"qubit {qubit} 超出范围 (num_bits={num_bits})")
+    return qubit
+
+
+def unpack_bits(bits):
+    """BitArray -> uint8 数组 (..., shots, num_bits)，第 j 列就是比特 j"""
+    unpacked = np.unpackbits(bits.array[..., ::-1], axis=-1, bitorder="little")
+    return unpacked[..., :bits.num_bits]
+
+
+def bit_column(bits, qubit):
+    """只取出单个比特的 0/1 列 (..., shots)，不解包整个数组"""
+    qubit = _resolve_qubit(qubit, bits.num_bits)
+    byte = bits.array[..., bits.array.shape[-1] - 1 - qubit // 8]
+    return (byte >> (qubit % 8)) & 1
+
+
+def p1(bits, qubit):
+    """单比特激发率 P(q=1)，形状 = bits.shape"""
+    return bit_column(bits, qubit).mean(axis=-1)
+
+
+def bit_probabilities(bits):
+    """所有比特的 P(1)，形状 (..., num_bits)"""
+    return unpack_bits(bits).mean(axis=-2)
+
+
+def hamming_weights(bits):
+    """每个 shot 的 1 的个数，形状 (..., shots)"""
+    return _POPCOUNT[bits.array].sum(axis=-1, dtype=np.int64)
+
+
+def hamming_histogram(bits):
+    """Hamming 重量直方图 (计数)，形状 (..., num_bits + 1)"""
+    weights = hamming_weights(bits)
+    flat = weights.reshape(-1, weights.shape[-1])
+    offsets = np.arange(flat.shape[0])[:, None] * (bits.num_bits + 1)
+    hist = np.bincount((flat + offsets).ravel(), minlength=flat.shape[0] * (bits.num_bits + 1))
+    return hist.reshape(bits.shape + (bits.num_bits + 1,))
+
+
+def marginal_probabilities(bits, qubits):
+    """
+    任意 k 比特边缘分布，形状 (..., 2**k).
+    索引按 qiskit 小端约定: index = Σ b_{qubits[j]} * 2**j
+    """
+    index = np.zeros(bits.array.shape[:-1], dtype=np.int64)
+    for j, q in enumerate(qubits):
+        index |= bit_column(bits, q).astype(np.int64) << j
+    size = 2 ** len(qubits)
+    flat = index.reshape(-1, index.shape[-1])
+    offsets = np.arange(flat.shape[0])[:, None] * size
+    hist = np.bincount((flat + offsets).ravel(), minlength=flat.shape[0] * size)
+    return hist.reshape(bits.shape + (size,)) / bits.num_shots
+
+
+# ==========================================
+# 🧾 整个任务 (所有 PUB) 的扫描视图
+# ==========================================
+def pub_bitarrays(results, register=None):
+    """每个 PUB 一个 BitArray；register=None 时取第一个经典寄存器"""
+    arrays = []
+    for pub_result in results:
+        name = register or next(iter(pub_result.data.keys()))
+        arrays.append(getattr(pub_result.data, name))
+    return arrays
+
+
+def sweep_apply(results, func, register=None):
+    """
+    对每个 PUB 一次性向量化计算 func(bits)，再按提交顺序展平成扫描点.
+    兼容旧任务 (每个电路一个 PUB) 与参数扫描 PUB.
+    """
+    parts = []
+    for bits in pub_bitarrays(results, register):
+        value = np.asarray(func(bits))
+        parts.append(value.reshape((-1,) + value.shape[len(bits.shape):]))
+    return np.concatenate(parts, axis=0)
+
+
+def sweep_p1(results, qubit=-1, register=None):
+    """每个扫描点的 P(qubit=1)；qubit=-1 即链尾 (视界) 比特"""
+    return sweep_apply(results, lambda bits: p1(bits, qubit), register)
+
+
+def sweep_zero_density(results, register=None):
+    """每个扫描点的平均 '0' 密度 (沉积密度 ρ0)"""
+    return sweep_apply(results, lambda bits: 1.0 - hamming_weights(bits).mean(axis=-1) / bits.num_bits, register)
+
+
+def sweep_all_zero_probability(results, register=None):
+    """每个扫描点的全零态 '00...0' 存活概率"""
+    return sweep_apply(results, lambda bits: (hamming_weights(bits) == 0).mean(axis=-1), register)
+
+
+def sweep_ones(results, qubit=-1, register=None):
+    """每个扫描点 qubit=1 的次数 (配合 sweep_shots 做按 shots 加权的合并)"""
+    return sweep_apply(results, lambda bits: bit_column(bits, qubit).sum(axis=-1, dtype=np.int64), register)
+
+
+def sweep_shots(results, register=None):
+    """每个扫描点的 shots (按 PUB 指定 shots 时各点可能不同)"""
+    return sweep_apply(results, lambda bits: np.full(bits.shape, bits.num_shots, dtype=np.int64), register)
@@ -0,0 +1,213 @@
+import numpy as np
+from qiskit.primitives import BitArray, DataBin, PrimitiveJob, PrimitiveResult, SamplerPubResult
+from qiskit.primitives.containers.sampler_pub import SamplerPub
+
+# ==========================================
+# 🧮 本地 MPS / TEBD 模拟器 (Offline Execution)
+#    沉积链全是最近邻门，用矩阵乘积态在 CPU 上跑 L=16…133，
+#    输出与 SamplerV2 同构，analyze_and_plot 等无需改动
+# ==========================================
+
+DEFAULT_BOND_DIM = 64
+DEFAULT_CUTOFF = 1e-12
+_SKIPPED_OPS = {"barrier", "delay", "id"}
+
+
+class MPSState:
+    """
+    开放边界 MPS，每个张量形状 (χ_left, 2, χ_right).
+    始终记录正交中心，两比特门前先把中心移到门的左侧，截断误差才是最优的.
+    """
+
+    def __init__(self, num_qubits, max_bond=DEFAULT_BOND_DIM, cutoff=DEFAULT_CUTOFF):
+        self.num_qubits = num_qubits
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        self.tensors = []
+        for _ in range(num_qubits):
+            t = np.zeros((1, 2, 1), dtype=complex)
+            t[0, 0, 0] = 1.0
+            self.tensors.append(t)
+        self.center = 0
+        self.truncation_error = 0.0
+
+    @property
+    def bond_dims(self):
+        return [t.shape[2] for t in self.tensors[:-1]]
+
+    def _move_center(self, site):
+        while self.center < site:
+            k = self.center
+            a = self.tensors[k]
+            q, r = np.linalg.qr(a.reshape(-1, a.shape[2]))
+            self.tensors[k] = q.reshape(a.shape[0], 2, -1)
+            self.tensors[k + 1] = np.einsum("ab,bsc->asc", r, self.tensors[k + 1])
+            self.center += 1
+        while self.center > site:
+            k = self.center
+            a = self.tensors[k]
+            q, r = np.linalg.qr(a.reshape(a.shape[0], -1).T)
+            self.tensors[k] = q.T.reshape(-1, 2, a.shape[2])
+            self.tensors[k - 1] = np.einsum("asb,cb->asc", self.tensors[k - 1], r)
+            self.center -= 1
+
+    def apply_1q(self, matrix, site):
+        self.tensors[site] = np.einsum("ij,ajb->aib", matrix, self.tensors[site])
+
+    def apply_kraus(self, operators, site, rng):
+        """
+        量子轨迹的一步: 按 Born 概率 ||K_i ψ||² 抽一个单比特 Kraus 算符作用并重新归一化.
+        先把正交中心移到 site，局域张量的范数就是整个态的范数. 返回抽中的序号.
+        """
+        self._move_center(site)
+        a = self.tensors[site]
+        branches = [np.einsum("ij,ajb->aib", k, a) for k in operators]
+        weights = np.array([np.vdot(b, b).real for b in branches])
+        choice = int(np.searchsorted(np.cumsum(weights), rng.random() * weights.sum()))
+        choice = min(choice, len(operators) - 1)
+        self.tensors[site] = branches[choice] / np.sqrt(weights[choice])
+        return choice
+
+    def apply_2q(self, matrix, q0, q1):
+        """matrix 采用 qiskit 小端约定: 行/列索引 = b1*2 + b0，b0 属于 q0"""
+        if abs(q0 - q1) != 1:
+            raise ValueError(f"MPS 模拟器只支持最近邻两比特门，收到 ({q0}, {q1})")
+        left = min(q0, q1)
+        self._move_center(left)
+        a, b = self.tensors[left], self.tensors[left + 1]
+        theta = np.einsum("asb,btc->astc", a, b)
+        u = matrix.reshape(2, 2, 2, 2)  # [o1, o0, i1, i0]
+        if q0 == left:
+            theta = np.einsum("xyzw,lwzr->lyxr", u, theta)
+        else:
+            theta = np.einsum("xyzw,lzwr->lxyr", u, theta)
+
+        chi_l, chi_r = theta.shape[0], theta.shape[3]
+        uu, s, vh = np.linalg.svd(theta.reshape(chi_l * 2, 2 * chi_r), full_matrices=False)
+        keep = max(1, min(self.max_bond, int(np.sum(s > self.cutoff * s[0]))))
+        self.truncation_error += float(np.sum(s[keep:] ** 2))
+        s = s[:keep]
+        self.tensors[left] = uu[:, :keep].reshape(chi_l, 2, keep)
+        self.tensors[left + 1] = (s[:, None] * vh[:keep]).reshape(keep, 2, chi_r)
+        self.center = left + 1
+
+    def sample(self, shots, rng):
+        """
+        整批 shots 同时做顺序采样: 先把 MPS 变成右正则形式，
+        然后从 Q0 往后逐比特抽样，每个 shot 只携带一个左边界向量.
+        返回 (shots, num_qubits) 的 0/1 数组.
+        """
+        self._move_center(0)
+        norm = np.linalg.norm(self.tensors[0])
+        self.tensors[0] = self.tensors[0] / norm
+
+        outcomes = np.zeros((shots, self.num_qubits), dtype=np.uint8)
+        vec = np.ones((shots, 1), dtype=complex)
+        rows = np.arange(shots)
+        for k, a in enumerate(self.tensors):
+            w = np.einsum("sa,aib->sib", vec, a)
+            weights = np.sum(np.abs(w) ** 2, axis=2)
+            total = weights.sum(axis=1)
+            bit = (rng.random(shots) * total < weights[:, 1]).astype(np.uint8)
+            outcomes[:, k] = bit
+            vec = w[rows, bit] / np.sqrt(weights[rows, bit])[:, None]
+        return outcomes
+
+
+def simulate_circuit(circuit, max_bond=DEFAULT_BOND_DIM, cutoff=DEFAULT_CUTOFF):
+    """
+    按门顺序做 TEBD 演化，返回 (MPSState, measurements).
+    measurements 为 [(qubit, clbit), ...]，只支持末端测量.
+    """
+    state = MPSState(circuit.num_qubits, max_bond=max_bond, cutoff=cutoff)
+    measurements = []
+    measured = set()
+    for instruction in circuit.data:
+        op = instruction.operation
+        qubits = [circuit.find_bit(q).index for q in instruction.qubits]
+        if op.name in _SKIPPED_OPS:
+            continue
+        if op.name == "measure":
+            measurements.append((qubits[0], circuit.find_bit(instruction.clbits[0]).index))
+            measured.add(qubits[0])
+            continue
+        if measured.intersection(qubits):
+            raise ValueError("MPS 模拟器不支持中途测量 (mid-circuit measurement)")
+        matrix = op.to_matrix()
+        if len(qubits) == 1:
+            state.apply_1q(matrix, qubits[0])
+        elif len(qubits) == 2:
+            state.apply_2q(matrix, qubits[0], qubits[1])
+        else:
+            raise ValueError(f"不支持的门: {op.name} ({len(qubits)} qubits)")
+    return state, measurements
+
+
+def _creg_layout(circuit):
+    """clbit 全局索引 -> (寄存器名, 寄存器内位置)"""
+    layout = {}
+    for creg in circuit.cregs:
+        for pos, clbit in enumerate(creg):
+            layout[circuit.find_bit(clbit).index] = (creg.name, pos)
+    return layout
+
+
+class MPSSampler:
+    """
+    SamplerV2 的本地替身: sampler.run(pubs).result() 返回 PrimitiveResult，
+    每个 PUB 的 data.<creg> 是 BitArray，形状与参数数组一致.
+    """
+
+    def __init__(self, max_bond=DEFAULT_BOND_DIM, cutoff=DEFAULT_CUTOFF, default_shots=1024, seed=None):
+        self.max_bond = max_bond
+        self.cutoff = cutoff
+        self.seed = seed
+        self.options = _Options(default_shots)
+
+    def run(self, pubs, *, shots=None):
+        if shots is None:
+            shots = self.options.default_shots
+        coerced = [SamplerPub.coerce(pub, shots) for pub in pubs]
+        job = PrimitiveJob(self._run, coerced)
+        job._submit()
+        return job
+
+    def _run(self, pubs):
+        rng = np.random.default_rng(self.seed)
+        results = [self._run_pub(pub, rng) for pub in pubs]
+        return PrimitiveResult(results, metadata={"version": 2, "simulator": "mps", "max_bond": self.max_bond})
+
+    def _run_pub(self, pub, rng):
+        circuit = pub.circuit
+        layout = _creg_layout(circuit)
+        bound_circuits = pub.parameter_values.bind_all(circuit)
+        bools = {
+            creg.name: np.zeros(bound_circuits.shape + (pub.shots, creg.size), dtype=bool)
+            for creg in circuit.cregs
+        }
+        max_bonds = np.zeros(bound_circuits.shape, dtype=int)
+        truncation = np.zeros(bound_circuits.shape)
+        for index, bound in np.ndenumerate(bound_circuits):
+            state, measurements = simulate_circuit(bound, self.max_bond, self.cutoff)
+            samples = state.sample(pub.shots, rng)
+            for qubit, clbit in measurements:
+                name, pos = layout[clbit]
+                bools[name][index + (slice(None), pos)] = samples[:, qubit]
+            max_bonds[index] = max(state.bond_dims, default=1)
+            truncation[index] = state.truncation_error
+
+        meas = {name: BitArray.from_bool_array(arr, order="little") for name, arr in bools.items()}
+        return SamplerPubResult(
+            DataBin(**meas, shape=pub.shape),
+            metadata={
+                "shots": pub.shots,
+                "circuit_metadata": circuit.metadata,
+                "max_bond": max_bonds.tolist(),
+                "truncation_error": truncation.tolist(),
+            },
+        )
+
+
+class _Options:
+    def __init__(self, default_shots):
+        self.default_shots = default_shots
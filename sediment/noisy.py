@@ -0,0 +1,287 @@
+import json
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from qiskit.primitives import BitArray, DataBin, PrimitiveResult, SamplerPubResult
+
+from sediment.layout import TWO_QUBIT_OPS, best_chain
+from sediment.mps import _SKIPPED_OPS, DEFAULT_BOND_DIM, DEFAULT_CUTOFF, MPSSampler, MPSState, _creg_layout
+
+# ==========================================
+# 🌫️ 含噪量子轨迹模拟 (Noisy Quantum Trajectories)
+#    在 MPS/TEBD 模拟器上逐门随机插入去极化 (Pauli) 错误与振幅阻尼 (Kraus 跳跃)，
+#    采样后再按读出混淆翻转比特. 每条轨迹是一个独立的纯态 MPS，轨迹在进程池里并行，
+#    各自的 shots 拼回与 SamplerV2 同构的结果. 噪声参数来自保存下来的校准快照 JSON，不连网
+# ==========================================
+
+DEFAULT_TRAJECTORIES = 32
+VIRTUAL_OPS = {"rz", "p", "z", "s", "sdg", "t", "tdg", "u1"}   # 帧变换: 无误差、无时长
+# 逻辑门折合成的原生门个数 (sx / 两比特门)，未列出的按 1 个
+NATIVE_COUNTS = {"rx": 2, "ry": 2, "u": 2, "u3": 2, "rzz": 2, "rxx": 2, "ryy": 2, "swap": 3}
+_PAULIS = np.array([[[1, 0], [0, 1]], [[0, 1], [1, 0]], [[0, -1j], [1j, 0]], [[1, 0], [0, -1]]], dtype=complex)
+
+
+# ==========================================
+# 📄 校准快照
+# ==========================================
+def _property(properties, qubit, name):
+    try:
+        return properties.qubit_property(qubit, name)[0]
+    except Exception:
+        return None
+
+
+def backend_calibration(backend):
+    """
+    从 backend (真机或 FakeTorino) 读出噪声参数，返回可直接 json.dump 的 dict:
+    qubits[q] = {t1, sx_error, sx_duration, p10, p01}，edges["a-b"] = {error, duration} (a < b).
+    有 backend.properties() 时读出误差分 P(1|0) / P(0|1)，否则两者都取 measure 的平均误差.
+    """
+    target = backend.target
+    properties = backend.properties() if hasattr(backend, "properties") else None
+    qubits = []
+    for q in range(backend.num_qubits):
+        qubit_props = target.qubit_properties[q] if target.qubit_properties else None
+        sx = target["sx"].get((q,)) if "sx" in target.operation_names else None
+        measure = target["measure"].get((q,)) if "measure" in target.operation_names else None
+        error = getattr(measure, "error", None) or 0.0
+        p10 = _property(properties, q, "prob_meas1_prep0") if properties else None
+        p01 = _property(properties, q, "prob_meas0_prep1") if properties else None
+        qubits.append({"t1": getattr(qubit_props, "t1", None),
+                       "sx_error": getattr(sx, "error", None) or 0.0,
+                       "sx_duration": getattr(sx, "duration", None) or 0.0,
+                       "p10": error if p10 is None else p10,
+                       "p01": error if p01 is None else p01})
+    edges = {}
+    for name in TWO_QUBIT_OPS:
+        if name not in target.operation_names:
+            continue
+        for qargs, props in target[name].items():
+            if qargs is None or props is None:
+                continue
+            key = "-".join(map(str, sorted(qargs)))
+            error = 1.0 if props.error is None else props.error
+            if key not in edges or error < edges[key]["error"]:
+                edges[key] = {"error": error, "duration": props.duration or 0.0}
+    return {"backend": backend.name, "num_qubits": backend.num_qubits, "qubits": qubits, "edges": edges}
+
+
+def save_calibration(backend, path):
+    calibration = backend_calibration(backend)
+    with open(path, "w") as f:
+        json.dump(calibration, f, indent=1)
+    return calibration
+
+
+def load_calibration(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def calibration_chain(calibration, length, edge_weight=2.0):
+    """在快照的耦合图上按误差选最优链 (与 sediment.layout.chain_layout 同一个束搜索)"""
+    cost = lambda e: math.inf if e >= 1 else -math.log1p(-e)
+    qubit_cost = {q: cost(p["sx_error"]) + cost((p["p10"] + p["p01"]) / 2)
+                  for q, p in enumerate(calibration["qubits"])}
+    edge_cost = {tuple(map(int, key.split("-"))): cost(edge["error"]) for key, edge in calibration["edges"].items()}
+    return best_chain(qubit_cost, edge_cost, length, edge_weight)[0]
+
+
+# ==========================================
+# 🔧 链上的噪声参数
+# ==========================================
+class ChainNoise:
+    """
+    逻辑链上的噪声 (逻辑比特 k = 物理比特 chain[k]).
+    p1[k] / p2[k]: 每个原生单比特门 / 键 (k, k+1) 上每个原生两比特门的 Pauli 错误概率，
+    damp1[k] / damp2[k]: 对应门时长内的振幅阻尼 γ = 1 - exp(-t / T1)，p10 / p01: 读出翻转概率.
+    标定的门误差里已含 T1 的贡献，先扣掉振幅阻尼的平均不保真度 (单比特 γ/3，两比特 2(γa+γb)/5)，
+    剩下的部分当作去极化. 空闲比特的弛豫不计.
+    """
+
+    def __init__(self, calibration, chain):
+        self.chain = list(chain)
+        qubits = [calibration["qubits"][q] for q in self.chain]
+        t1 = np.array([q["t1"] or np.inf for q in qubits], dtype=float)
+        damp = lambda duration, t1: 1 - np.exp(-np.asarray(duration, dtype=float) / t1)
+        self.damp1 = damp([q["sx_duration"] for q in qubits], t1)
+        depolarizing = np.maximum(np.array([q["sx_error"] for q in qubits]) - self.damp1 / 3, 0)
+        self.p1 = np.minimum(1.5 * depolarizing, 0.75)
+
+        edges = [calibration["edges"]["-".join(map(str, sorted(pair)))] for pair in zip(self.chain, self.chain[1:])]
+        durations = np.array([e["duration"] for e in edges], dtype=float)
+        self.damp2 = np.stack([damp(durations, t1[:-1]), damp(durations, t1[1:])], axis=-1)
+        relaxation = 2 * self.damp2.sum(axis=-1) / 5
+        self.p2 = np.minimum(1.25 * np.maximum(np.array([e["error"] for e in edges]) - relaxation, 0), 15 / 16)
+
+        self.p10 = np.array([q["p10"] for q in qubits], dtype=float)
+        self.p01 = np.array([q["p01"] for q in qubits], dtype=float)
+
+    @classmethod
+    def from_calibration(cls, calibration, length, chain=None):
+        return cls(calibration, chain if chain is not None else calibration_chain(calibration, length))
+
+    @property
+    def num_qubits(self):
+        return len(self.chain)
+
+    def _damp(self, state, site, gamma, rng):
+        if gamma > 0:
+            kraus = [np.array([[1, 0], [0, np.sqrt(1 - gamma)]]), np.array([[0, np.sqrt(gamma)], [0, 0]])]
+            state.apply_kraus(kraus, site, rng)
+
+    def after_gate(self, state, name, qubits, rng):
+        """一个逻辑门之后的随机错误 (n 个原生门的错误概率按 1 - (1-p)^n 合并)"""
+        if name in VIRTUAL_OPS:
+            return
+        count = NATIVE_COUNTS.get(name, 1)
+        if len(qubits) == 1:
+            q = qubits[0]
+            if rng.random() < 1 - (1 - self.p1[q]) ** count:
+                state.apply_1q(_PAULIS[rng.integers(1, 4)], q)
+            self._damp(state, q, 1 - (1 - self.damp1[q]) ** count, rng)
+            return
+        bond = min(qubits)
+        if rng.random() < 1 - (1 - self.p2[bond]) ** count:
+            a, b = divmod(int(rng.integers(1, 16)), 4)
+            state.apply_1q(_PAULIS[a], qubits[0])
+            state.apply_1q(_PAULIS[b], qubits[1])
+        for side, q in enumerate(sorted(qubits)):
+            self._damp(state, q, 1 - (1 - self.damp2[bond, side]) ** count, rng)
+
+    def readout(self, samples, rng):
+        """按每个比特的 P(1|0) / P(0|1) 翻转采样结果 (shots, L)"""
+        flip = np.where(samples == 1, self.p01, self.p10)
+        return samples ^ (rng.random(samples.shape) < flip).astype(np.uint8)
+
+
+# ==========================================
+# 🧵 单条轨迹 (进程池 worker)
+# ==========================================
+def _run_trajectory(task):
+    circuit, noise, shots, seed, max_bond, cutoff = task
+    rng = np.random.default_rng(seed)
+    state = MPSState(circuit.num_qubits, max_bond=max_bond, cutoff=cutoff)
+    measured = set()
+    for instruction in circuit.data:
+        op = instruction.operation
+        qubits = [circuit.find_bit(q).index for q in instruction.qubits]
+        if op.name in _SKIPPED_OPS:
+            continue
+        if op.name == "measure":
+            measured.add(qubits[0])
+            continue
+        if measured.intersection(qubits):
+            raise ValueError("MPS 模拟器不支持中途测量 (mid-circuit measurement)")
+        if len(qubits) == 1:
+            state.apply_1q(op.to_matrix(), qubits[0])
+        elif len(qubits) == 2:
+            state.apply_2q(op.to_matrix(), qubits[0], qubits[1])
+        else:
+            raise ValueError(f"不支持的门: {op.name} ({len(qubits)} qubits)")
+        noise.after_gate(state, op.name, qubits, rng)
+    samples = noise.readout(state.sample(shots, rng), rng)
+    return samples, max(state.bond_dims, default=1), state.truncation_error
+
+
+class NoisyMPSSampler(MPSSampler):
+    """
+    MPSSampler 的含噪版本，接口与输出完全相同.
+    calibration: backend_calibration / load_calibration 的 dict；chains: {L: 物理比特链}，
+    缺省时按快照误差现选. 每个扫描点的 shots 均分到 trajectories 条轨迹，全部轨迹一起交给进程池.
+    """
+
+    def __init__(self, calibration, trajectories=DEFAULT_TRAJECTORIES, chains=None, max_workers=None,
+                 max_bond=DEFAULT_BOND_DIM, cutoff=DEFAULT_CUTOFF, default_shots=1024, seed=None):
+        super().__init__(max_bond=max_bond, cutoff=cutoff, default_shots=default_shots, seed=seed)
+        self.calibration = calibration
+        self.trajectories = trajectories
+        self.chains = dict(chains or {})
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._noise = {}
+
+    def noise(self, length):
+        if length not in self._noise:
+            self._noise[length] = ChainNoise.from_calibration(self.calibration, length, self.chains.get(length))
+        return self._noise[length]
+
+    def _map(self, tasks):
+        """与 transpile_sweep / collapse 一致: 单进程时串行，否则用 spawn 进程池 (fork 与 qiskit 线程池冲突)"""
+        if self.max_workers == 1 or len(tasks) == 1:
+            return [_run_trajectory(task) for task in tasks]
+        chunksize = max(1, len(tasks) // (4 * self.max_workers))
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx) as pool:
+            return list(pool.map(_run_trajectory, tasks, chunksize=chunksize))
+
+    def _run(self, pubs):
+        # 种子按 (PUB, 扫描点, 轨迹) 的顺序派生，结果与进程数无关
+        seeds = np.random.SeedSequence(self.seed)
+        tasks, slots = [], []
+        for p, pub in enumerate(pubs):
+            noise = self.noise(pub.circuit.num_qubits)
+            bound = pub.parameter_values.bind_all(pub.circuit)
+            for index, circuit in np.ndenumerate(bound):
+                splits = np.array_split(np.arange(pub.shots), min(self.trajectories, pub.shots))
+                for split, seed in zip(splits, seeds.spawn(len(splits))):
+                    tasks.append((circuit, noise, len(split), seed, self.max_bond, self.cutoff))
+                    slots.append((p, index, split[0], split[-1] + 1))
+        outputs = self._map(tasks)
+
+        results = []
+        for p, pub in enumerate(pubs):
+            circuit = pub.circuit
+            layout = _creg_layout(circuit)
+            measurements = [(circuit.find_bit(inst.qubits[0]).index, circuit.find_bit(inst.clbits[0]).index)
+                            for inst in circuit.data if inst.operation.name == "measure"]
+            bools = {creg.name: np.zeros(pub.shape + (pub.shots, creg.size), dtype=bool) for creg in circuit.cregs}
+            max_bonds = np.zeros(pub.shape, dtype=int)
+            truncation = np.zeros(pub.shape)
+            for (q, index, start, stop), (samples, bond, error) in zip(slots, outputs):
+                if q != p:
+                    continue
+                for qubit, clbit in measurements:
+                    name, pos = layout[clbit]
+                    bools[name][index + (slice(start, stop), pos)] = samples[:, qubit]
+                max_bonds[index] = max(max_bonds[index], bond)
+                truncation[index] = max(truncation[index], error)
+            meas = {name: BitArray.from_bool_array(arr, order="little") for name, arr in bools.items()}
+            results.append(SamplerPubResult(
+                DataBin(**meas, shape=pub.shape),
+                metadata={"shots": pub.shots, "circuit_metadata": circuit.metadata,
+                          "trajectories": min(self.trajectories, pub.shots), "chain": self.noise(circuit.num_qubits).chain,
+                          "max_bond": max_bonds.tolist(), "truncation_error": truncation.tolist()},
+            ))
+        return PrimitiveResult(results, metadata={"version": 2, "simulator": "noisy_mps", "max_bond": self.max_bond,
+                                                  "backend": self.calibration["backend"]})
+
+
+if __name__ == "__main__":
+    # 用法: python -m sediment.noisy [校准快照.json]
+    # 快照不存在时从 FakeTorino 生成 (不连网)；比较无噪声与含噪的视界 P(1)，以及 1 个 / 全部进程的耗时
+    import sys
+    import time
+
+    from sediment.circuits import sediment_template, sweep_pub
+    from sediment.marginals import sweep_p1
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "torino_calibration.json"
+    if not os.path.exists(path):
+        from qiskit_ibm_runtime.fake_provider import FakeTorino
+        save_calibration(FakeTorino(), path)
+        print(f"💾 FakeTorino 校准快照 -> {path}")
+    calibration = load_calibration(path)
+
+    L, gammas, shots = 12, [0.0, 0.25, 0.5], 2048
+    pub = sweep_pub(sediment_template(L), gammas, shots)
+    ideal = sweep_p1(MPSSampler(seed=3).run([pub]).result())
+    for workers in sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        noisy = NoisyMPSSampler(calibration, max_workers=workers, seed=3).run([pub]).result()
+        print(f"⏱️ {workers} 个进程: {len(gammas)} 个 γ x {DEFAULT_TRAJECTORIES} 条轨迹 {time.perf_counter() - start:.1f} s")
+    print(f"🗺️ {calibration['backend']} 上的链: {noisy[0].metadata['chain']}")
+    for g, p_ideal, p_noisy in zip(gammas, ideal, sweep_p1(noisy)):
+        print(f"   γ={g:<5} P(Q{L - 1}=1): 无噪声 {p_ideal:.4f}  含噪 {p_noisy:.4f}")
@@ -0,0 +1,215 @@
+import json
+import os
+
+import numpy as np
+
+from sediment.marginals import bit_column, bit_probabilities, unpack_bits
+from sediment.store import ResultStore
+
+# ==========================================
+# 📏 读出误差缓解 (Readout-Error Mitigation)
+#    同一个 job 里附带两条校准电路: 全 |0> 与全 |1> (X 门后测量)，
+#    得到每个比特的 2x2 混淆矩阵；假设各比特读出误差独立 (tensored)，
+#    缓解时逐比特求逆，从不构造 2^L 矩阵
+# ==========================================
+
+CALIBRATION_FILE = "readout.json"
+
+
+def _final_measurements(circuit):
+    return [(circuit.find_bit(inst.qubits[0]).index, circuit.find_bit(inst.clbits[0]).index)
+            for inst in circuit.data if inst.operation.name == "measure"]
+
+
+def calibration_circuits(circuit):
+    """
+    按 circuit (通常是编译后的模板) 的测量映射生成 [全0, 全1] 校准电路:
+    同一批物理比特、同一个经典寄存器，只含 X 与测量 (都是原生门，无需再编译).
+    """
+    measures = _final_measurements(circuit)
+    measured = [q for q, _ in measures]
+    circuits = []
+    for state in (0, 1):
+        qc = circuit.copy_empty_like(name=f"readout_cal_{state}")
+        if state:
+            for q in measured:
+                qc.x(q)
+        qc.barrier(measured)
+        for q, c in measures:
+            qc.measure(q, c)
+        qc.metadata = {"readout_cal": state}
+        circuits.append(qc)
+    return circuits
+
+
+def calibration_pubs(circuit, shots=None):
+    """两个无参数 PUB，追加在实验 PUB 之后一起提交"""
+    return [(qc,) if shots is None else (qc, None, shots) for qc in calibration_circuits(circuit)]
+
+
+def calibration_points():
+    """与 calibration_pubs 对应的扫描点元数据 (档案据此识别校准 PUB)"""
+    return [{"readout_cal": 0}, {"readout_cal": 1}]
+
+
+class ReadoutCalibration:
+    """
+    p10[j] = P(读到 1 | 制备 0)，p01[j] = P(读到 0 | 制备 1)，j 为经典比特.
+    混淆矩阵 A_j = [[1-p10, p01], [p10, 1-p01]] (列 = 制备态，行 = 读出).
+    pubs: 校准 PUB 在 job 里的序号，用于把它们从实验结果中剔除.
+    """
+
+    def __init__(self, p10, p01, pubs=None):
+        self.p10 = np.asarray(p10, dtype=float)
+        self.p01 = np.asarray(p01, dtype=float)
+        self.pubs = list(pubs or [])
+
+    @classmethod
+    def from_bits(cls, zero_bits, one_bits, pubs=None):
+        p10 = bit_probabilities(zero_bits).reshape(-1, zero_bits.num_bits).mean(axis=0)
+        p01 = 1 - bit_probabilities(one_bits).reshape(-1, one_bits.num_bits).mean(axis=0)
+        return cls(p10, p01, pubs)
+
+    @property
+    def num_bits(self):
+        return len(self.p10)
+
+    @property
+    def matrices(self):
+        """(num_bits, 2, 2) 的混淆矩阵"""
+        return np.stack([np.stack([1 - self.p10, self.p01], -1), np.stack([self.p10, 1 - self.p01], -1)], -2)
+
+    @property
+    def inverses(self):
+        return np.linalg.inv(self.matrices)
+
+    # ---------- 存取 ----------
+    def to_dict(self):
+        return {"p10": self.p10.tolist(), "p01": self.p01.tolist(), "pubs": self.pubs,
+                "matrices": self.matrices.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["p10"], data["p01"], data.get("pubs"))
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def split(self, results):
+        """去掉校准 PUB，返回实验 PUB 结果列表 (可直接交给 sweep_* 函数)"""
+        return [pub for i, pub in enumerate(results) if i not in self.pubs]
+
+    # ---------- 缓解 ----------
+    def _qubit(self, qubit):
+        return qubit + self.num_bits if qubit < 0 else qubit
+
+    def mitigate_p1(self, p1, qubit=None):
+        """
+        单比特边缘的精确逆: p_true = (p - p10) / (1 - p10 - p01).
+        qubit=None 时 p1 最后一维是全部比特 (bit_probabilities 的输出).
+        """
+        if qubit is None:
+            p10, p01 = self.p10, self.p01
+        else:
+            q = self._qubit(qubit)
+            p10, p01 = self.p10[q], self.p01[q]
+        return (np.asarray(p1) - p10) / (1 - p10 - p01)
+
+    def mitigate_marginal(self, probs, qubits):
+        """
+        k 比特边缘分布 (..., 2**k，qiskit 小端索引) 逐比特乘 A_j^{-1}，
+        只在 2**k 维上运算.
+        """
+        probs = np.asarray(probs, dtype=float)
+        lead = probs.shape[:-1]
+        k = len(qubits)
+        tensor = probs.reshape(lead + (2,) * k)
+        inverses = self.inverses
+        for j, q in enumerate(qubits):
+            axis = len(lead) + k - 1 - j   # 小端: 比特 j 是倒数第 j+1 个轴
+            tensor = np.moveaxis(np.tensordot(inverses[self._qubit(q)], tensor, axes=([1], [axis])), 0, axis)
+        return tensor.reshape(probs.shape)
+
+    def mitigated_product(self, bits, factors):
+        """
+        乘积型观测量 E[Π_j f_j(b_j)] 的缓解估计: 对每个 shot 乘上 Σ_s f_j(s) A_j^{-1}[s, b_j]，再取平均.
+        factors: (num_bits, 2)，返回 (估计值, 标准误)，形状 = bits.shape.
+        """
+        weights = np.einsum("js,jsb->jb", np.asarray(factors, dtype=float), self.inverses)
+        unpacked = unpack_bits(bits)
+        per_shot = np.prod(np.where(unpacked == 1, weights[:, 1], weights[:, 0]), axis=-1)
+        return per_shot.mean(axis=-1), per_shot.std(axis=-1, ddof=1) / np.sqrt(bits.num_shots)
+
+    def all_zero_probability(self, bits):
+        """全零态存活概率 P(00…0) 的缓解估计 (f_j = δ_{s,0})"""
+        return self.mitigated_product(bits, np.tile([1.0, 0.0], (bits.num_bits, 1)))
+
+    def zero_density(self, bits):
+        """平均 '0' 密度 ρ0 是各比特边缘的线性组合，逐比特逆即精确"""
+        return 1 - self.mitigate_p1(bit_probabilities(bits)).mean(axis=-1)
+
+    def p1(self, bits, qubit):
+        return self.mitigate_p1(bit_column(bits, qubit).mean(axis=-1), qubit)
+
+
+def _calibration_rows(archive, name=None):
+    """
+    {(L, 制备态): 点序号}，与 spec_grid 一样按链长区分；旧档案的校准点没有 L 标签时按寄存器宽度归组.
+    name: 只取该实验的校准点 (没有 experiment 标签的点视为属于任何实验).
+    """
+    rows = {}
+    for k, row in enumerate(archive.points):
+        if "readout_cal" not in row or (name is not None and row.get("experiment", name) != name):
+            continue
+        key = (row.get("L", archive.bits(k).num_bits), row["readout_cal"])
+        if key in rows:
+            raise ValueError(f"任务里有多组 L={key[0]} 的读出校准 (多个实验?)，请用 name 指定实验")
+        rows[key] = k
+    return rows
+
+
+def job_calibrations(job_id, store=None, name=None):
+    """
+    读取 job 的读出校准 {L: ReadoutCalibration}: 每个链长用自己那对全0 / 全1 校准 PUB.
+    每个校准的 pubs 都列出 job 里全部校准 PUB，split() 一次就能把它们从实验结果中剔净.
+    结果缓存在 readout.json (仅 name=None)；没有校准 PUB 的旧任务返回 {}.
+    """
+    store = store or ResultStore()
+    path = os.path.join(store.path(job_id), CALIBRATION_FILE)
+    if name is None and os.path.exists(path):
+        with open(path) as f:
+            cached = json.load(f)
+        # 旧版缓存只存了一组校准 (多链长任务会串用)，忽略并重算
+        if "lengths" in cached:
+            return {int(L): ReadoutCalibration.from_dict(data) for L, data in cached["lengths"].items()}
+    archive = store.archive(job_id)
+    rows = _calibration_rows(archive, name)
+    pubs = sorted({archive.points[k]["pub"] for k in rows.values()})
+    calibrations = {}
+    for L in dict.fromkeys(L for L, _ in rows):
+        if (L, 0) in rows and (L, 1) in rows:
+            calibrations[L] = ReadoutCalibration.from_bits(archive.bits(rows[L, 0]), archive.bits(rows[L, 1]),
+                                                           pubs=pubs)
+    if name is None and calibrations:
+        with open(path, "w") as f:
+            json.dump({"lengths": {str(L): c.to_dict() for L, c in calibrations.items()}}, f, indent=2)
+    return calibrations
+
+
+def job_calibration(job_id, store=None, L=None, name=None):
+    """
+    单个链长的读出校准 (见 job_calibrations). L=None 时任务必须只含一个链长的校准，
+    否则报错而不是随便挑一组. 没有校准 PUB (或没有该链长的) 时返回 None.
+    """
+    calibrations = job_calibrations(job_id, store, name)
+    if L is not None:
+        return calibrations.get(L)
+    if len(calibrations) > 1:
+        raise ValueError(f"任务 {job_id} 含链长 {sorted(calibrations)} 的读出校准，请指定 L (或用 job_calibrations)")
+    return next(iter(calibrations.values()), None)
@@ -0,0 +1,190 @@
+import numpy as np
+
+from sediment.marginals import marginal_probabilities, unpack_bits
+
+# ==========================================
+# 🌗 随机测量 / 经典影子 (Randomized Measurements)
+#    在已编译 (ISA) 模板的每个末端测量前插入参数化的单比特基旋转，
+#    测量基 X / Y / Z 只是绑定的角度: 模板只编译一次，M 个随机设置是参数数组里的 M 行.
+#    由同一批 shots 估计任意子系统的纯度 / Rényi-2 熵，以及局域 Pauli 期望值
+# ==========================================
+
+BASES = "XYZ"
+# rz(α) · sx · rz(β) · sx 之后测 Z 等价于测 X / Y / Z (U† Z U = +P，符号已核对)
+BASIS_ANGLES = np.array([[0.0, np.pi / 2], [-np.pi / 2, np.pi / 2], [0.0, np.pi]])
+DEFAULT_SETTINGS = 256
+
+
+def _basis_slot(qc, theta, qubit):
+    qc.rz(theta[0], qubit)
+    qc.sx(qubit)
+    qc.rz(theta[1], qubit)
+    qc.sx(qubit)
+
+
+class ShadowTemplate:
+    """
+    随机测量模板. circuit: 每个测量前插入了基旋转槽的参数化电路 (原参数 + "sh[k]").
+    经典比特 c 的旋转角是 sh[2c], sh[2c+1]，因此测量基按经典比特编号 (与 bitstring 约定一致).
+    """
+
+    def __init__(self, circuit, num_bits, parameters):
+        self.circuit = circuit
+        self.num_bits = num_bits
+        self.parameters = parameters
+
+
+def shadow_template(transpiled):
+    """一次遍历电路，在每个测量前落一个基旋转槽；测量本身与布局不变"""
+    from qiskit.circuit import ParameterVector
+
+    theta = ParameterVector("sh", 2 * transpiled.num_clbits)
+    qc = transpiled.copy_empty_like()
+    for inst in transpiled.data:
+        if inst.operation.name == "measure":
+            clbit = transpiled.find_bit(inst.clbits[0]).index
+            _basis_slot(qc, theta[2 * clbit:2 * clbit + 2], inst.qubits[0])
+        qc.append(inst)
+    # 没被测量的经典比特对应的角度不出现在电路里，assign 时按名字取列即可
+    qc.metadata = dict(transpiled.metadata or {}, shadows=True)
+    return ShadowTemplate(qc, transpiled.num_clbits, list(transpiled.parameters))
+
+
+def random_bases(shape, num_bits, seed=None):
+    """均匀随机的测量基 (..., num_bits)，取值 0/1/2 = X/Y/Z"""
+    return np.random.default_rng(seed).integers(0, 3, size=tuple(shape) + (num_bits,), dtype=np.uint8)
+
+
+def shadow_values(template, values, bases):
+    """
+    values: (n_points, 原参数个数) 的扫描值，bases: (n_points, M, num_bits)
+    -> (n_points, M, 模板参数个数) 的参数数组.
+    """
+    values = np.asarray(values, dtype=float).reshape(-1, len(template.parameters))
+    angles = BASIS_ANGLES[bases].reshape(bases.shape[:-1] + (-1,))
+    full = np.concatenate([np.broadcast_to(values[:, None, :], angles.shape[:2] + values.shape[1:]), angles], -1)
+    column = {p.name: k for k, p in enumerate(template.parameters)}
+    column.update({f"sh[{k}]": len(template.parameters) + k for k in range(angles.shape[-1])})
+    return full[..., [column[p.name] for p in template.circuit.parameters]]
+
+
+def shadow_pub(template, gammas, num_settings=DEFAULT_SETTINGS, shots=None, seed=None):
+    """
+    γ 扫描 × M 个随机设置打包成一个 PUB，参数数组 (n_γ, M, n_params).
+    每个扫描点独立抽测量基；shots 为每个扫描点的总 shots，均分到 M 个设置 (向上取整).
+    返回 (pub, bases)，bases 形状 (n_γ, M, num_bits)，分析时要用.
+    """
+    bases = random_bases((len(gammas), num_settings), template.num_bits, seed)
+    values = shadow_values(template, gammas, bases)
+    if shots is None:
+        return (template.circuit, values), bases
+    return (template.circuit, values, -(-int(shots) // num_settings)), bases
+
+
+def basis_string(bases):
+    """一个设置的测量基 -> 字符串，第 j 个字符是比特 j 的基 (写进扫描点元数据)"""
+    return "".join(BASES[b] for b in bases)
+
+
+def shadow_points(points, bases):
+    """扫描点元数据按 (点, 设置) 展开并记下测量基，与 shadow_pub 的展平顺序一致"""
+    return [dict(point, shadow=k, basis=basis_string(b))
+            for point, point_bases in zip(points, bases) for k, b in enumerate(point_bases)]
+
+
+def archive_bases(archive, pub, shape):
+    """从档案的扫描点元数据取回一个随机测量 PUB 的测量基，形状 shape + (num_bits,)"""
+    rows = sorted((row["index"], row["basis"]) for row in archive.points if row["pub"] == pub and "basis" in row)
+    if not rows:
+        raise ValueError(f"PUB {pub} 不是随机测量 PUB (扫描点没有 basis 标签)")
+    bases = np.array([[BASES.index(c) for c in basis] for _, basis in rows], dtype=np.uint8)
+    return bases.reshape(tuple(shape) + (-1,))
+
+
+# ==========================================
+# 📐 估计量 (全部在 PUB 形状上向量化)
+# ==========================================
+def _distance_kernel(k):
+    """(-2)^{-D(s, s')}，D 为 k 比特结果之间的 Hamming 距离"""
+    s = np.arange(2 ** k)
+    distance = np.array([bin(v).count("1") for v in range(2 ** k)])[s[:, None] ^ s[None, :]]
+    return (-2.0) ** (-distance)
+
+
+def setting_purities(bits, qubits):
+    """
+    每个随机设置各自的无偏纯度估计 (...，最后一维 = 设置):
+    tr ρ_A² ≈ 2^k Σ_{s,s'} (-2)^{-D(s,s')} P(s) P(s')，同一 shot 自身配对的项扣掉 (n(n-1) 归一).
+    只要求测量基均匀随机 (单比特 Clifford 是 2-design)，不需要知道具体是哪个基.
+    """
+    k = len(qubits)
+    n = bits.num_shots
+    counts = marginal_probabilities(bits, qubits) * n
+    quadratic = np.einsum("...s,st,...t->...", counts, _distance_kernel(k), counts)
+    return 2 ** k * (quadratic - n) / (n * (n - 1))
+
+
+def purity(bits, qubits):
+    """子系统纯度 tr ρ_A² 及其标准误 (设置间的涨落)，形状 = bits.shape[:-1]"""
+    per_setting = setting_purities(bits, qubits)
+    settings = per_setting.shape[-1]
+    return per_setting.mean(axis=-1), per_setting.std(axis=-1, ddof=1) / np.sqrt(settings)
+
+
+def renyi2_entropy(bits, qubits):
+    """Rényi-2 熵 S2 = -log2 tr ρ_A² (bit) 及误差传递后的标准误；纯度估计 <= 0 时为 NaN"""
+    p, sigma = purity(bits, qubits)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = np.where(p > 0, -np.log2(p), np.nan)
+        return entropy, sigma / (p * np.log(2))
+
+
+def pauli_expectation(bits, bases, pauli):
+    """
+    经典影子估计局域 Pauli 期望值. pauli: {比特: "X"/"Y"/"Z"}，如 {-2: "Z", -1: "Z"}.
+    每个 shot 的快照值 = Π_j 3 δ(基_j = P_j) (1 - 2 b_j)；bases 形状 = bits.shape + (num_bits,).
+    返回 (估计值, 标准误)，形状 = bits.shape[:-1] (对设置与 shots 一起平均).
+    """
+    qubits = [q % bits.num_bits for q in pauli]
+    wanted = np.array([BASES.index(p) for p in pauli.values()])
+    match = np.all(bases[..., qubits] == wanted, axis=-1)                  # (..., M)
+    signs = np.prod(1 - 2 * unpack_bits(bits)[..., qubits].astype(np.int8), axis=-1)   # (..., M, shots)
+    snapshots = (3.0 ** len(qubits)) * match[..., None] * signs
+    flat = snapshots.reshape(snapshots.shape[:-2] + (-1,))
+    return flat.mean(axis=-1), flat.std(axis=-1, ddof=1) / np.sqrt(flat.shape[-1])
+
+
+if __name__ == "__main__":
+    # 用法: python -m sediment.shadows
+    # 小链离线对照: MPS 采样的随机测量 vs 态矢量精确的视界 Rényi-2 熵 / ⟨Z Z⟩
+    import time
+
+    from qiskit.quantum_info import Statevector, partial_trace
+
+    from sediment.circuits import sediment_template
+    from sediment.mps import MPSSampler
+
+    L, gammas, settings, shots = 8, [0.0, 0.25, 0.5], 200, 100
+    subsystems = {"Q7": [7], "Q6-Q7": [6, 7], "Q5-Q7": [5, 6, 7]}
+    logical = sediment_template(L)
+    template = shadow_template(logical)
+    pub, bases = shadow_pub(template, gammas, settings, settings * shots, seed=7)
+
+    start = time.perf_counter()
+    bits = MPSSampler(seed=11).run([pub]).result()[0].data.meas
+    print(f"⏱️ {len(gammas)} 个 γ x {settings} 个设置 x {shots} shots (MPS): {time.perf_counter() - start:.1f} s")
+
+    unitary = logical.remove_final_measurements(inplace=False)
+    for i, g in enumerate(gammas):
+        state = Statevector(unitary.assign_parameters([g]))
+        zz, zz_err = pauli_expectation(bits[i], bases[i], {6: "Z", 7: "Z"})
+        print(f"   γ={g}:")
+        for label, qubits in subsystems.items():
+            rest = [q for q in range(L) if q not in qubits]
+            rho = partial_trace(state, rest)
+            exact = -np.log2(np.real(np.trace(rho.data @ rho.data)))
+            estimate, sigma = renyi2_entropy(bits[i], qubits)
+            print(f"      S2({label}) = {estimate:.3f} ± {sigma:.3f}   精确 {exact:.3f}")
+        probs = state.probabilities([6, 7])
+        exact_zz = probs[0] - probs[1] - probs[2] + probs[3]
+        print(f"      ⟨Z6 Z7⟩ = {zz:.3f} ± {zz_err:.3f}   精确 {exact_zz:.3f}")
@@ -0,0 +1,331 @@
+import copy
+import json
+
+import numpy as np
+
+from sediment.bootstrap import vertex_replicates
+from sediment.circuits import (FIG7_TROTTER_STEPS, LAYERINGS, fig7_disorder, fig7_ensemble_points, fig7_ensemble_pub,
+                               fig7_ensemble_template, sediment_template, sweep_pub)
+from sediment.layout import chain_layouts
+from sediment.readout import ReadoutCalibration, calibration_pubs
+from sediment.shadows import shadow_points, shadow_pub, shadow_template
+from sediment.store import ResultStore
+from sediment.zne import actual_scales, fold_template, zne_table
+
+# ==========================================
+# 📋 实验声明 (Experiment Spec)
+#    一个 JSON 可序列化的 dict 描述整个实验: 链长、γ、噪声级、shots、Trotter 步数、缓解选项.
+#    由它统一生成 PUB 与扫描点标签，并随任务一起写进档案元数据，
+#    分析时按标签重建网格，不再依赖提交顺序手工数下标
+# ==========================================
+
+KINDS = ("sediment", "fig7")
+DEFAULTS = {
+    "name": None,
+    "kind": "sediment",
+    "backend": "ibm_torino",
+    "lengths": [20],
+    "gammas": [0.25],
+    "noise_levels": [0.0],       # 仅 fig7
+    "realizations": 1,           # 仅 fig7: 每点无序实现数 (shots 均分)
+    "trotter_steps": FIG7_TROTTER_STEPS,
+    "layering": "serial",        # 仅 fig7: Trotter 步内键的排布 (见 sediment.circuits.LAYERINGS)
+    "shots": 8192,               # 每个扫描点的总 shots
+    "seed": 2025,                # 无序抽样 / Pauli 旋转 / 随机测量基的种子
+    "shadows": 0,                # 仅 sediment: 每点随机测量设置数 (shots 均分)，0 = 只测 Z 基
+    "view": None,                # 额外导出的旧格式 JSON: "fss" / "sniper"
+    "mitigation": {
+        "readout": False,        # 同一 job 附带读出校准电路
+        "zne_scales": [1],       # 两比特门折叠倍率，[1] = 关闭
+        "twirls": 0,             # 每点 Pauli 旋转实例数，0 = 关闭
+        "dynamical_decoupling": False,
+    },
+}
+
+EXPERIMENTS = {
+    "preliminary": {
+        "lengths": [20], "gammas": [0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5], "shots": 4096,
+        "mitigation": {"readout": True},
+    },
+    "fig2_sniper": {
+        "lengths": [20], "gammas": [0.22, 0.23, 0.24, 0.25, 0.26, 0.268, 0.27, 0.28], "shots": 8192,
+        "view": "sniper", "mitigation": {"zne_scales": [1, 3, 5], "dynamical_decoupling": True},
+    },
+    "fss": {
+        "lengths": [16, 20, 24, 28], "gammas": [0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28], "shots": 8192,
+        "view": "fss",
+    },
+    "fig7_noise": {
+        "kind": "fig7", "lengths": [20], "gammas": [0.22, 0.23, 0.24, 0.25, 0.26, 0.27, 0.28],
+        "noise_levels": [0.0, 0.05, 0.10], "realizations": 16, "shots": 8192, "layering": "even-odd",
+    },
+    "horizon_shadows": {
+        "lengths": [20], "gammas": [0.0, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5], "shots": 16384, "shadows": 256,
+    },
+}
+
+VIEW_FILENAMES = {"fss": "fss_scaling_data.json", "sniper": "sniper_evidence_0268.json"}
+AXES = ("L", "scale", "noise", "gamma", "realization")
+_AXIS_DEFAULTS = {"scale": 1.0, "noise": 0.0, "realization": 0}
+
+
+# ==========================================
+# 🧾 构造 / 校验 / 读取
+# ==========================================
+def make_spec(spec, **overrides):
+    """在 DEFAULTS 上依次叠加 spec 与 overrides (mitigation 逐项合并)，校验后返回新 dict"""
+    merged = copy.deepcopy(DEFAULTS)
+    for source in (spec, overrides):
+        for key, value in copy.deepcopy(source).items():
+            if key == "mitigation":
+                merged["mitigation"].update(value)
+            else:
+                merged[key] = value
+    validate_spec(merged)
+    return merged
+
+
+def experiment_spec(name, **overrides):
+    """注册表里的实验 (EXPERIMENTS[name]) + 覆盖项"""
+    if name not in EXPERIMENTS:
+        raise KeyError(f"未知实验 {name}，可选: {sorted(EXPERIMENTS)}")
+    return make_spec(dict(EXPERIMENTS[name], name=name), **overrides)
+
+
+def validate_spec(spec):
+    unknown = set(spec) - set(DEFAULTS)
+    unknown_m = set(spec["mitigation"]) - set(DEFAULTS["mitigation"])
+    if unknown or unknown_m:
+        raise ValueError(f"spec 含未知字段: {sorted(unknown | unknown_m)}")
+    if not spec["name"]:
+        raise ValueError("spec 必须有 name (用作扫描点标签)")
+    if spec["kind"] not in KINDS:
+        raise ValueError(f"kind 必须是 {KINDS} 之一，收到 {spec['kind']}")
+    if not spec["lengths"] or not spec["gammas"]:
+        raise ValueError(f"[{spec['name']}] lengths / gammas 不能为空")
+    if spec["shots"] < 1 or spec["realizations"] < 1 or spec["mitigation"]["twirls"] < 0 or spec["shadows"] < 0:
+        raise ValueError(f"[{spec['name']}] shots / realizations / twirls / shadows 取值无效")
+    if spec["kind"] == "fig7" and (spec["mitigation"]["twirls"] or spec["shadows"]):
+        raise ValueError(f"[{spec['name']}] fig7 无序系综暂不支持 Pauli 旋转 / 随机测量")
+    if spec["shadows"] and spec["mitigation"]["twirls"]:
+        raise ValueError(f"[{spec['name']}] 随机测量与 Pauli 旋转不能同时开启 (参数数组的最后一轴只有一个)")
+    if spec["layering"] not in LAYERINGS:
+        raise ValueError(f"[{spec['name']}] layering 必须是 {LAYERINGS} 之一")
+    if spec["view"] not in (None, *VIEW_FILENAMES):
+        raise ValueError(f"[{spec['name']}] 未知视图 {spec['view']}")
+
+
+def load_specs(source):
+    """
+    source: 注册表里的实验名，或 JSON 文件 (单个 spec 或 spec 列表).
+    文件中的 spec 可用 "base": "<实验名>" 继承注册表条目，只写差异.
+    """
+    if source in EXPERIMENTS:
+        return [experiment_spec(source)]
+    with open(source) as f:
+        data = json.load(f)
+    specs = []
+    for entry in data if isinstance(data, list) else [data]:
+        entry = dict(entry)
+        base = entry.pop("base", None)
+        # 先展开注册表条目再叠加文件里的差异 (文件里可以改名)
+        specs.append(make_spec(experiment_spec(base), **entry) if base else make_spec(entry))
+    return specs
+
+
+def job_spec(job_id, store=None, name=None):
+    """从结果仓库的档案元数据取回提交时的 spec；任务未落盘或旧任务没有 spec 时返回 None"""
+    store = store or ResultStore()
+    if job_id not in store:
+        return None
+    specs = store.archive(job_id).metadata.get("specs") or []
+    for spec in specs:
+        if name is None or spec["name"] == name:
+            return make_spec(spec)
+    return None
+
+
+# ==========================================
+# 🛠️ 电路 / PUB / 扫描点
+# ==========================================
+def spec_templates(spec):
+    if spec["kind"] == "fig7":
+        return [fig7_ensemble_template(L, spec["trotter_steps"], spec["layering"]) for L in spec["lengths"]]
+    return [sediment_template(L) for L in spec["lengths"]]
+
+
+def compile_spec(spec, backend=None, cache=None, max_workers=None, pin_layout=True):
+    """
+    backend=None 时返回逻辑电路 (MPS 离线模拟直接可用).
+    pin_layout: 按校准数据选最优链作为初始布局 (sediment.layout)，否则交给 level-3 布局搜索.
+    """
+    templates = spec_templates(spec)
+    if backend is None:
+        return templates
+    from sediment.transpile import transpile_sweep
+
+    layouts = chain_layouts(templates, backend) if pin_layout else None
+    return transpile_sweep(templates, backend, max_workers=max_workers, cache=cache, layouts=layouts)
+
+
+def _sweep_points(spec, L, scale, bases=None):
+    """bases: 随机测量 PUB 实际抽到的测量基；不给时只生成 (γ, 设置) 标签"""
+    row = {"experiment": spec["name"], "L": L, "scale": scale}
+    if spec["kind"] == "fig7":
+        return [dict(row, **p) for p in fig7_ensemble_points(L, spec["noise_levels"], spec["gammas"],
+                                                             spec["realizations"])]
+    if bases is not None:
+        return shadow_points([dict(row, gamma=g) for g in spec["gammas"]], bases)
+    if spec["shadows"]:
+        return [dict(row, gamma=g, shadow=k) for g in spec["gammas"] for k in range(spec["shadows"])]
+    twirls = spec["mitigation"]["twirls"]
+    if twirls:
+        return [dict(row, gamma=g, twirl=k) for g in spec["gammas"] for k in range(twirls)]
+    return [dict(row, gamma=g) for g in spec["gammas"]]
+
+
+def _calibration_points(spec, L):
+    return [{"experiment": spec["name"], "L": L, "readout_cal": state} for state in (0, 1)]
+
+
+def spec_points(spec):
+    """不建电路、只按名义倍率生成扫描点标签 (拉取旧任务时用)"""
+    points = []
+    for L in spec["lengths"]:
+        for scale in spec["mitigation"]["zne_scales"]:
+            points += _sweep_points(spec, L, float(scale))
+        if spec["mitigation"]["readout"]:
+            points += _calibration_points(spec, L)
+    return points
+
+
+def build_pubs(spec, circuits):
+    """
+    circuits: 每个链长一个 (已编译或逻辑) 电路，顺序同 spec["lengths"].
+    返回 (pubs, points): 每个 (L, 折叠倍率) 一个扫描 PUB，之后是该 L 的读出校准 PUB.
+    """
+    mitigation = spec["mitigation"]
+    pubs, points = [], []
+    for L, circuit in zip(spec["lengths"], circuits):
+        folded = fold_template(circuit, mitigation["zne_scales"])
+        for fc, scale in zip(folded, actual_scales(folded)):
+            bases = None
+            if spec["kind"] == "fig7":
+                disorder = fig7_disorder(L, spec["noise_levels"], spec["realizations"], seed=spec["seed"],
+                                         steps=spec["trotter_steps"])
+                pubs.append(fig7_ensemble_pub(fc, spec["gammas"], disorder,
+                                              shots=spec["shots"] // spec["realizations"]))
+            elif mitigation["twirls"]:
+                from sediment.twirling import twirl_template, twirled_pub
+                pubs.append(twirled_pub(twirl_template(fc), spec["gammas"], mitigation["twirls"],
+                                        shots=spec["shots"], seed=spec["seed"] + len(pubs)))
+            elif spec["shadows"]:
+                pub, bases = shadow_pub(shadow_template(fc), spec["gammas"], spec["shadows"],
+                                        shots=spec["shots"], seed=spec["seed"] + len(pubs))
+                pubs.append(pub)
+            else:
+                pubs.append(sweep_pub(fc, spec["gammas"], spec["shots"]))
+            points += _sweep_points(spec, L, scale, bases)
+        if mitigation["readout"]:
+            pubs += calibration_pubs(circuit, spec["shots"])
+            points += _calibration_points(spec, L)
+    return pubs, points
+
+
+def build_batch(specs, circuits):
+    """多个实验合并成一次提交: PUB / 扫描点依次拼接，扫描点的 experiment 标签区分来源"""
+    pubs, points = [], []
+    for spec, spec_circuits in zip(specs, circuits):
+        p, pts = build_pubs(spec, spec_circuits)
+        pubs += p
+        points += pts
+    return pubs, points
+
+
+def job_metadata(specs, backend_label, **extra):
+    return dict(extra, backend=backend_label, specs=specs)
+
+
+# ==========================================
+# 📊 按标签重建网格
+# ==========================================
+def spec_pubs(archive, name=None):
+    """一个实验的扫描 PUB 序号 (不含读出校准)，用于从合并提交的结果里挑出该实验"""
+    return sorted({row["pub"] for row in archive.points
+                   if row.get("experiment", name) == name and "readout_cal" not in row})
+
+
+def spec_grid(archive, name=None, qubit=-1):
+    """
+    档案中一个实验的扫描点 -> 带标签网格，轴顺序 AXES = (L, scale, noise, gamma, realization).
+    Pauli 旋转实例的 shots 直接累加到同一格，随机测量设置只累加该比特恰好测 Z 基的那些；
+    有读出校准 PUB 时附带逐比特缓解后的 P(1).
+    旧档案缺少的标签取默认值 (scale=1, noise=0, realization=0)，没有 experiment 标签的点视为属于该实验.
+    """
+    rows = [(k, row) for k, row in enumerate(archive.points) if name is None or row.get("experiment", name) == name]
+    data = [(k, row) for k, row in rows if "readout_cal" not in row]
+    label = lambda row, axis: row.get(axis, _AXIS_DEFAULTS.get(axis))
+    axes = {axis: list(dict.fromkeys(label(row, axis) for _, row in data)) for axis in AXES}
+    lookup = {axis: {value: i for i, value in enumerate(values)} for axis, values in axes.items()}
+
+    shape = tuple(len(values) for values in axes.values())
+    ones = np.zeros(shape, dtype=np.int64)
+    shots = np.zeros(shape, dtype=np.int64)
+    for k, row in data:
+        if "basis" in row and row["basis"][qubit] != "Z":
+            continue
+        index = tuple(lookup[axis][label(row, axis)] for axis in AXES)
+        column = archive.bit_column(k, qubit)
+        ones[index] += int(column.sum())
+        shots[index] += column.size
+    p1 = ones / np.maximum(shots, 1)
+
+    calibrations = {}
+    for L in axes["L"]:
+        cal = {row["readout_cal"]: k for k, row in rows if "readout_cal" in row and row.get("L") == L}
+        if set(cal) == {0, 1}:
+            calibrations[L] = ReadoutCalibration.from_bits(archive.bits(cal[0]), archive.bits(cal[1]))
+    p1_mitigated = None
+    if calibrations:
+        p1_mitigated = p1.copy()
+        for i, L in enumerate(axes["L"]):
+            if L in calibrations:
+                p1_mitigated[i] = calibrations[L].mitigate_p1(p1[i], qubit)
+    return {"experiment": name, "axes": axes, "ones": ones, "shots": shots, "p1": p1,
+            "p1_mitigated": p1_mitigated, "calibrations": calibrations}
+
+
+def grid_view(grid, job_id, spec):
+    """网格 -> 通用 JSON；折叠倍率 > 1 个时附带各外推方法的 ZNE 结果"""
+    view = {
+        "job_id": job_id,
+        "experiment": grid["experiment"],
+        "spec": spec,
+        "axes": grid["axes"],
+        "p1": grid["p1"].tolist(),
+        "shots": grid["shots"].tolist(),
+        "p1_mitigated": None if grid["p1_mitigated"] is None else grid["p1_mitigated"].tolist(),
+        "readout": {str(L): cal.to_dict() for L, cal in grid["calibrations"].items()},
+        "zne": None,
+    }
+    scales = grid["axes"]["scale"]
+    if len(scales) > 1:
+        p1 = grid["p1"] if grid["p1_mitigated"] is None else grid["p1_mitigated"]
+        view["zne"] = {"scales": scales,
+                       "table": zne_table(scales, np.moveaxis(p1, 1, 0), np.moveaxis(grid["shots"], 1, 0))}
+    return view
+
+
+def legacy_view(grid, job_id, spec, backend=None):
+    """figS*.py 读取的旧格式: fss_scaling_data.json / sniper_evidence_0268.json (倍率 1、无噪声、第一个实现)"""
+    s = int(np.argmin(grid["axes"]["scale"]))   # 未折叠的原电路，不依赖倍率在档案里出现的顺序
+    p1 = grid["p1"][:, s, 0, :, 0]
+    shots = grid["shots"][:, s, 0, :, 0]
+    gammas = grid["axes"]["gamma"]
+    if spec["view"] == "fss":
+        raw = {f"L{L}": {"cfs": gammas, "probs": p1[i].tolist(), "shots": shots[i].tolist()}
+               for i, L in enumerate(grid["axes"]["L"])}
+        return {"job_id": job_id, "raw": raw, "scaling": vertex_replicates(p1, gammas).tolist()}
+    k = int(np.argmin(p1[0]))
+    return {"job_id": job_id, "backend": backend, "parameters": gammas, "results": p1[0].tolist(),
+            "highlight": {"min_prob": float(p1[0, k]), "min_cf": gammas[k]}}
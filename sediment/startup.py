@@ -0,0 +1,239 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# ==========================================
+# ⏱️ 启动时间回归检查 (Startup Budget)
+#    从本地档案重画图的入口不应导入 qiskit / qiskit_ibm_runtime / scipy:
+#    先用随机 shots 合成一个小型夹具仓库 (每个实验一个任务，外加各脚本读的 JSON)，
+#    再在全新子进程里导入每个脚本、把 JOB_ID 指向夹具任务、真正调用它的重画函数，
+#    导入耗时对照预算，重画结束后检查 sys.modules 里出现了哪些重依赖.
+#    matplotlib / numpy 先行导入、不计入预算 (画图本来就要).
+#    用法: python -m sediment.startup [job_id]   (给 job_id 时再计时一次 python -m sediment analyze)
+#    有回归时退出码为 1
+# ==========================================
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORBIDDEN = ("qiskit", "qiskit_ibm_runtime", "scipy")
+IMPORT_BUDGET = 0.3     # 秒，matplotlib / numpy 之外的导入时间
+ANALYZE_BUDGET = 1.0    # 秒，python -m sediment analyze 的整个进程 (含解释器启动)
+REPEATS = 3             # 导入计时取最快一次，压掉单核机器上的调度抖动
+
+# 夹具: 每个实验一个合成任务 (shots 很少，只求走通重画路径)
+FIXTURE_SPECS = {
+    "preliminary": {"shots": 256},
+    "fig2_sniper": {"shots": 256},
+    "fig7_noise": {"shots": 256, "realizations": 2},
+    "horizon_shadows": {"shots": 256, "shadows": 4},
+    "fss": {"shots": 256},
+}
+FIXTURE_SEED = 2025
+
+
+
+def fixture_job(name):
+    """实验名 -> 夹具任务的 job ID"""
+    return f"fixture-{name}"
+
+
+# (入口, 重画调用, 覆盖的脚本全局量, 允许加载的重依赖)
+# 重画调用在脚本的模块命名空间里执行，另有 JOBS (实验名 -> 夹具 job ID) 与 load(job_id) 可用；
+# 覆盖量把 JOB_ID 指向夹具任务，并把 bootstrap 次数压到够走通即可
+ENTRY_POINTS = [
+    ("sediment.cli", "main(['analyze', JOBS['fig2_sniper'], '--out-dir', '.'])", {}, ()),
+    ("data analysis/plot_fig2_sniper.py", "analyze_and_plot()",
+     {"JOB_ID": fixture_job("fig2_sniper"), "N_BOOTSTRAP": 200}, ()),
+    ("data analysis/plot_fig7_noise.py", "fetch_and_plot()", {"JOB_ID": fixture_job("fig7_noise")}, ()),
+    ("data analysis/figS3.py", "plot_fig_s3()", {}, ()),
+    # 塌缩拟合本身就是 scipy 的 Nelder-Mead
+    ("data analysis/figS4.py", "main()", {"N_BOOTSTRAP": 8}, ("scipy",)),
+    ("raw data/analysis_density_profile.py", "reanalyze_sediment()", {}, ()),
+    ("raw data/analysis_horizon_temperature.py", "analyze_horizon_temperature()",
+     {"JOB_ID": fixture_job("preliminary")}, ()),
+    ("raw data/analysis_horizon_entropy.py", "analyze_horizon_entropy()",
+     {"JOB_ID": fixture_job("horizon_shadows")}, ()),
+    ("exp_fig5_finite_size_scaling.py", "analyze_and_plot(load(JOBS['fss']), JOBS['fss'])", {"N_BOOTSTRAP": 200}, ()),
+    ("exp_preliminary_sedimentation.py",
+     "analyze_job_result(load(JOBS['preliminary']), JOBS['preliminary'])", {}, ()),
+]
+
+_PROBE = """
+import importlib, importlib.util, json, sys, time
+import matplotlib.pyplot, numpy
+start = time.perf_counter()
+if PATH.endswith(".py"):
+    spec = importlib.util.spec_from_file_location("startup_probe", PATH)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+else:
+    module = importlib.import_module(PATH)
+imported = time.perf_counter() - start
+on_import = [m for m in FORBIDDEN if m in sys.modules]
+replot = None
+if REPLOT:
+    for name, value in OVERRIDES.items():
+        setattr(module, name, value)
+    from sediment.store import ResultStore
+    namespace = dict(vars(module), JOBS=JOBS, load=lambda job_id: ResultStore().load(job_id, lite=True))
+    start = time.perf_counter()
+    exec(CALL, namespace)
+    replot = time.perf_counter() - start
+print(json.dumps({"seconds": imported, "replot": replot, "on_import": on_import,
+                  "loaded": [m for m in FORBIDDEN if m in sys.modules]}))
+"""
+
+
+def _fixture_p1(row):
+    """合成信号: 视界 P(1) 在 γ ≈ 0.25 处有井，随噪声 / 折叠倍率抬高；读出校准点近似 0 / 1"""
+    if "readout_cal" in row:
+        return 0.96 if row["readout_cal"] else 0.02
+    p = 0.05 + 2 * (row.get("gamma", 0.25) - 0.25) ** 2 + row.get("noise", 0.0)
+    return min(p * (1 + 0.1 * (row.get("scale", 1.0) - 1)), 0.5)
+
+
+def _fixture_pubs(spec, points):
+    """扫描点按 (L, 折叠倍率) 分组成 PUB，读出校准每个状态一个 PUB，返回 [(形状, shots, 点序号)]"""
+    pubs = []
+    for k, row in enumerate(points):
+        key = ("cal", row["L"], row["readout_cal"]) if "readout_cal" in row else (row["L"], row["scale"])
+        if pubs and pubs[-1][0] == key:
+            pubs[-1][1].append(k)
+        else:
+            pubs.append((key, [k]))
+    shaped = []
+    for key, rows in pubs:
+        if key[0] == "cal":
+            shaped.append(((), spec["shots"], rows))
+        elif spec["shadows"]:
+            shaped.append(((len(spec["gammas"]), spec["shadows"]), spec["shots"] // spec["shadows"], rows))
+        else:
+            shaped.append(((len(rows),), spec["shots"] // spec["realizations"], rows))
+    return shaped
+
+
+def build_fixtures(directory, seed=FIXTURE_SEED):
+    """
+    在 directory 下合成夹具: store/ (每个实验一个任务档案) 以及重画脚本直接读的 JSON
+    (fss / sniper 视图由 sediment.cli.analyze_job 导出，sediment_data_torino.json 只写脚本要的字段).
+    返回 {实验名: job ID}
+    """
+    from sediment.cli import analyze_job
+    from sediment.containers import LocalDataBin, LocalPubResult, LocalResult, PackedBits
+    from sediment.shadows import BASES, basis_string
+    from sediment.spec import experiment_spec, job_metadata, spec_points
+    from sediment.store import ResultStore
+
+    rng = np.random.default_rng(seed)
+    store = ResultStore(os.path.join(directory, "store"))
+    jobs = {}
+    for name, overrides in FIXTURE_SPECS.items():
+        spec = experiment_spec(name, **overrides)
+        points = spec_points(spec)
+        pub_results = []
+        for shape, shots, rows in _fixture_pubs(spec, points):
+            L = points[rows[0]]["L"]
+            num_bytes = (L + 7) // 8
+            p1 = np.array([_fixture_p1(points[k]) for k in rows])
+            bits = rng.random((len(rows), shots, L)) < p1[:, None, None]
+            # BitArray 格式: 高位字节在前，空出来的填充位在第一个字节的高位
+            padded = np.zeros((len(rows), shots, num_bytes * 8), dtype=bool)
+            padded[..., num_bytes * 8 - L:] = bits
+            packed = np.packbits(padded, axis=-1).reshape(tuple(shape) + (shots, num_bytes))
+            pub_results.append(LocalPubResult(LocalDataBin(shape, meas=PackedBits(packed, L))))
+            if spec["shadows"] and "readout_cal" not in points[rows[0]]:
+                for k in rows:
+                    points[k]["basis"] = basis_string(rng.integers(len(BASES), size=L))
+        job_id = fixture_job(name)
+        store.save(job_id, LocalResult(pub_results), metadata=job_metadata([spec], "fixture", offline=True),
+                   points=points)
+        jobs[name] = job_id
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name in ("fss", "fig2_sniper"):
+            analyze_job(jobs[name], store, directory)
+    preliminary = experiment_spec("preliminary")
+    with open(os.path.join(directory, "sediment_data_torino.json"), "w") as f:
+        json.dump({"job_id": jobs["preliminary"], "backend": "fixture",
+                   "parameters": {"cooling_sweep": preliminary["gammas"],
+                                  "chain_length": preliminary["lengths"][0]}}, f, indent=4)
+    return jobs
+
+
+def probe(entry, call, overrides, jobs, fixtures):
+    """
+    全新进程里导入入口并对夹具执行重画，返回 {seconds, replot, on_import, loaded}.
+    导入计时重复 REPEATS 次取最快，重画只在第一次执行
+    """
+    path = entry if not entry.endswith(".py") else os.path.join(ROOT, entry)
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONPATH=ROOT, SEDIMENT_OFFLINE="1",
+               SEDIMENT_RESULTS_DIR=os.path.join(fixtures, "store"),
+               SEDIMENT_JOB_TABLE=os.path.join(fixtures, "jobs.json"))
+    runs = []
+    for k in range(REPEATS):
+        code = (f"PATH = {path!r}\nCALL = {call!r}\nOVERRIDES = {overrides!r}\nJOBS = {jobs!r}\n"
+                f"FORBIDDEN = {FORBIDDEN!r}\nREPLOT = {k == 0}\n" + _PROBE)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=fixtures)
+        if out.returncode != 0:
+            raise RuntimeError(f"{entry} {'重画' if k == 0 else '导入'}失败:\n{out.stderr}")
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return dict(runs[0], seconds=min(r["seconds"] for r in runs))
+
+
+def time_analyze(job_id):
+    """python -m sediment analyze 的整个进程耗时 (输出写到临时目录)"""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    best = None
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-m", "sediment", "analyze", job_id, "--out-dir", out_dir],
+                                 capture_output=True, text=True, env=env)
+            elapsed = time.perf_counter() - start
+            if out.returncode != 0:
+                raise RuntimeError(f"analyze {job_id} 失败:\n{out.stderr}")
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check(job_id=None, entries=ENTRY_POINTS, verbose=True):
+    """返回回归列表 (空 = 通过)"""
+    failures = []
+    with tempfile.TemporaryDirectory() as fixtures:
+        jobs = build_fixtures(fixtures)
+        for entry, call, overrides, allowed in entries:
+            result = probe(entry, call, overrides, jobs, fixtures)
+            loaded = [m for m in result["loaded"] if m not in allowed]
+            ok = result["seconds"] <= IMPORT_BUDGET and not result["on_import"] and not loaded
+            if verbose:
+                extra = f"  ⚠️ 导入时加载了 {', '.join(result['on_import'])}" if result["on_import"] else ""
+                extra += f"  ⚠️ 重画时加载了 {', '.join(loaded)}" if loaded else ""
+                print(f"   {'✅' if ok else '❌'} {entry:<44} 导入 {result['seconds'] * 1e3:7.1f} ms"
+                      f" | 重画 {result['replot'] * 1e3:8.1f} ms{extra}")
+            if not ok:
+                failures.append(entry)
+    if job_id is not None:
+        seconds = time_analyze(job_id)
+        ok = seconds <= ANALYZE_BUDGET
+        if verbose:
+            print(f"   {'✅' if ok else '❌'} {'python -m sediment analyze ' + job_id:<44} {seconds * 1e3:7.1f} ms")
+        if not ok:
+            failures.append(f"analyze {job_id}")
+    return failures
+
+
+if __name__ == "__main__":
+    print(f"⏱️ 入口导入预算 {IMPORT_BUDGET * 1e3:.0f} ms (matplotlib / numpy 除外)，"
+          f"对合成夹具重画后不得加载 {', '.join(FORBIDDEN)}")
+    failures = check(sys.argv[1] if len(sys.argv) > 1 else None)
+    if failures:
+        print(f"❌ {len(failures)} 个入口回归: {failures}")
+        sys.exit(1)
+    print("✅ 全部入口在预算内")
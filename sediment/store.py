@@ -0,0 +1,91 @@
+import json
+import os
+
+from sediment.archive import MANIFEST, ShotArchive, write_archive
+
+# ==========================================
+# 🗄️ 本地结果仓库 (Job Result Store)
+#    第一次拉取任务时把完整的原始 shot 数据落盘，之后一律离线读取
+# ==========================================
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sediment", "results")
+
+
+class ResultStore:
+    """每个 job 一个列式 shot 档案目录: <store>/<job_id>/ (格式见 sediment.archive)"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get("SEDIMENT_RESULTS_DIR", DEFAULT_STORE_DIR)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def __contains__(self, job_id):
+        return os.path.exists(os.path.join(self.path(job_id), MANIFEST))
+
+    def save(self, job_id, results, metadata=None, points=None):
+        write_archive(self.path(job_id), results, points=points, job_id=job_id, metadata=metadata)
+
+    def archive(self, job_id):
+        """mmap 方式打开，可按 γ / 比特切片而不载入整个任务"""
+        return ShotArchive(self.path(job_id))
+
+    def header(self, job_id):
+        return self.archive(job_id).manifest
+
+    def update_metadata(self, job_id, **fields):
+        """给已落盘的任务补记元数据 (例如旧任务补上实验 spec)，shot 数据不动"""
+        manifest = self.header(job_id)
+        manifest["metadata"].update(fields)
+        self._write_manifest(job_id, manifest)
+
+    def update_points(self, job_id, points):
+        """
+        给已落盘的任务补写扫描点标签 (L / γ / 倍率 ...)，顺序同提交顺序，数量必须与档案一致；
+        每行的 pub / index / shots 保持不变
+        """
+        manifest = self.header(job_id)
+        if len(points) != len(manifest["points"]):
+            raise ValueError(f"任务 {job_id} 档案里有 {len(manifest['points'])} 个扫描点，"
+                             f"给出的标签有 {len(points)} 个，对不上")
+        manifest["points"] = [dict(extra, pub=row["pub"], index=row["index"], shots=row["shots"])
+                              for row, extra in zip(manifest["points"], points)]
+        self._write_manifest(job_id, manifest)
+
+    def _write_manifest(self, job_id, manifest):
+        path = os.path.join(self.path(job_id), MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def load(self, job_id, lite=False):
+        """重建与 job.result() 同构的 PrimitiveResult (lite=True: 轻量容器，不导入 qiskit)"""
+        return self.archive(job_id).to_result(lite)
+
+
+def fetch_result(job_id, store=None, service=None, points=None, lite=False):
+    """
+    本地有就直接读盘 (毫秒级、可离线)；否则去 IBM 拉一次并落盘.
+    points 为各扫描点的元数据 (L / γ / 噪声)，第一次落盘时写进档案.
+    lite: 本地命中时返回轻量容器 (只画图时用，启动不导入 qiskit)；从 IBM 拉取时总是原始结果.
+    """
+    store = store or ResultStore()
+    if job_id in store:
+        return store.load(job_id, lite)
+
+    if service is None:
+        from qiskit_ibm_runtime import QiskitRuntimeService
+        service = QiskitRuntimeService()
+    job = service.job(job_id)
+    results = job.result()
+    store.save(job_id, results, metadata={"backend": _backend_name(job)}, points=points)
+    return results
+
+
+def _backend_name(job):
+    try:
+        backend = job.backend()
+        return getattr(backend, "name", str(backend))
+    except Exception:
+        return None
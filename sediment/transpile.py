@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+
+# ==========================================
+# 🛠️ 编译阶段 (Transpilation Stage)
+#    单模板编译 + 整个扫描矩阵的多进程并行编译.
+#    传入初始布局 (sediment.layout.chain_layout) 时跳过布局搜索，链上不插 SWAP
+# ==========================================
+
+DEFAULT_SEED = 2025  # 固定 seed_transpiler，保证同一电路每次编译结果一致
+
+
+def transpile_template(template, backend, optimization_level=3, pass_manager=None, cache=None,
+                       seed_transpiler=DEFAULT_SEED, initial_layout=None):
+    """
+    每个 (链长, 后端) 只跑一次 level-3 编译.
+    传入 cache (sediment.cache.TranspileCache) 时先查盘，命中则完全跳过编译;
+    自定义 pass_manager 的配置无法进入缓存键，因此不走缓存.
+    initial_layout: 逻辑比特 k -> 物理比特 initial_layout[k].
+    """
+    use_cache = cache is not None and pass_manager is None
+    if use_cache:
+        key = cache.key(template, backend, optimization_level, seed_transpiler, initial_layout)
+        cached = cache.get(key, backend)
+        if cached is not None:
+            return cached
+
+    if pass_manager is None:
+        pass_manager = generate_preset_pass_manager(backend=backend, optimization_level=optimization_level,
+                                                    seed_transpiler=seed_transpiler, initial_layout=initial_layout)
+    transpiled = pass_manager.run(template)
+
+    if use_cache:
+        cache.put(key, backend, transpiled)
+    return transpiled
+
+
+# --- 进程池 worker: 每个进程只构建一次 pass manager (固定布局的模板各建一个) ---
+_WORKER_PM = None
+_WORKER_ARGS = None
+
+
+def _pass_manager(target, optimization_level, seed_transpiler, initial_layout=None):
+    return generate_preset_pass_manager(target=target, optimization_level=optimization_level,
+                                        seed_transpiler=seed_transpiler, initial_layout=initial_layout)
+
+
+def _init_worker(target, optimization_level, seed_transpiler):
+    global _WORKER_PM, _WORKER_ARGS
+    _WORKER_ARGS = (target, optimization_level, seed_transpiler)
+    _WORKER_PM = _pass_manager(*_WORKER_ARGS)
+
+
+def _run_worker(task):
+    circuit, layout = task
+    if layout is None:
+        return _WORKER_PM.run(circuit)
+    return _pass_manager(*_WORKER_ARGS, layout).run(circuit)
+
+
+def transpile_sweep(templates, backend, optimization_level=3, max_workers=None, cache=None,
+                    seed_transpiler=DEFAULT_SEED, layouts=None):
+    """
+    并行编译一组模板，按提交顺序返回.
+    缓存命中的电路不进进程池；只剩 0~1 个需要编译或 max_workers=1 时直接在本进程串行.
+    layouts: 每个模板的初始布局 (None 表示交给 level-3 布局搜索)，见 sediment.layout.chain_layouts.
+    """
+    templates = list(templates)
+    layouts = list(layouts) if layouts is not None else [None] * len(templates)
+    transpiled = [None] * len(templates)
+    keys = [None] * len(templates)
+    pending = []
+
+    for i, template in enumerate(templates):
+        if cache is not None:
+            keys[i] = cache.key(template, backend, optimization_level, seed_transpiler, layouts[i])
+            transpiled[i] = cache.get(keys[i], backend)
+        if transpiled[i] is None:
+            pending.append(i)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(pending))
+
+    if not pending:
+        compiled = []
+    elif max_workers <= 1:
+        # 与 worker 一样从 target 构建，保证串行/并行结果一致
+        args = (backend.target, optimization_level, seed_transpiler)
+        pm = _pass_manager(*args)
+        compiled = [(pm if layouts[i] is None else _pass_manager(*args, layouts[i])).run(templates[i])
+                    for i in pending]
+    else:
+        # 用 spawn: qiskit 的 Rust 线程池在 fork 之后会死锁
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(backend.target, optimization_level, seed_transpiler)) as pool:
+            compiled = list(pool.map(_run_worker, [(templates[i], layouts[i]) for i in pending]))
+
+    for i, circuit in zip(pending, compiled):
+        transpiled[i] = circuit
+        if cache is not None:
+            cache.put(keys[i], backend, circuit)
+    return transpiled
@@ -0,0 +1,191 @@
+import numpy as np
+from qiskit.circuit import ParameterVector
+from qiskit.primitives import PrimitiveResult, SamplerPubResult
+from qiskit.primitives.containers import BitArray, DataBin
+from qiskit.quantum_info import Clifford, Pauli
+
+# ==========================================
+# 🎲 Pauli 旋转 / 随机编译 (Randomized Compiling)
+#    在已编译 (ISA) 电路的每个 Clifford 两比特门前后插入参数化的 Pauli 帧:
+#    G = (G P G†) · G · P，相干误差被随机化成 Pauli 通道.
+#    模板只建一次，K 个旋转实例只是参数数组里的 K 行；合并后每个扫描点一份计数
+# ==========================================
+
+DEFAULT_TWIRLS = 32
+_TRANSPARENT_OPS = {"barrier"}   # Pauli 帧可以直接越过
+
+
+def _conjugation_map(operation):
+    """
+    G P G† 在 (x0, x1, z0, z1) 比特上的 GF(2) 线性映射 (4x4)，忽略相位.
+    非 Clifford 两比特门返回 None (不旋转).
+    """
+    try:
+        clifford = Clifford(operation)
+    except Exception:
+        return None
+    columns = []
+    for k in range(4):
+        x, z = np.zeros(2, dtype=bool), np.zeros(2, dtype=bool)
+        (x if k < 2 else z)[k % 2] = True
+        out = Pauli((z, x)).evolve(clifford, frame="s")
+        columns.append(np.concatenate([out.x, out.z]))
+    return np.array(columns, dtype=np.uint8).T
+
+
+def _pauli_slot(qc, theta, qubit):
+    """
+    参数化 Pauli: rz(α) · sx · rz(β) · sx，全是原生门.
+    β = 0 时为 X·Z^{α/π}，β = π 时为 Z·Z^{α/π} (sx Z sx = Z)，四种取值覆盖 I/X/Y/Z.
+    """
+    qc.rz(theta[0], qubit)
+    qc.sx(qubit)
+    qc.rz(theta[1], qubit)
+    qc.sx(qubit)
+
+
+class TwirlTemplate:
+    """
+    旋转模板. circuit: 插入了 Pauli 槽的参数化电路 (原参数 + "tw[k]").
+    frame_map: (2 * 槽数, 4 * 旋转门数) 的 GF(2) 矩阵，把每个门前随机抽的 Pauli 比特
+    映射到每个槽的 (x, z) —— 门后的修正帧已经通过共轭映射折进来，
+    与下一个门的前帧直接相连时合并成一个槽.
+    """
+
+    def __init__(self, circuit, frame_map, num_gates, parameters):
+        self.circuit = circuit
+        self.frame_map = frame_map
+        self.num_gates = num_gates
+        self.parameters = parameters
+
+    @property
+    def num_slots(self):
+        return self.frame_map.shape[0] // 2
+
+
+def twirl_template(transpiled):
+    """
+    一次遍历电路生成旋转模板. 每个比特维护一个 '待插入' 的 GF(2) 帧 (门后修正)，
+    遇到单比特门 / 测量 / 电路末尾时落成一个槽，遇到下一个两比特门时并入其前帧.
+    """
+    gates = {}       # 指令位置 -> 旋转门序号
+    maps = {}
+    for pos, inst in enumerate(transpiled.data):
+        op = inst.operation
+        if op.num_qubits == 2 and op.name not in _TRANSPARENT_OPS:
+            if op.name not in maps:
+                maps[op.name] = _conjugation_map(op)
+            if maps[op.name] is not None:
+                gates[pos] = len(gates)
+    n_bits = 4 * len(gates)
+    index = lambda q: transpiled.find_bit(q).index
+    pending = {}
+    slots = []       # 每个槽: (qubit, 2 x n_bits 的 GF(2) 行)
+    body = []        # (kind, payload)，kind = "inst" 或 "slot"
+
+    def flush(q):
+        rows = pending.pop(q, None)
+        if rows is not None and rows.any():
+            body.append(("slot", (q, len(slots))))
+            slots.append(rows)
+
+    for pos, inst in enumerate(transpiled.data):
+        op = inst.operation
+        qubits = [index(q) for q in inst.qubits]
+        if op.name in _TRANSPARENT_OPS:
+            body.append(("inst", inst))
+            continue
+        if pos in gates:
+            g = gates[pos]
+            pre = np.zeros((2, 2, n_bits), dtype=np.uint8)   # (比特位置, x/z, 随机比特)
+            for side in range(2):
+                for xz in range(2):
+                    pre[side, xz, 4 * g + 2 * xz + side] = 1
+            for side, q in enumerate(qubits):
+                merged = pre[side] ^ pending.pop(q, np.zeros((2, n_bits), dtype=np.uint8))
+                body.append(("slot", (q, len(slots))))
+                slots.append(merged)
+            body.append(("inst", inst))
+            # 门后修正帧 = G P G†: (x0, x1, z0, z1) 的线性变换
+            flat = np.stack([pre[0, 0], pre[1, 0], pre[0, 1], pre[1, 1]])
+            post = (maps[op.name].astype(np.int64) @ flat) % 2
+            for side, q in enumerate(qubits):
+                pending[q] = np.stack([post[side], post[2 + side]]).astype(np.uint8)
+            continue
+        for q in qubits:
+            flush(q)
+        body.append(("inst", inst))
+    for q in list(pending):
+        flush(q)
+
+    theta = ParameterVector("tw", 2 * len(slots))
+    qc = transpiled.copy_empty_like()
+    for kind, payload in body:
+        if kind == "inst":
+            qc.append(payload)
+        else:
+            q, s = payload
+            _pauli_slot(qc, theta[2 * s:2 * s + 2], q)
+    frame_map = np.concatenate(slots, axis=0) if slots else np.zeros((0, n_bits), dtype=np.uint8)
+    qc.metadata = dict(transpiled.metadata or {}, twirled=True)
+    return TwirlTemplate(qc, frame_map, len(gates), list(transpiled.parameters))
+
+
+def twirl_angles(template, frames):
+    """
+    frames: (..., 4 * num_gates) 的随机 Pauli 比特 -> (..., 2 * 槽数) 的 (α, β).
+    GF(2) 矩阵乘法用 float32 BLAS 完成 (和不超过 2^24，精确).
+    """
+    bits = (frames.astype(np.float32) @ template.frame_map.T.astype(np.float32)).astype(np.int64) & 1
+    x, z = bits[..., 0::2], bits[..., 1::2]
+    alpha = np.pi * (1 ^ x ^ z)
+    beta = np.pi * (1 - x)
+    return np.stack([alpha, beta], axis=-1).reshape(bits.shape[:-1] + (-1,))
+
+
+def twirl_values(template, values, num_twirls=DEFAULT_TWIRLS, seed=None):
+    """
+    values: (n_points, 原参数个数) 的扫描值 -> (n_points, K, 模板参数个数).
+    每个扫描点独立抽 K 组 Pauli 帧，全部一次向量化生成.
+    """
+    values = np.asarray(values, dtype=float).reshape(-1, len(template.parameters))
+    rng = np.random.default_rng(seed)
+    frames = rng.integers(0, 2, size=(len(values), num_twirls, 4 * template.num_gates), dtype=np.uint8)
+    angles = twirl_angles(template, frames)
+    full = np.concatenate([np.broadcast_to(values[:, None, :], angles.shape[:2] + values.shape[1:]), angles], -1)
+    column = {p.name: k for k, p in enumerate(template.parameters)}
+    column.update({f"tw[{k}]": len(template.parameters) + k for k in range(angles.shape[-1])})
+    return full[..., [column[p.name] for p in template.circuit.parameters]]
+
+
+def twirled_pub(template, gammas, num_twirls=DEFAULT_TWIRLS, shots=None, seed=None):
+    """
+    γ 扫描 × K 个旋转实例打包成一个 PUB，参数数组 (n_γ, K, n_params).
+    shots 为每个扫描点的总 shots，均分到 K 个实例 (向上取整).
+    """
+    values = twirl_values(template, gammas, num_twirls, seed)
+    if shots is None:
+        return (template.circuit, values)
+    return (template.circuit, values, -(-int(shots) // num_twirls))
+
+
+def twirl_points(points, num_twirls):
+    """扫描点元数据按 (点, 实例) 展开，与 twirled_pub 的展平顺序一致"""
+    return [dict(point, twirl=k) for point in points for k in range(num_twirls)]
+
+
+def merge_twirls(results):
+    """
+    把每个 PUB 的最后一个轴 (旋转实例) 的 shots 拼起来:
+    (..., K) x s shots -> (...) x K*s shots，返回与原扫描同构的 PrimitiveResult.
+    """
+    merged = []
+    for pub_result in results:
+        data = {}
+        shape = pub_result.data.shape[:-1]
+        for name in pub_result.data.keys():
+            bits = getattr(pub_result.data, name)
+            array = bits.array.reshape(shape + (-1, bits.array.shape[-1]))
+            data[name] = BitArray(array, bits.num_bits)
+        merged.append(SamplerPubResult(DataBin(**data, shape=shape), metadata=pub_result.metadata))
+    return PrimitiveResult(merged, metadata=results.metadata)